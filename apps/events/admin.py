@@ -1,6 +1,6 @@
 # apps/events/admin.py
 from django.contrib import admin
-from .models import Participant, RegistrationSetting
+from .models import Participant, RegistrationSetting, Job, Campaign
 
 
 @admin.register(Participant)
@@ -14,3 +14,20 @@ class ParticipantAdmin(admin.ModelAdmin):
 @admin.register(RegistrationSetting)
 class RegistrationSettingAdmin(admin.ModelAdmin):
     list_display = ('is_open', 'updated_at')
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'participant', 'status',
+                    'attempts', 'run_at', 'updated_at')
+    list_filter = ('status', 'kind')
+    raw_id_fields = ('participant',)
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'template', 'status', 'total',
+                    'sent', 'failed', 'skipped', 'created_at', 'finished_at')
+    list_filter = ('status', 'template')
+    readonly_fields = ('event_context', 'total', 'sent', 'failed', 'skipped',
+                       'chunks_total', 'chunks_done', 'last_error', 'finished_at')
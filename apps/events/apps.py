@@ -4,3 +4,35 @@ from django.apps import AppConfig
 class EventsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.events'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+        # Enregistre les handlers des jobs d'arrière-plan
+        from . import campaigns, tasks  # noqa: F401
+        # Comptage des requêtes SQL par route (voir metrics.py)
+        from .metrics import install_db_wrapper
+        connection_created.connect(install_db_wrapper, dispatch_uid='events-metrics-db-wrapper')
+
+        # Compteurs de participation (voir counters.py)
+        from . import counters
+        from .models import Participant
+        pre_save.connect(counters.participant_pre_save, sender=Participant,
+                         dispatch_uid='events-counters-pre-save')
+        post_save.connect(counters.participant_post_save, sender=Participant,
+                          dispatch_uid='events-counters-post-save')
+        pre_delete.connect(counters.participant_pre_delete, sender=Participant,
+                           dispatch_uid='events-counters-pre-delete')
+        post_delete.connect(counters.participant_post_delete, sender=Participant,
+                            dispatch_uid='events-counters-post-delete')
+
+        # Suppressions tracées pour l'instantané des tickets (voir snapshot.py)
+        from . import snapshot
+        post_delete.connect(snapshot.participant_post_delete, sender=Participant,
+                            dispatch_uid='events-snapshot-post-delete')
+
+        # Images QR d'un ticket supprimé retirées des caches (voir utils_qr.py)
+        from . import utils_qr
+        post_delete.connect(utils_qr.participant_post_delete, sender=Participant,
+                            dispatch_uid='events-qr-cache-post-delete')
@@ -0,0 +1,193 @@
+# apps/events/async_views.py
+"""
+Versions async des endpoints les plus sollicités, montées par
+project/urls_asgi.py quand le service tourne en ASGI (voir project/asgi.py) :
+
+- POST /api/verify/ (avec Idempotency-Key, voir idempotency.py) ;
+- GET /api/participants/ et GET /api/participants/<pk>/ ;
+- GET /api/event-settings/ et GET /api/toggle-registration/.
+
+Elles utilisent l'ORM et le cache async de Django : une connexion lente
+(passage à une entrée, tableau de bord) n'immobilise pas de thread. Le
+rendu des QR (CPU, disque) part dans un thread avec `sync_to_async`. Les
+autres méthodes (POST, PUT, DELETE...) sont déléguées aux vues DRF
+synchrones, avec les mêmes réponses qu'en WSGI.
+
+Authentification (et CSRF), permissions et débits ne sont pas réimplémentés :
+`_initial()` exécute APIView.initial() de la vue DRF correspondante, avec ses
+classes, dans un thread. La validation des tickets est le même code que la vue
+DRF (checkin.verify_ticket, idempotency.execute).
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.fields import DateTimeField
+
+from . import checkin, idempotency
+from .models import EventSettings, Participant, RegistrationSetting
+from .serializers import EventSettingsSerializer, ParticipantSerializer
+from .views import (
+    VERIFY_IDEMPOTENCY_SCOPE,
+    EventSettingsAPIView,
+    ParticipantListCreateAPIView,
+    ParticipantRetrieveUpdateDestroyAPIView,
+    ToggleRegistrationAPIView,
+    VerifyTicketAPIView,
+)
+
+
+def _delegate(view_class):
+    """Vue DRF synchrone appelée depuis une vue async (thread dédié)."""
+    return sync_to_async(view_class.as_view())
+
+
+def _initial(view_class, request, parse=False, **kwargs):
+    """
+    APIView.initial() de la vue DRF : authentification (et CSRF),
+    permissions et throttles par les classes de la vue, puis lecture du
+    corps si `parse`. Retourne (vue, réponse d'erreur rendue ou None).
+    """
+    view = view_class()
+    view.setup(request, **kwargs)
+    drf_request = view.initialize_request(request, **kwargs)
+    view.request = drf_request
+    view.headers = view.default_response_headers
+    view.format_kwarg = None
+    try:
+        view.initial(drf_request)
+        if parse:
+            drf_request.data
+    except Exception as exc:
+        response = view.finalize_response(drf_request, view.handle_exception(exc))
+        return view, response.render()
+    return view, None
+
+
+async def _check(view_class, request, parse=False, **kwargs):
+    """_initial() dans un thread (session et throttles sont synchrones)."""
+    return await sync_to_async(_initial)(view_class, request, parse, **kwargs)
+
+
+_verify_sync = _delegate(VerifyTicketAPIView)
+
+
+@csrf_exempt
+async def verify_ticket(request):
+    """Voir VerifyTicketAPIView ; même cœur (checkin.verify_ticket), mêmes contrôles DRF."""
+    if request.method != 'POST':
+        return await _verify_sync(request)
+    view, error = await _check(VerifyTicketAPIView, request, parse=True)
+    if error:
+        return error
+    data = view.request.data
+    try:
+        ticket_uuid = checkin.decode_verify_request(data)
+    except checkin.VerifyRejected as e:
+        return JsonResponse(e.body, status=e.status)
+
+    mark_used = bool(data.get('mark_used', False))
+    try:
+        key = idempotency.get_key(request.headers) if mark_used else None
+    except ValueError:
+        return JsonResponse({'detail': idempotency.INVALID_KEY}, status=400)
+    if key is None:
+        response_status, body = await sync_to_async(checkin.verify_ticket)(ticket_uuid, mark_used)
+        return JsonResponse(body, status=response_status)
+
+    request_fingerprint = idempotency.fingerprint(request.method, request.path, view.request.user, data)
+    response_status, body, headers = await sync_to_async(idempotency.execute)(
+        VERIFY_IDEMPOTENCY_SCOPE, key, request_fingerprint, lambda: checkin.verify_ticket(ticket_uuid, mark_used=True))
+    return JsonResponse(body, status=response_status, headers=headers, safe=False)
+
+
+_participant_list_sync = _delegate(ParticipantListCreateAPIView)
+
+# Champs calculés coûteux (rendu du QR) : sérialisés hors de la boucle
+QR_FIELDS = {'qr_base64', 'qr_url'}
+
+
+@csrf_exempt
+async def participant_list(request):
+    """Voir ParticipantListCreateAPIView (même filtrage, projection et curseur)."""
+    if request.method != 'GET':
+        return await _participant_list_sync(request)
+    view, error = await _check(ParticipantListCreateAPIView, request)
+    if error:
+        return error
+    drf_request = view.request
+    paginator = view.paginator
+    fields = view.get_projection()
+    try:
+        queryset = paginator.prepare_queryset(view.get_projected_queryset(fields), drf_request, view)
+    except APIException as e:
+        # Curseur ou filtres invalides : même réponse que le gestionnaire DRF
+        detail = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+        return JsonResponse(detail, status=e.status_code, safe=False)
+    paginator.set_page([obj async for obj in queryset])
+
+    serializer = ParticipantSerializer(
+        paginator.page, many=True, fields=fields, context=view.get_serializer_context())
+    if QR_FIELDS.intersection(fields):
+        data = await sync_to_async(lambda: serializer.data)()
+    else:
+        data = serializer.data
+    return JsonResponse(paginator.get_paginated_data(data))
+
+
+_participant_detail_sync = _delegate(ParticipantRetrieveUpdateDestroyAPIView)
+
+
+def _participant_detail_data(participant, request):
+    serializer = ParticipantSerializer(participant, context={'request': request})
+    data = serializer.data
+    data['qr_base64'] = serializer.get_qr_base64(participant)
+    data['qr_url'] = serializer.get_qr_url(participant)
+    return data
+
+
+@csrf_exempt
+async def participant_detail(request, pk):
+    """Voir ParticipantRetrieveUpdateDestroyAPIView.retrieve."""
+    if request.method != 'GET':
+        return await _participant_detail_sync(request, pk=pk)
+    view, error = await _check(ParticipantRetrieveUpdateDestroyAPIView, request, pk=pk)
+    if error:
+        return error
+    participant = await Participant.objects.filter(pk=pk).afirst()
+    if participant is None:
+        return JsonResponse({'detail': 'No Participant matches the given query.'}, status=404)
+    return JsonResponse(await sync_to_async(_participant_detail_data)(participant, view.request))
+
+
+_event_settings_sync = _delegate(EventSettingsAPIView)
+
+
+@csrf_exempt
+async def event_settings(request):
+    """Voir EventSettingsAPIView.get ; lecture via le cache du singleton."""
+    if request.method != 'GET':
+        return await _event_settings_sync(request)
+    _, error = await _check(EventSettingsAPIView, request)
+    if error:
+        return error
+    settings = await EventSettings.aget_solo()
+    return JsonResponse(EventSettingsSerializer(settings).data)
+
+
+_toggle_registration_sync = _delegate(ToggleRegistrationAPIView)
+
+
+@csrf_exempt
+async def registration_status(request):
+    """Voir ToggleRegistrationAPIView.get."""
+    if request.method != 'GET':
+        return await _toggle_registration_sync(request)
+    _, error = await _check(ToggleRegistrationAPIView, request)
+    if error:
+        return error
+    setting = await RegistrationSetting.aget_solo()
+    return JsonResponse({
+        'is_open': setting.is_open,
+        'updated_at': DateTimeField().to_representation(setting.updated_at),
+    })
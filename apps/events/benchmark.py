@@ -0,0 +1,140 @@
+# apps/events/benchmark.py
+"""
+Banc de mesure des endpoints principaux (voir la commande `benchmark`).
+
+Chaque scénario envoie des requêtes via le client de test DRF (pile Django
+complète : middlewares, sérialisation, ORM) depuis `concurrency` threads et
+mesure la latence (p50/p95/p99), le nombre de requêtes SQL par appel et le
+débit. Les participants sont créés au préalable avec `seed_participants()`.
+"""
+import itertools
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .models import AttendanceCounter, Participant
+
+SCENARIOS = ('create', 'list', 'retrieve', 'verify', 'toggle')
+
+
+def seed_participants(count, batch_size=1000):
+    """Insère `count` participants de test ; retourne leurs (id, ticket_uuid)."""
+    run = uuid.uuid4().hex[:8]
+    for start in range(0, count, batch_size):
+        created = Participant.objects.bulk_create([
+            Participant(
+                first_name=f'Bench{i}', last_name='Load',
+                email=f'bench-{run}-{i}@example.com',
+                organization='Bench', country='BJ', event_type='Bench',
+            )
+            for i in range(start, min(start + batch_size, count))
+        ])
+        AttendanceCounter.record(created, registered=1)
+    return list(Participant.objects.filter(email__startswith=f'bench-{run}-')
+                .values_list('id', 'ticket_uuid'))
+
+
+def percentile(sorted_values, p):
+    """Percentile au rang le plus proche sur une liste triée."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Scenario:
+    """Fabrique une requête (méthode, url, données, admin ?) pour l'appel n°i."""
+
+    def __init__(self, name, participants):
+        self.name = name
+        self.participants = participants
+        self.run = uuid.uuid4().hex[:8]
+
+    def request(self, i):
+        pk, ticket = self.participants[i % len(self.participants)]
+        if self.name == 'create':
+            return 'post', '/api/participants/', {
+                'first_name': 'New', 'last_name': 'Bench',
+                'email': f'new-{self.run}-{i}@example.com', 'event_type': 'Bench'}, False
+        if self.name == 'list':
+            return 'get', '/api/participants/?page_size=50', None, False
+        if self.name == 'retrieve':
+            return 'get', f'/api/participants/{pk}/', None, True
+        if self.name == 'verify':
+            # Chaque ticket n'est admis qu'une fois ; les suivants sont « déjà utilisé »
+            return 'post', '/api/verify/', {'ticket_uuid': str(ticket), 'mark_used': True}, False
+        if self.name == 'toggle':
+            return 'post', '/api/toggle-registration/', {'is_open': True}, True
+        raise ValueError(f"Unknown scenario '{self.name}'")
+
+
+def _worker(scenario, indexes, admin, samples, lock):
+    # Une erreur serveur compte comme un échec au lieu d'interrompre la mesure
+    client = APIClient(raise_request_exception=False)
+    admin_client = APIClient(raise_request_exception=False)
+    admin_client.force_authenticate(admin)
+    local = []
+    try:
+        for i in indexes:
+            method, url, data, as_admin = scenario.request(i)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(admin_client if as_admin else client, method)(url, data, format='json')
+                elapsed = time.perf_counter() - started
+            local.append((elapsed, len(queries.captured_queries), response.status_code < 400))
+    finally:
+        with lock:
+            samples.extend(local)
+        if threading.current_thread() is not threading.main_thread():
+            connections.close_all()
+
+
+def run_scenario(name, participants, requests, concurrency, admin):
+    """Exécute `requests` appels répartis sur `concurrency` threads ; retourne les mesures."""
+    scenario = Scenario(name, participants)
+    samples, lock = [], threading.Lock()
+    shards = [range(k, requests, concurrency) for k in range(concurrency)]
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        _worker(scenario, shards[0], admin, samples, lock)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for future in [executor.submit(_worker, scenario, s, admin, samples, lock) for s in shards]:
+                future.result()
+    wall = time.perf_counter() - started
+
+    latencies = sorted(s[0] * 1000 for s in samples)
+    queries = [s[1] for s in samples]
+    return {
+        'scenario': name,
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'errors': sum(1 for s in samples if not s[2]),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'max_ms': round(latencies[-1], 3),
+        'queries_per_request': round(sum(queries) / len(queries), 2),
+        'throughput_rps': round(len(samples) / wall, 1) if wall else None,
+    }
+
+
+def run_benchmark(seed=1000, requests=200, concurrency=(1, 4), scenarios=SCENARIOS):
+    """Peuple la base puis exécute chaque scénario à chaque niveau de concurrence."""
+    User = get_user_model()
+    admin = User.objects.filter(username='bench-admin').first() or User.objects.create_superuser(
+        username='bench-admin', email='bench-admin@example.com', password=None)
+    participants = seed_participants(seed)
+    return [
+        run_scenario(name, participants, requests, level, admin)
+        for name, level in itertools.product(scenarios, concurrency)
+    ]
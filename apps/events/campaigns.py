@@ -0,0 +1,233 @@
+# apps/events/campaigns.py
+"""
+Campagnes d'envoi des billets (invitation ou mise à jour) à une sélection
+de participants.
+
+- `start_campaign()` valide les filtres, fige le contexte de l'événement
+  (EventSettings) et la liste des destinataires, découpée en tranches de
+  CAMPAIGN_CHUNK_SIZE ids ; chaque tranche devient un job `campaign_chunk`
+  (ids dans le payload). Les filtres ne sont pas réévalués à l'envoi : un
+  destinataire supprimé ou sans email entre-temps est compté `skipped`, et
+  `remaining` (total - sent - failed - skipped) atteint toujours 0.
+- Un job rend les emails d'un lot en parallèle (CAMPAIGN_RENDER_WORKERS
+  threads), les envoie par la connexion SMTP du worker (mail.py, débit
+  limité) puis enregistre sa progression : compteurs de la campagne et
+  dernier id envoyé dans le payload du job. Après un redémarrage, le job
+  reprend au lot suivant.
+- Un lot entièrement refusé, ou une connexion SMTP perdue, lève une
+  exception : le job est rejoué (backoff) à partir du dernier id envoyé.
+  Les échecs isolés sont comptés et leurs ids gardés dans le payload
+  (`failed_ids`) ; `resume_campaign()` les reprogramme dans une nouvelle
+  tranche.
+- Plusieurs workers `process_jobs` traitent des tranches en parallèle ; le
+  débit total est au plus (nombre de workers) x EMAIL_RATE_LIMIT.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .email_utils import EventContext, build_participant_email, get_event_context
+from .filters import DATE_RANGE_PARAMS, EXACT_FILTERS, filter_participants
+from .jobs import enqueue, register
+from .mail import CONNECTION_ERRORS, get_mailer
+from .models import Campaign, Job, Participant
+from .utils_qr import build_qr_payload, render_qr_png
+
+KIND_CAMPAIGN_CHUNK = 'campaign_chunk'
+CAMPAIGN_FILTERS = ('used', *EXACT_FILTERS, *DATE_RANGE_PARAMS, 'search')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def clean_filters(filters):
+    """Ne garde que les filtres renseignés ; refuse les filtres inconnus."""
+    filters = {k: v for k, v in (filters or {}).items() if v not in (None, '')}
+    unknown = sorted(set(filters) - set(CAMPAIGN_FILTERS))
+    if unknown:
+        raise ValidationError({'filters': f"Unknown filter(s): {', '.join(unknown)}."})
+    return {k: str(v).lower() if isinstance(v, bool) else str(v) for k, v in filters.items()}
+
+
+def recipients(filters):
+    """Participants ciblés par les filtres (ceux sans email sont ignorés)."""
+    return filter_participants(Participant.objects.exclude(email=''), filters)
+
+
+def _chunk_ids(queryset, size):
+    """Parcourt les ids triés et produit des tranches de `size` ids."""
+    chunk = []
+    for pk in queryset.order_by('id').values_list('id', flat=True).iterator(chunk_size=5000):
+        chunk.append(pk)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def start_campaign(filters=None, template=Campaign.TEMPLATE_INVITATION, name='', created_by=None):
+    """Crée la campagne et programme ses tranches ; retourne la campagne."""
+    if template not in dict(Campaign.TEMPLATE_CHOICES):
+        raise ValidationError({'template': f"Expected one of: {', '.join(dict(Campaign.TEMPLATE_CHOICES))}."})
+    filters = clean_filters(filters)
+    queryset = recipients(filters)
+
+    with transaction.atomic():
+        campaign = Campaign.objects.create(
+            name=name or '',
+            template=template,
+            filters=filters,
+            event_context=get_event_context().values,
+            created_by=created_by,
+        )
+        chunks = list(_chunk_ids(queryset, _setting('CAMPAIGN_CHUNK_SIZE', 500)))
+        campaign.total = sum(len(ids) for ids in chunks)
+        campaign.chunks_total = len(chunks)
+        if not chunks:
+            campaign.status = Campaign.STATUS_DONE
+            campaign.finished_at = timezone.now()
+        campaign.save(update_fields=['total', 'chunks_total', 'status', 'finished_at', 'updated_at'])
+        for ids in chunks:
+            enqueue(KIND_CAMPAIGN_CHUNK, payload={'campaign': campaign.pk, 'ids': ids})
+    return campaign
+
+
+def cancel_campaign(campaign):
+    """Arrête la campagne : les lots restants ne sont pas envoyés."""
+    return Campaign.objects.filter(pk=campaign.pk, status=Campaign.STATUS_RUNNING).update(
+        status=Campaign.STATUS_CANCELLED, updated_at=timezone.now()) == 1
+
+
+def resume_campaign(campaign):
+    """
+    Relance une campagne annulée ou dont des tranches ont échoué
+    définitivement ; chaque tranche reprend après son dernier lot envoyé.
+    Les destinataires en échec (`failed_ids`) sont renvoyés dans une
+    nouvelle tranche. Retourne le nombre de tranches reprogrammées.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        Campaign.objects.filter(pk=campaign.pk, status=Campaign.STATUS_CANCELLED).update(
+            status=Campaign.STATUS_RUNNING, updated_at=now)
+        chunk_jobs = list(Job.objects.select_for_update().filter(
+            kind=KIND_CAMPAIGN_CHUNK, payload__campaign=campaign.pk,
+            status__in=[Job.STATUS_DONE, Job.STATUS_FAILED]))
+        stopped = [job.pk for job in chunk_jobs if not job.payload.get('finished')]
+        resumed = Job.objects.filter(pk__in=stopped).update(
+            status=Job.STATUS_PENDING, attempts=0, run_at=now, locked_at=None, updated_at=now)
+
+        failed_ids = []
+        for job in chunk_jobs:
+            if job.payload.get('finished') and job.payload.get('failed_ids'):
+                failed_ids += job.payload.pop('failed_ids')
+                Job.objects.filter(pk=job.pk).update(payload=job.payload)
+        if failed_ids:
+            failed_ids.sort()
+            enqueue(KIND_CAMPAIGN_CHUNK, payload={'campaign': campaign.pk, 'ids': failed_ids})
+            Campaign.objects.filter(pk=campaign.pk).update(
+                failed=F('failed') - len(failed_ids), chunks_total=F('chunks_total') + 1,
+                updated_at=now)
+            Campaign.objects.filter(pk=campaign.pk, status=Campaign.STATUS_DONE).update(
+                status=Campaign.STATUS_RUNNING, finished_at=None)
+            resumed += 1
+    return resumed
+
+
+def _event_context(campaign):
+    """Contexte figé de la campagne (les dates sont stockées en ISO 8601)."""
+    values = dict(campaign.event_context)
+    for key in ('start_date', 'end_date'):
+        if isinstance(values.get(key), str):
+            values[key] = parse_datetime(values[key])
+    return EventContext(values)
+
+
+def _is_cancelled(campaign):
+    return Campaign.objects.filter(pk=campaign.pk, status=Campaign.STATUS_CANCELLED).exists()
+
+
+@register(KIND_CAMPAIGN_CHUNK)
+def send_campaign_chunk(job):
+    """Envoie une tranche de la campagne, lot par lot, en enregistrant la progression."""
+    campaign = Campaign.objects.filter(pk=job.payload.get('campaign')).first()
+    if campaign is None or job.payload.get('finished') or campaign.status == Campaign.STATUS_CANCELLED:
+        return
+
+    context = _event_context(campaign)
+    is_update = campaign.template == Campaign.TEMPLATE_UPDATE
+    after = job.payload.get('done_id', job.payload.get('first_id', 1) - 1)
+    if 'ids' in job.payload:
+        ids = [pk for pk in job.payload['ids'] if pk > after]
+    else:
+        # Tranche programmée avant le gel des destinataires : bornes d'ids
+        ids = list(recipients(campaign.filters).filter(id__gt=after, id__lte=job.payload['last_id'])
+                   .order_by('id').values_list('id', flat=True))
+
+    qr_variant = _setting('QR_EMAIL_VARIANT', 'email')
+
+    def render(participant):
+        qr_bytes = render_qr_png(build_qr_payload(participant), qr_variant)
+        return build_participant_email(participant, qr_bytes, is_update=is_update, event_context=context)
+
+    mailer = get_mailer()
+    batch_size = _setting('EMAIL_BATCH_SIZE', 50)
+    with ThreadPoolExecutor(max_workers=_setting('CAMPAIGN_RENDER_WORKERS', 4)) as executor:
+        for start in range(0, len(ids), batch_size):
+            if _is_cancelled(campaign):
+                return
+            batch_ids = ids[start:start + batch_size]
+            # Supprimés ou sans email depuis le lancement : ignorés
+            batch = list(Participant.objects.exclude(email='').filter(id__in=batch_ids).order_by('id'))
+            results = mailer.send_many(executor.map(render, batch)) if batch else []
+            # Résultats enregistrés jusqu'à la première erreur de connexion ;
+            # un lot sans aucun envoi réussi est rejoué en entier
+            done = next((i for i, (_, error) in enumerate(results)
+                         if isinstance(error, CONNECTION_ERRORS)), len(results))
+            if results and all(error for _, error in results):
+                done = 0
+            if done == len(results):
+                done_id = batch_ids[-1]
+            else:
+                done_id = batch[done - 1].pk if done else None
+
+            if done_id is not None:
+                failed = [(participant, f"{message.to[0]}: {error}")
+                          for participant, (message, error) in zip(batch[:done], results)
+                          if error]
+                skipped = sum(1 for pk in batch_ids if pk <= done_id) - done
+                job.payload['done_id'] = done_id
+                if failed:
+                    job.payload['failed_ids'] = (
+                        job.payload.get('failed_ids', []) + [participant.pk for participant, _ in failed])
+                with transaction.atomic():
+                    updates = {
+                        'sent': F('sent') + done - len(failed),
+                        'failed': F('failed') + len(failed),
+                        'skipped': F('skipped') + skipped,
+                        'updated_at': timezone.now(),
+                    }
+                    if failed:
+                        updates['last_error'] = failed[-1][1]
+                    Campaign.objects.filter(pk=campaign.pk).update(**updates)
+                    Job.objects.filter(pk=job.pk).update(payload=job.payload)
+            if done < len(results):
+                error = results[done][1]
+                raise RuntimeError(f"Sending stopped at {results[done][0].to[0]}: {error}") from error
+
+    now = timezone.now()
+    job.payload['finished'] = True
+    with transaction.atomic():
+        Job.objects.filter(pk=job.pk).update(payload=job.payload)
+        Campaign.objects.filter(pk=campaign.pk).update(
+            chunks_done=F('chunks_done') + 1, updated_at=now)
+        Campaign.objects.filter(
+            pk=campaign.pk, status=Campaign.STATUS_RUNNING,
+            chunks_done__gte=F('chunks_total'),
+        ).update(status=Campaign.STATUS_DONE, finished_at=now)
@@ -0,0 +1,168 @@
+# apps/events/checkin.py
+"""
+Validation des tickets :
+
+- `decode_verify_request()` puis `verify_ticket()` : cœur de POST /api/verify/,
+  partagé par la vue DRF et sa version async (async_views.py) ;
+- `check_in_batch()` : validation par lot des scans mis en tampon par les
+  appareils hors-ligne.
+"""
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AttendanceCounter, Participant
+from .serializers import ParticipantCheckInSerializer
+from .ticket_codes import InvalidTicketCode, decode_ticket
+
+STATUS_ADMITTED = 'admitted'
+STATUS_ALREADY_USED = 'already_used'
+STATUS_DUPLICATE = 'duplicate'
+STATUS_NOT_FOUND = 'not_found'
+STATUS_INVALID = 'invalid'
+
+
+class VerifyRejected(Exception):
+    """Requête /api/verify/ refusée avant tout accès à la base : (statut, corps)."""
+
+    def __init__(self, status, body):
+        super().__init__(status, body)
+        self.status = status
+        self.body = body
+
+
+def decode_verify_request(data):
+    """
+    UUID du ticket de la requête (`ticket_uuid` ou `ticket`), signature
+    vérifiée en mémoire ; VerifyRejected si le code est absent ou invalide.
+    """
+    code = data.get('ticket_uuid') or data.get('ticket')
+    if not code:
+        raise VerifyRejected(400, {'detail': 'ticket_uuid required'})
+    try:
+        return decode_ticket(code)
+    except InvalidTicketCode:
+        raise VerifyRejected(404, {'valid': False})
+
+
+def verify_ticket(ticket_uuid, mark_used=False):
+    """
+    (statut, corps) de POST /api/verify/ : 404 si le ticket n'existe pas,
+    sinon 200 avec `valid` (et `already_used`). Avec `mark_used`, validation
+    par l'UPDATE conditionnel de Participant.check_in.
+    """
+    if mark_used:
+        admitted, participant = Participant.check_in(ticket_uuid)
+    else:
+        participant = Participant.objects.only(*Participant.CHECK_IN_FIELDS).filter(
+            ticket_uuid=ticket_uuid).first()
+        admitted = participant is not None and not participant.used
+
+    if participant is None:
+        return 404, {'valid': False}
+    data = ParticipantCheckInSerializer(participant).data
+    if not admitted:
+        return 200, {'valid': False, 'already_used': True, 'participant': data}
+    return 200, {'valid': True, 'participant': data}
+
+
+def _parse_scan(record, now):
+    """Retourne (ticket_uuid, scanned_at) ou None si l'enregistrement est invalide."""
+    if not isinstance(record, dict):
+        return None
+    try:
+        # Code signé vérifié sans accès à la base (voir ticket_codes)
+        ticket = decode_ticket(record.get('ticket_uuid') or record.get('ticket'))
+    except InvalidTicketCode:
+        return None
+
+    scanned_at = record.get('scanned_at')
+    if scanned_at:
+        try:
+            scanned_at = parse_datetime(str(scanned_at))
+        except ValueError:
+            scanned_at = None
+        if scanned_at is None:
+            return None
+        if timezone.is_naive(scanned_at):
+            scanned_at = timezone.make_aware(scanned_at, dt_timezone.utc)
+        # Horloge d'appareil en avance : on ne date pas un passage dans le futur
+        scanned_at = min(scanned_at, now)
+    else:
+        scanned_at = now
+    return ticket, scanned_at
+
+
+def check_in_batch(records):
+    """
+    Applique une rafale de scans `{ticket_uuid, scanned_at, gate_id}`.
+
+    - Tous les tickets sont lus en une requête (`ticket_uuid IN (...)`).
+    - Pour un même ticket scanné plusieurs fois dans le lot, le scan dont
+      l'horodatage appareil est le plus ancien gagne ; les autres sont
+      `duplicate`.
+    - Les gagnants sont validés en un seul UPDATE conditionnel, `used_at`
+      prenant l'horodatage de l'appareil.
+
+    Retourne une liste (même ordre que `records`) de
+    `(record, status, participant | None)`.
+    """
+    now = timezone.now()
+    parsed = [_parse_scan(record, now) for record in records]
+
+    # Premier scan (horodatage appareil) par ticket
+    winners = {}
+    for index, scan in enumerate(parsed):
+        if scan is None:
+            continue
+        ticket, scanned_at = scan
+        best = winners.get(ticket)
+        if best is None or scanned_at < parsed[best][1]:
+            winners[ticket] = index
+
+    with transaction.atomic():
+        participants = {
+            p.ticket_uuid: p
+            for p in Participant.objects.select_for_update()
+            .only(*Participant.CHECK_IN_FIELDS)
+            .filter(ticket_uuid__in=list(winners))
+        }
+        to_admit = {
+            ticket: parsed[index][1]
+            for ticket, index in winners.items()
+            if ticket in participants and not participants[ticket].used
+        }
+        if to_admit:
+            Participant.objects.filter(ticket_uuid__in=list(to_admit), used=False).update(
+                used=True,
+                used_at=Case(
+                    *[When(ticket_uuid=t, then=Value(ts)) for t, ts in to_admit.items()],
+                    output_field=DateTimeField(),
+                ),
+                changed_at=now,
+            )
+            for ticket, scanned_at in to_admit.items():
+                participants[ticket].used = True
+                participants[ticket].used_at = scanned_at
+            AttendanceCounter.record([participants[t] for t in to_admit], used=1)
+
+    results = []
+    for index, (record, scan) in enumerate(zip(records, parsed)):
+        if scan is None:
+            results.append((record, STATUS_INVALID, None))
+            continue
+        ticket = scan[0]
+        participant = participants.get(ticket)
+        if participant is None:
+            status = STATUS_NOT_FOUND
+        elif winners[ticket] != index:
+            status = STATUS_DUPLICATE
+        elif ticket in to_admit:
+            status = STATUS_ADMITTED
+        else:
+            status = STATUS_ALREADY_USED
+        results.append((record, status, participant))
+    return results
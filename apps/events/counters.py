@@ -0,0 +1,132 @@
+# apps/events/counters.py
+"""
+Compteurs de participation (`AttendanceCounter`) : inscrits et validés, au
+total et par type d'événement / pays / organisation, arrivées par heure.
+
+Ils sont maintenus par incréments :
+- `Participant.mark_used`, `Participant.check_in`, `check_in_batch` et
+  l'import en masse appellent `AttendanceCounter.record()` dans la
+  transaction de l'écriture ;
+- les créations, modifications et suppressions unitaires (API, admin) passent
+  par les signaux ci-dessous (branchés dans EventsConfig.ready).
+
+Les écritures qui contournent l'ORM (UPDATE/DELETE en masse, SQL manuel) ne
+sont pas comptées : `rebuild()` (commande `rebuild_counters`) recalcule tout.
+"""
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncHour
+
+from .models import AttendanceCounter, Participant
+
+COUNTED_FIELDS = ('used', 'used_at') + AttendanceCounter.PARTICIPANT_DIMENSIONS
+
+
+def get_counters(dimensions=AttendanceCounter.PARTICIPANT_DIMENSIONS, arrivals=False):
+    """
+    Lecture des compteurs en une requête sur la (petite) table des compteurs :
+    {'total', 'used', 'event_type': {valeur: {'total', 'used'}}, 'country': {...}, ...}
+    et, avec `arrivals`, 'arrivals_by_hour': {heure: validations}.
+    """
+    data = {'total': 0, 'used': 0}
+    data.update({dimension: {} for dimension in dimensions})
+    wanted = [AttendanceCounter.DIMENSION_TOTAL, *dimensions]
+    if arrivals:
+        data['arrivals_by_hour'] = {}
+        wanted.append(AttendanceCounter.DIMENSION_ARRIVAL_HOUR)
+    rows = (
+        AttendanceCounter.objects.filter(dimension__in=wanted)
+        .order_by('dimension', 'key').values_list('dimension', 'key', 'registered', 'used')
+    )
+    for dimension, key, registered, used in rows:
+        if dimension == AttendanceCounter.DIMENSION_TOTAL:
+            data['total'], data['used'] = registered, used
+        elif dimension == AttendanceCounter.DIMENSION_ARRIVAL_HOUR:
+            if used:
+                data['arrivals_by_hour'][key] = used
+        elif registered:
+            data[dimension][key] = {'total': registered, 'used': used}
+    return data
+
+
+def rebuild():
+    """Recalcule tous les compteurs depuis la table des participants."""
+    totals = {}
+    aggregates = {'registered': Count('pk'), 'used': Count('pk', filter=Q(used=True))}
+    row = Participant.objects.aggregate(**aggregates)
+    totals[(AttendanceCounter.DIMENSION_TOTAL, '')] = row
+    for dimension in AttendanceCounter.PARTICIPANT_DIMENSIONS:
+        for row in Participant.objects.order_by().values(dimension).annotate(**aggregates):
+            totals[(dimension, row[dimension] or '')] = row
+    arrivals = (
+        Participant.objects.filter(used=True, used_at__isnull=False).order_by()
+        .values(hour=TruncHour('used_at', tzinfo=dt_timezone.utc)).annotate(used=Count('pk'))
+    )
+    for row in arrivals:
+        key = (AttendanceCounter.DIMENSION_ARRIVAL_HOUR, AttendanceCounter.arrival_hour(row['hour']))
+        totals[key] = {'registered': 0, 'used': row['used']}
+
+    with transaction.atomic():
+        AttendanceCounter.objects.update(registered=0, used=0)
+        AttendanceCounter.objects.bulk_create(
+            [
+                AttendanceCounter(dimension=dimension, key=key,
+                                  registered=row['registered'], used=row['used'])
+                for (dimension, key), row in totals.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['dimension', 'key'],
+            update_fields=['registered', 'used'],
+        )
+    return len(totals)
+
+
+def _delta(before, after):
+    """Deltas {(dimension, key): (registered, used)} entre deux états d'un participant."""
+    deltas = {}
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None:
+            continue
+        used = sign if state['used'] else 0
+        for key, (r, u) in AttendanceCounter.deltas_for(Participant(**state), sign, used).items():
+            registered_delta, used_delta = deltas.get(key, (0, 0))
+            deltas[key] = (registered_delta + r, used_delta + u)
+    return deltas
+
+
+def _counted_state(participant):
+    return {name: getattr(participant, name) for name in COUNTED_FIELDS}
+
+
+def participant_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Mémorise l'état compté avant une modification (une requête, seulement si utile)."""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(COUNTED_FIELDS):
+        return
+    instance._counted_state = (
+        Participant.objects.filter(pk=instance.pk).values(*COUNTED_FIELDS).first())
+
+
+def participant_post_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        AttendanceCounter.record([instance], registered=1, used=1 if instance.used else 0)
+        return
+    before = instance.__dict__.pop('_counted_state', None)
+    if before is not None:
+        AttendanceCounter.apply(_delta(before, _counted_state(instance)))
+
+
+def participant_pre_delete(sender, instance, **kwargs):
+    # L'instance peut être périmée (validée entre-temps par un autre process)
+    instance._counted_state = (
+        Participant.objects.filter(pk=instance.pk).values(*COUNTED_FIELDS).first())
+
+
+def participant_post_delete(sender, instance, **kwargs):
+    before = instance.__dict__.pop('_counted_state', None) or _counted_state(instance)
+    AttendanceCounter.apply(_delta(before, None))
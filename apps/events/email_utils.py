@@ -1,184 +1,246 @@
 # apps/events/email_utils.py
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from email.mime.image import MIMEImage
+from django.template.loader import get_template
 from django.conf import settings
+from .mail import get_mailer
 from .models import EventSettings
+from functools import lru_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+HTML_TEMPLATE = 'emails/participant_invitation.html'
+TEXT_TEMPLATE = 'emails/participant_invitation.txt'
+# Fragments that only depend on the event: rendered once per EventSettings version
+EVENT_FRAGMENTS = {
+    'event_header': 'emails/_event_header.html',
+    'event_info': 'emails/_event_info.html',
+    'event_info_text': 'emails/_event_info.txt',
+}
+
+
+@lru_cache(maxsize=None)
+def get_email_template(name):
+    """Compiled template, loaded once per process."""
+    return get_template(name)
+
+
+class EventContext:
+    """
+    Event-level part of the email context and its pre-rendered fragments.
+
+    Args:
+        values: dict with event_name, event_description, venue, start_date, end_date, logo_url
+    """
+
+    def __init__(self, values):
+        self.values = values
+        self._fragments = {}
+
+    def fragments(self, is_update=False):
+        """Rendered event fragments for the invitation or update variant (memoized)."""
+        fragments = self._fragments.get(is_update)
+        if fragments is None:
+            context = {**self.values, 'is_update': is_update}
+            fragments = {
+                name: get_email_template(template).render(context)
+                for name, template in EVENT_FRAGMENTS.items()
+            }
+            self._fragments[is_update] = fragments
+        return fragments
+
+
+_event_context_cache = {}
+
+
+def get_event_context(event_settings=None):
+    """
+    Event context built from EventSettings, cached until EventSettings.updated_at changes.
+
+    Args:
+        event_settings: Optional EventSettings instance (defaults to get_solo())
+
+    Returns:
+        EventContext
+    """
+    event_settings = event_settings or EventSettings.get_solo()
+    key = (event_settings.pk, event_settings.updated_at, settings.APP_DOMAIN)
+    cached = _event_context_cache.get('current')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    event_context = EventContext({
+        'event_name': event_settings.event_name,
+        'event_description': event_settings.event_description,
+        'venue': event_settings.venue,
+        'start_date': event_settings.start_date,
+        'end_date': event_settings.end_date,
+        'logo_url': f"{settings.APP_DOMAIN}{event_settings.logo.url}" if event_settings.logo else None,
+    })
+    _event_context_cache['current'] = (key, event_context)
+    return event_context
+
+
+def build_participant_email(participant, qr_bytes=None, is_update=False, event_context=None):
+    """
+    Build the invitation (or update) email, QR code as an inline CID image, without sending it.
+    Only the participant-specific part of the templates is rendered here; the
+    event fragments come from the cached EventContext.
+
+    Args:
+        participant: Participant instance
+        qr_bytes: Optional QR code image bytes
+        is_update: True for the "invitation updated" variant
+        event_context: Optional EventContext (or dict of values), e.g. a campaign snapshot
+
+    Returns:
+        EmailMultiAlternatives
+    """
+    if event_context is None:
+        event_context = get_event_context()
+    elif not isinstance(event_context, EventContext):
+        event_context = EventContext(event_context)
+
+    # The QR code is attached as an inline image referenced by its Content-ID
+    qr_cid = f"qr-{participant.ticket_uuid}@ticket" if qr_bytes else None
+
+    # Prepare context for template
+    context = {
+        **event_context.values,
+        **event_context.fragments(is_update),
+        'participant': participant,
+        'is_update': is_update,
+        'qr_cid': qr_cid,
+    }
+
+    # Render email templates
+    try:
+        html_content = get_email_template(HTML_TEMPLATE).render(context)
+        text_content = get_email_template(TEXT_TEMPLATE).render(context)
+    except Exception as template_error:
+        logger.error(f"Template rendering error: {template_error}")
+        # Fallback to simple text email
+        if is_update:
+            title = "Mise à jour de votre invitation"
+            message = "Vos informations de participation ont été mises à jour !"
+            ticket = "Votre billet d'entrée mis à jour est en pièce jointe."
+        else:
+            title = "Invitation à l'événement"
+            message = "Vous êtes invité(e) à participer à notre événement !"
+            ticket = "Votre billet d'entrée est en pièce jointe."
+        html_content = f"""
+        <html>
+        <body>
+            <h1>{title}</h1>
+            <p>Bonjour {participant.first_name},</p>
+            <p>{message}</p>
+            <p>{ticket}</p>
+        </body>
+        </html>
+        """
+        text_content = f"""
+        {title}
+
+        Bonjour {participant.first_name},
+
+        {message}
+        {ticket}
+        """
+
+    # Create email subject
+    event_type = participant.event_type or "l'événement"
+    if is_update:
+        subject = f'📝 Mise à jour de votre invitation à {event_type}'
+    else:
+        subject = f'🎉 Invitation à {event_type} - Votre billet QR code'
+
+    # Create email message
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=text_content,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[participant.email]
+    )
+
+    # Attach HTML version
+    email.attach_alternative(html_content, "text/html")
+
+    # multipart/related: the HTML part shows the PNG through "cid:" instead of
+    # a base64 data URI (about 33% larger, and stripped by many mail clients)
+    if qr_bytes:
+        image = MIMEImage(qr_bytes, 'png')
+        image.add_header('Content-ID', f'<{qr_cid}>')
+        image.add_header('Content-Disposition', 'inline', filename='billet-qr.png')
+        email.attach(image)
+        email.mixed_subtype = 'related'
+    return email
+
+
+def build_participant_invitation_email(participant, qr_bytes=None):
+    """Build the invitation email without sending it (see build_participant_email)."""
+    return build_participant_email(participant, qr_bytes)
+
+
 def send_participant_invitation_email(participant, qr_bytes=None):
     """
-    Send invitation email to participant with QR code displayed inline.
-    
+    Send invitation email to participant with QR code displayed inline (CID image).
+    The message goes through the worker's pooled SMTP connection (see mail.py).
+
     Args:
         participant: Participant instance
         qr_bytes: Optional QR code image bytes
-    
+
     Returns:
         bool: True if email sent successfully, False otherwise
     """
     try:
-        # Convert QR bytes to base64 for inline display
-        qr_base64 = None
-        if qr_bytes:
-            import base64
-            qr_base64 = base64.b64encode(qr_bytes).decode('utf-8')
-        
-        # Get event settings
-        event_settings = EventSettings.get_solo()
-        
-        # Prepare context for template
-        context = {
-            'participant': participant,
-            'is_update': False,
-            'qr_base64': qr_base64,
-            'event_name': event_settings.event_name,
-            'event_description': event_settings.event_description,
-            'venue': event_settings.venue,
-            'start_date': event_settings.start_date,
-            'end_date': event_settings.end_date,
-            'logo_url': f"{settings.APP_DOMAIN}{event_settings.logo.url}" if event_settings.logo else None,
-        }
-        
-        # Render email templates
-        try:
-            html_content = render_to_string('emails/participant_invitation.html', context)
-            text_content = render_to_string('emails/participant_invitation.txt', context)
-        except Exception as template_error:
-            logger.error(f"Template rendering error: {template_error}")
-            # Fallback to simple text email
-            html_content = f"""
-            <html>
-            <body>
-                <h1>Invitation à l'événement</h1>
-                <p>Bonjour {participant.first_name},</p>
-                <p>Vous êtes invité(e) à participer à notre événement !</p>
-                <p>Votre billet d'entrée est en pièce jointe.</p>
-            </body>
-            </html>
-            """
-            text_content = f"""
-            Invitation à l'événement
-            
-            Bonjour {participant.first_name},
-            
-            Vous êtes invité(e) à participer à notre événement !
-            Votre billet d'entrée est en pièce jointe.
-            """
-        
-        # Create email subject
-        event_type = participant.event_type or "l'événement"
-        subject = f'🎉 Invitation à {event_type} - Votre billet QR code'
-        
-        # Create email message
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[participant.email]
-        )
-        
-        # Attach HTML version
-        email.attach_alternative(html_content, "text/html")
-        
-        # QR code is now displayed inline in the email, no attachment needed
-        
-        # Send email
-        email.send(fail_silently=False)
-        
+        get_mailer().send(build_participant_email(participant, qr_bytes))
         logger.info(f"Invitation email sent successfully to {participant.email}")
         return True
-        
     except Exception as e:
         logger.error(f"Failed to send invitation email to {participant.email}: {str(e)}")
         return False
 
 
+def send_participant_invitation_emails(participants, qr_bytes_for=None):
+    """
+    Send invitations to many participants over a single SMTP connection,
+    within EMAIL_RATE_LIMIT.
+
+    Args:
+        participants: iterable of Participant instances
+        qr_bytes_for: Optional callable returning the QR bytes of a participant
+
+    Returns:
+        list: (participant, exception or None) pairs
+    """
+    participants = [p for p in participants if p.email]
+    event_context = get_event_context()
+    messages = [
+        build_participant_email(p, qr_bytes_for(p) if qr_bytes_for else None,
+                                event_context=event_context)
+        for p in participants
+    ]
+    results = get_mailer().send_many(messages)
+    return [(p, error) for p, (_, error) in zip(participants, results)]
+
+
 def send_participant_update_email(participant, qr_bytes=None):
     """
     Send update notification email to participant.
-    
+
     Args:
         participant: Participant instance
         qr_bytes: Optional QR code image bytes
-    
+
     Returns:
         bool: True if email sent successfully, False otherwise
     """
     try:
-        # Convert QR bytes to base64 for inline display
-        qr_base64 = None
-        if qr_bytes:
-            import base64
-            qr_base64 = base64.b64encode(qr_bytes).decode('utf-8')
-        
-        # Get event settings
-        event_settings = EventSettings.get_solo()
-        
-        # Prepare context for template
-        context = {
-            'participant': participant,
-            'is_update': True,
-            'qr_base64': qr_base64,
-            'event_name': event_settings.event_name,
-            'event_description': event_settings.event_description,
-            'venue': event_settings.venue,
-            'start_date': event_settings.start_date,
-            'end_date': event_settings.end_date,
-            'logo_url': f"{settings.APP_DOMAIN}{event_settings.logo.url}" if event_settings.logo else None,
-        }
-        
-        # Render email templates
-        try:
-            html_content = render_to_string('emails/participant_invitation.html', context)
-            text_content = render_to_string('emails/participant_invitation.txt', context)
-        except Exception as template_error:
-            logger.error(f"Template rendering error: {template_error}")
-            # Fallback to simple text email
-            html_content = f"""
-            <html>
-            <body>
-                <h1>Mise à jour de votre invitation</h1>
-                <p>Bonjour {participant.first_name},</p>
-                <p>Vos informations de participation ont été mises à jour !</p>
-                <p>Votre billet d'entrée mis à jour est en pièce jointe.</p>
-            </body>
-            </html>
-            """
-            text_content = f"""
-            Mise à jour de votre invitation
-            
-            Bonjour {participant.first_name},
-            
-            Vos informations de participation ont été mises à jour !
-            Votre billet d'entrée mis à jour est en pièce jointe.
-            """
-        
-        # Create email subject
-        event_type = participant.event_type or "l'événement"
-        subject = f'📝 Mise à jour de votre invitation à {event_type}'
-        
-        # Create email message
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[participant.email]
-        )
-        
-        # Attach HTML version
-        email.attach_alternative(html_content, "text/html")
-        
-        # QR code is now displayed inline in the email, no attachment needed
-        
-        # Send email
-        email.send(fail_silently=False)
-        
+        get_mailer().send(build_participant_email(participant, qr_bytes, is_update=True))
         logger.info(f"Update email sent successfully to {participant.email}")
         return True
-        
     except Exception as e:
         logger.error(f"Failed to send update email to {participant.email}: {str(e)}")
         return False
@@ -0,0 +1,107 @@
+# apps/events/exports.py
+"""
+Export des participants (et de leur présence) en CSV ou JSON Lines.
+
+Les lignes sont lues par lots de CHUNK_SIZE (pagination par id) et écrites au
+fil de l'eau : la mémoire reste constante quelle que soit la taille de la table.
+`aiter_export()` produit le même texte pour une réponse servie en ASGI.
+"""
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_FIELDS = [
+    'id', 'first_name', 'last_name', 'email',
+    'phone', 'organization', 'position', 'country', 'event_type',
+    'ticket_uuid', 'created_at', 'used', 'used_at',
+]
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """Pseudo-fichier : csv.writer retourne directement la ligne formatée."""
+
+    def write(self, value):
+        return value
+
+
+def _fetch(queryset, after):
+    """Lot suivant de CHUNK_SIZE lignes après l'id `after` (pagination par id)."""
+    return list(queryset.filter(id__gt=after).order_by('id').values_list(*EXPORT_FIELDS)[:CHUNK_SIZE])
+
+
+def _chunks(queryset):
+    after = 0
+    while True:
+        rows = _fetch(queryset, after)
+        if rows:
+            yield rows
+        if len(rows) < CHUNK_SIZE:
+            return
+        after = rows[-1][0]
+
+
+async def _achunks(queryset):
+    """_chunks() pour ASGI : chaque lot est lu dans un thread, entre deux envois."""
+    after = 0
+    while True:
+        rows = await sync_to_async(_fetch)(queryset, after)
+        if rows:
+            yield rows
+        if len(rows) < CHUNK_SIZE:
+            return
+        after = rows[-1][0]
+
+
+def _format_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def _formatter(export_format):
+    """(en-tête, fonction ligne -> texte) du format."""
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        # BOM pour qu'Excel détecte l'UTF-8
+        return ('\ufeff' + writer.writerow(EXPORT_FIELDS),
+                lambda row: writer.writerow([_format_value(value) for value in row]))
+    if export_format == 'jsonl':
+        return '', lambda row: json.dumps(
+            dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+    raise ValueError(f"Unsupported export format '{export_format}'")
+
+
+def _iter(queryset, header, format_row):
+    if header:
+        yield header
+    for rows in _chunks(queryset):
+        yield ''.join(format_row(row) for row in rows)
+
+
+async def _aiter(queryset, header, format_row):
+    if header:
+        yield header
+    async for rows in _achunks(queryset):
+        yield ''.join(format_row(row) for row in rows)
+
+
+def iter_export(queryset, export_format):
+    """Texte de l'export, un morceau par lot de lignes."""
+    return _iter(queryset, *_formatter(export_format))
+
+
+def aiter_export(queryset, export_format):
+    """
+    Version async de iter_export() : sous ASGI, Django lirait un itérateur
+    synchrone en entier dans un thread avant de l'envoyer.
+    """
+    return _aiter(queryset, *_formatter(export_format))
@@ -0,0 +1,105 @@
+# apps/events/filters.py
+"""
+Filtres des participants à partir des paramètres de requête, partagés par la
+liste, l'export et les commandes de management.
+"""
+import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+TRUE_VALUES = ('1', 'true', 'yes', 'oui')
+FALSE_VALUES = ('0', 'false', 'no', 'non')
+
+# Colonnes parcourues par ?search= (index trigramme sur PostgreSQL)
+SEARCH_FIELDS = (
+    'first_name', 'last_name', 'email', 'phone',
+    'organization', 'position', 'country', 'event_type',
+)
+# Filtres d'égalité simples (index b-tree)
+EXACT_FILTERS = ('event_type', 'country', 'email')
+# Tris autorisés (?ordering=champ ou -champ) ; colonnes non nulles uniquement,
+# l'id est ajouté pour la pagination par curseur.
+ORDERING_FIELDS = (
+    'created_at', 'first_name', 'last_name', 'email',
+    'organization', 'country', 'event_type',
+)
+
+# paramètre -> (champ, lookup)
+DATE_RANGE_PARAMS = {
+    'created_after': ('created_at', 'gte'),
+    'created_before': ('created_at', 'lt'),
+    'used_after': ('used_at', 'gte'),
+    'used_before': ('used_at', 'lt'),
+}
+
+
+def parse_bool(value, name):
+    value = str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError({name: 'Expected true or false.'})
+
+
+def parse_moment(value, name):
+    """Accepte une date (YYYY-MM-DD, minuit UTC) ou un datetime ISO 8601."""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is not None:
+                moment = datetime.datetime.combine(day, datetime.time.min)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({name: 'Expected an ISO 8601 date or datetime.'})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, datetime.timezone.utc)
+    return moment
+
+
+def filter_participants(queryset, params):
+    """
+    Applique les filtres présents dans `params` (QueryDict ou dict) :
+    used, event_type, country, email, created_after/before, used_after/before,
+    search. Lève une ValidationError (400) pour une valeur invalide.
+    """
+    if params.get('used') not in (None, ''):
+        queryset = queryset.filter(used=parse_bool(params['used'], 'used'))
+    for name in EXACT_FILTERS:
+        if params.get(name) not in (None, ''):
+            queryset = queryset.filter(**{name: params[name]})
+    for name, (field, lookup) in DATE_RANGE_PARAMS.items():
+        if params.get(name):
+            queryset = queryset.filter(**{f'{field}__{lookup}': parse_moment(params[name], name)})
+    if params.get('search'):
+        queryset = search_participants(queryset, params['search'])
+    return queryset
+
+
+def search_participants(queryset, term):
+    """
+    Recherche « plein texte » simple : chaque mot du terme doit apparaître
+    (sans tenir compte de la casse) dans au moins une des SEARCH_FIELDS.
+    """
+    for word in term.split()[:5]:
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__icontains': word})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def parse_ordering(value):
+    """`?ordering=-last_name` -> ('-last_name', '-id') ; défaut : plus récents d'abord."""
+    value = (value or '').strip()
+    if not value:
+        return ('-created_at', '-id')
+    if value.lstrip('-') not in ORDERING_FIELDS:
+        raise ValidationError({'ordering': f"Expected one of: {', '.join(ORDERING_FIELDS)}."})
+    tie_breaker = '-id' if value.startswith('-') else 'id'
+    return (value, tie_breaker)
@@ -0,0 +1,157 @@
+# apps/events/health.py
+"""
+Sondes pour l'orchestrateur :
+
+- GET /health/ (liveness) : le process répond ; aucune dépendance testée.
+- GET /ready/ (readiness) : base de données et MEDIA_ROOT (critiques,
+  503 si KO), joignabilité SMTP (résultat mis en cache) et profondeur de la
+  file de jobs (signalées comme `degraded` sans retirer le worker).
+
+`HealthCheckMiddleware`, placé en tête de MIDDLEWARE, répond avant les
+middlewares de session, CSRF et authentification (et sans validation de
+l'en-tête Host, pour les sondes sur localhost).
+"""
+import os
+import socket
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .models import Job
+
+STATUS_OK = 'ok'
+STATUS_DEGRADED = 'degraded'
+STATUS_ERROR = 'error'
+STATUS_SKIPPED = 'skipped'
+
+_smtp_lock = threading.Lock()
+_smtp_result = {'checked_at': None, 'value': None}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def check_database():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    return STATUS_OK, None
+
+
+def check_media():
+    media_root = str(settings.MEDIA_ROOT)
+    directory = media_root if os.path.isdir(media_root) else os.path.dirname(media_root)
+    if os.access(directory, os.W_OK):
+        return STATUS_OK, None
+    return STATUS_ERROR, f"{media_root} is not writable"
+
+
+def check_smtp():
+    """Connexion TCP au serveur SMTP, au plus une fois par READINESS_SMTP_CACHE_SECONDS."""
+    if not settings.EMAIL_BACKEND.endswith('smtp.EmailBackend') or not settings.EMAIL_HOST:
+        return STATUS_SKIPPED, None
+    ttl = _setting('READINESS_SMTP_CACHE_SECONDS', 60)
+    with _smtp_lock:
+        checked_at = _smtp_result['checked_at']
+        if checked_at is not None and time.monotonic() - checked_at < ttl:
+            return _smtp_result['value']
+        try:
+            socket.create_connection(
+                (settings.EMAIL_HOST, settings.EMAIL_PORT),
+                timeout=_setting('READINESS_SMTP_TIMEOUT', 2),
+            ).close()
+            value = (STATUS_OK, None)
+        except OSError as e:
+            value = (STATUS_DEGRADED, f"{settings.EMAIL_HOST}:{settings.EMAIL_PORT} unreachable ({e})")
+        _smtp_result.update(checked_at=time.monotonic(), value=value)
+        return value
+
+
+def check_jobs():
+    """Jobs exécutables en attente, comptés jusqu'à READINESS_MAX_JOB_BACKLOG + 1."""
+    limit = _setting('READINESS_MAX_JOB_BACKLOG', 1000)
+    backlog = len(
+        Job.objects.filter(status=Job.STATUS_PENDING, run_at__lte=timezone.now())
+        .values_list('pk', flat=True)[:limit + 1]
+    )
+    if backlog > limit:
+        return STATUS_DEGRADED, f"more than {limit} pending jobs"
+    return STATUS_OK, None
+
+
+CRITICAL_CHECKS = {'database': check_database, 'media': check_media}
+CHECKS = {**CRITICAL_CHECKS, 'smtp': check_smtp, 'jobs': check_jobs}
+
+
+def readiness():
+    """Retourne (statut HTTP, corps) ; 503 si une dépendance critique est KO."""
+    checks = {}
+    overall = STATUS_OK
+    for name, check in CHECKS.items():
+        started = time.perf_counter()
+        try:
+            state, detail = check()
+        except Exception as e:
+            state, detail = (STATUS_ERROR if name in CRITICAL_CHECKS else STATUS_DEGRADED), str(e)
+        checks[name] = {'status': state, 'ms': round((time.perf_counter() - started) * 1000, 1)}
+        if detail:
+            checks[name]['detail'] = detail
+        if state == STATUS_ERROR:
+            overall = STATUS_ERROR
+        elif state == STATUS_DEGRADED and overall == STATUS_OK:
+            overall = STATUS_DEGRADED
+    return (503 if overall == STATUS_ERROR else 200), {'status': overall, 'checks': checks}
+
+
+def health_view(request):
+    return JsonResponse({'status': STATUS_OK})
+
+
+def ready_view(request):
+    status, body = readiness()
+    return JsonResponse(body, status=status)
+
+
+PROBES = {'/health/': health_view, '/ready/': ready_view}
+
+
+class HealthCheckMiddleware:
+    """Répond aux sondes avant le reste de la pile de middlewares ; WSGI et ASGI."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _probe(self, request):
+        if request.method in ('GET', 'HEAD'):
+            return PROBES.get(request.path_info)
+        return None
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        view = self._probe(request)
+        if view is not None:
+            response = view(request)
+            response['Cache-Control'] = 'no-store'
+            return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        view = self._probe(request)
+        if view is not None:
+            # Les contrôles (base, SMTP) sont synchrones
+            response = await sync_to_async(view)(request)
+            response['Cache-Control'] = 'no-store'
+            return response
+        return await self.get_response(request)
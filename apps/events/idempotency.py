@@ -0,0 +1,216 @@
+# apps/events/idempotency.py
+"""
+En-tête `Idempotency-Key` sur les POST coûteux ou non rejouables
+(POST /api/participants/, POST /api/verify/).
+
+Sur le Wi-Fi d'un lieu, les navigateurs renvoient une requête dont la
+réponse s'est perdue. Avec la même clé :
+
+- la première requête réserve la clé (INSERT sur une contrainte unique,
+  validé tout de suite) puis s'exécute ; sa réponse, si elle a réussi
+  (2xx), est mémorisée IDEMPOTENCY_TTL secondes ;
+- un renvoi ultérieur rejoue la réponse mémorisée (en-tête
+  `Idempotent-Replayed: true`) sans revalider, rendre de QR ni envoyer d'email ;
+- un renvoi simultané attend la fin de la première (au plus
+  IDEMPOTENCY_WAIT_TIMEOUT secondes, sinon 409 avec Retry-After) : une seule
+  exécute le travail ;
+- la même clé avec un autre contenu (ou un autre utilisateur) : 422.
+
+Une exception ou une réponse d'erreur (4xx, 5xx) libère la clé : le renvoi
+réexécute la requête. Les vues valident ce qu'elles peuvent (signature du
+ticket...) avant de réserver une clé : une requête rejetée d'emblée ne coûte
+aucune écriture. Une réservation orpheline (process tué) est reprise après
+IDEMPOTENCY_LOCK_TIMEOUT secondes. `python manage.py purge_idempotency_keys`
+supprime les réponses expirées.
+"""
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import metrics
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# Issues de claim()
+CLAIMED = 'claimed'
+REPLAY = 'replay'
+IN_PROGRESS = 'in_progress'
+MISMATCH = 'mismatch'
+
+INVALID_KEY = 'Invalid Idempotency-Key header.'
+KEY_REUSED = 'Idempotency-Key already used for a different request.'
+KEY_IN_PROGRESS = 'A request with this Idempotency-Key is still being processed.'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def get_key(headers):
+    """Clé de l'en-tête, None sans en-tête ; ValueError si elle est invalide."""
+    key = headers.get(HEADER)
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+        raise ValueError(key)
+    return key
+
+
+def fingerprint(method, path, user, data):
+    """Empreinte de la requête : même clé + autre contenu = erreur du client."""
+    if hasattr(data, 'lists'):
+        # QueryDict (formulaire) : toutes les valeurs de chaque champ
+        data = dict(data.lists())
+    raw = json.dumps([method, path, getattr(user, 'pk', None), data],
+                     sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def claim(scope, key, request_fingerprint):
+    """
+    Réserve `key` pour `scope` ou retrouve la requête qui l'a réservée.
+    Retourne (issue, IdempotencyKey) avec issue parmi CLAIMED, REPLAY,
+    IN_PROGRESS et MISMATCH.
+    """
+    ttl = timedelta(seconds=_setting('IDEMPOTENCY_TTL', 86400))
+    lock_timeout = timedelta(seconds=_setting('IDEMPOTENCY_LOCK_TIMEOUT', 60))
+    while True:
+        now = timezone.now()
+        try:
+            # Savepoint : l'échec de l'INSERT n'annule pas une transaction englobante
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    scope=scope, key=key, fingerprint=request_fingerprint,
+                    created_at=now, expires_at=now + ttl)
+            return CLAIMED, record
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+        if record is None:
+            # Supprimée entre-temps (libérée ou purgée) : nouvel essai
+            continue
+        expired = record.expires_at <= now
+        orphaned = record.response_status is None and record.created_at <= now - lock_timeout
+        if expired or orphaned:
+            # Reprise par UPDATE conditionnel : un seul process la gagne
+            taken = IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).update(
+                fingerprint=request_fingerprint, response_status=None, response_body=None,
+                created_at=now, expires_at=now + ttl)
+            if taken:
+                record.fingerprint, record.created_at, record.expires_at = request_fingerprint, now, now + ttl
+                record.response_status = record.response_body = None
+                return CLAIMED, record
+            continue
+        if record.fingerprint != request_fingerprint:
+            return MISMATCH, record
+        if record.response_status is None:
+            return IN_PROGRESS, record
+        return REPLAY, record
+
+
+def claim_or_wait(scope, key, request_fingerprint):
+    """claim() répété tant qu'une requête identique est en cours (délai borné)."""
+    deadline = time.monotonic() + _setting('IDEMPOTENCY_WAIT_TIMEOUT', 10)
+    interval = _setting('IDEMPOTENCY_POLL_INTERVAL', 0.05)
+    outcome, record = claim(scope, key, request_fingerprint)
+    while outcome == IN_PROGRESS and time.monotonic() < deadline:
+        time.sleep(interval)
+        outcome, record = claim(scope, key, request_fingerprint)
+    return outcome, record
+
+
+def complete(record, response_status, body):
+    """Mémorise la réponse (si la réservation est toujours la nôtre)."""
+    IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).update(
+        response_status=response_status, response_body=body)
+
+
+def release(record):
+    """Libère la clé : un renvoi réexécutera la requête."""
+    IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+
+
+def should_store(response_status):
+    """Seules les réponses réussies (2xx) sont rejouées."""
+    return 200 <= response_status < 300
+
+
+def outcome_response(scope, outcome, record):
+    """
+    (statut, corps, en-têtes) à renvoyer sans exécuter la requête, ou None
+    si elle a été réservée (CLAIMED) et doit s'exécuter.
+    """
+    metrics.inc('idempotent_requests_total', scope=scope, outcome=outcome)
+    if outcome == CLAIMED:
+        return None
+    if outcome == REPLAY:
+        return record.response_status, record.response_body, {REPLAYED_HEADER: 'true'}
+    if outcome == MISMATCH:
+        return status.HTTP_422_UNPROCESSABLE_ENTITY, {'detail': KEY_REUSED}, {}
+    return status.HTTP_409_CONFLICT, {'detail': KEY_IN_PROGRESS}, {'Retry-After': '1'}
+
+
+def execute(scope, key, request_fingerprint, run):
+    """
+    Exécute `run()` -> (statut, corps) sous la clé, ou répond sans l'exécuter
+    (rejeu, 409, 422). Retourne (statut, corps, en-têtes).
+    """
+    outcome, record = claim_or_wait(scope, key, request_fingerprint)
+    early = outcome_response(scope, outcome, record)
+    if early is not None:
+        return early
+    try:
+        response_status, body = run()
+    except BaseException:
+        release(record)
+        raise
+    if should_store(response_status):
+        complete(record, response_status, body)
+    else:
+        release(record)
+    return response_status, body, {}
+
+
+def idempotent(scope):
+    """
+    Décorateur de méthode de vue DRF (post, create...). Appliqué après
+    l'authentification et les permissions : une requête refusée ne
+    réserve pas de clé.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            try:
+                key = get_key(request.headers)
+            except ValueError:
+                return Response({'detail': INVALID_KEY}, status=status.HTTP_400_BAD_REQUEST)
+            if key is None:
+                return method(self, request, *args, **kwargs)
+
+            executed = []
+
+            def run():
+                executed.append(method(self, request, *args, **kwargs))
+                return executed[0].status_code, executed[0].data
+
+            response_status, body, headers = execute(
+                scope, key, fingerprint(request.method, request.path, request.user, request.data), run)
+            if executed:
+                return executed[0]
+            return Response(body, status=response_status, headers=headers)
+        return wrapper
+    return decorator
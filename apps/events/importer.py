@@ -0,0 +1,213 @@
+# apps/events/importer.py
+"""
+Import en masse de participants depuis un fichier CSV ou XLSX.
+
+Les lignes sont lues au fil de l'eau et traitées par paquets :
+- validation ligne par ligne (sans requête par ligne),
+- unicité des emails vérifiée en une requête `IN` par paquet,
+- participants et comptes utilisateurs créés avec `bulk_create`,
+- QR et emails d'invitation confiés à la file de jobs.
+Le résultat est un rapport avec les erreurs par numéro de ligne.
+"""
+import codecs
+import csv
+import io
+import os
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from rest_framework import serializers
+
+from .jobs import enqueue_many
+from .models import AttendanceCounter, Participant
+from .tasks import KIND_RENDER_QR
+from .usernames import allocate_usernames, username_base
+
+IMPORT_FIELDS = [
+    'first_name', 'last_name', 'email',
+    'phone', 'organization', 'position', 'country', 'event_type',
+]
+DEFAULT_CHUNK_SIZE = 500
+# Essayés dans l'ordre ; cp1252 : export CSV d'Excel sous Windows
+CSV_ENCODINGS = ('utf-8-sig', 'cp1252')
+
+
+class ImportFormatError(Exception):
+    """Fichier illisible ou format non supporté."""
+
+
+class ParticipantImportRowSerializer(serializers.ModelSerializer):
+    """Validation d'une ligne ; l'unicité de l'email est vérifiée par paquet."""
+
+    class Meta:
+        model = Participant
+        fields = IMPORT_FIELDS
+        extra_kwargs = {'email': {'validators': []}}
+
+
+def _header_aliases():
+    """En-têtes acceptés : nom du champ ou libellé du modèle (ex: « Prénoms »)."""
+    aliases = {}
+    for name in IMPORT_FIELDS:
+        field = Participant._meta.get_field(name)
+        aliases[name] = name
+        aliases[str(field.verbose_name).strip().lower()] = name
+    return aliases
+
+
+def _normalize_header(header):
+    aliases = _header_aliases()
+    return [aliases.get(str(h or '').strip().lower()) for h in header]
+
+
+def _detect_csv_encoding(fileobj):
+    """
+    Premier encodage de CSV_ENCODINGS qui décode tout le fichier (lu par
+    blocs) : une erreur ne peut pas survenir en cours d'import, après
+    l'enregistrement des premiers paquets. Excel sous Windows (fr) écrit en cp1252.
+    """
+    for encoding in CSV_ENCODINGS:
+        fileobj.seek(0)
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            for block in iter(lambda: fileobj.read(64 * 1024), b''):
+                decoder.decode(block)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            continue
+        fileobj.seek(0)
+        return encoding
+    raise ImportFormatError("Unreadable CSV file: save it as UTF-8 or Windows-1252.")
+
+
+def _rows_from_csv(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding=_detect_csv_encoding(fileobj), newline='')
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(text, dialect)
+    header = next(reader, None)
+    if header is None:
+        return
+    yield from _map_rows(header, reader)
+    text.detach()
+
+
+def _rows_from_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError("XLSX import requires the 'openpyxl' package.")
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"Unreadable XLSX file: {e}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        yield from _map_rows(header, rows)
+    finally:
+        workbook.close()
+
+
+def _map_rows(header, rows):
+    columns = _normalize_header(header)
+    if 'email' not in columns or 'first_name' not in columns:
+        raise ImportFormatError("Columns 'first_name' and 'email' are required.")
+    # Numéro de ligne du fichier : l'en-tête est la ligne 1
+    for line, values in enumerate(rows, start=2):
+        row = {}
+        for column, value in zip(columns, values):
+            if column is not None:
+                row[column] = '' if value is None else str(value).strip()
+        if any(row.values()):
+            yield line, row
+
+
+def read_rows(fileobj, filename):
+    """Itère sur les couples (numéro de ligne, dict) d'un fichier CSV ou XLSX."""
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext == '.xlsx':
+        return _rows_from_xlsx(fileobj)
+    if ext in ('.csv', '.txt', ''):
+        return _rows_from_csv(fileobj)
+    raise ImportFormatError(f"Unsupported file type '{ext}' (use .csv or .xlsx).")
+
+
+def _create_users(participants):
+    """Crée en une fois les comptes (inactifs) manquants pour ces participants."""
+    User = get_user_model()
+    emails = [p.email for p in participants]
+    existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+    missing = [p for p in participants if p.email not in existing]
+    usernames = allocate_usernames([username_base(p.email) for p in missing])
+    User.objects.bulk_create([
+        User(
+            username=username,
+            email=p.email,
+            first_name=p.first_name,
+            last_name=p.last_name,
+            password=make_password(None),
+            is_active=False,
+        )
+        for p, username in zip(missing, usernames)
+    ])
+
+
+def import_participants(rows, chunk_size=DEFAULT_CHUNK_SIZE, send_invitations=True):
+    """
+    Importe les couples (numéro de ligne, dict) par paquets de `chunk_size`.
+    Retourne {'total', 'created', 'errors': [{'row', 'errors'}, ...]}.
+    """
+    report = {'total': 0, 'created': 0, 'errors': []}
+    seen_emails = set()
+    pairs = iter(rows)
+
+    while True:
+        chunk = list(islice(pairs, chunk_size))
+        if not chunk:
+            break
+        report['total'] += len(chunk)
+
+        valid = []
+        for line, row in chunk:
+            serializer = ParticipantImportRowSerializer(data=row)
+            if not serializer.is_valid():
+                report['errors'].append({'row': line, 'errors': serializer.errors})
+                continue
+            email = serializer.validated_data['email']
+            if email in seen_emails:
+                report['errors'].append({'row': line, 'errors': {
+                    'email': ['Email en double dans le fichier.']}})
+                continue
+            seen_emails.add(email)
+            valid.append((line, serializer.validated_data))
+
+        existing = set(Participant.objects.filter(
+            email__in=[data['email'] for _, data in valid]).values_list('email', flat=True))
+        to_create = []
+        for line, data in valid:
+            if data['email'] in existing:
+                report['errors'].append({'row': line, 'errors': {
+                    'email': ['Un participant avec cet email existe déjà.']}})
+            else:
+                to_create.append(Participant(**data))
+
+        if not to_create:
+            continue
+        with transaction.atomic():
+            created = Participant.objects.bulk_create(to_create)
+            AttendanceCounter.record(created, registered=1)
+            _create_users(created)
+            enqueue_many(KIND_RENDER_QR, created, payload={'send_invitation': send_invitations})
+        report['created'] += len(created)
+
+    report['errors'].sort(key=lambda e: e['row'])
+    return report
@@ -0,0 +1,167 @@
+# apps/events/jobs.py
+"""
+File de tâches persistée en base (modèle `Job`).
+
+- `enqueue()` insère un job dans la transaction courante : il n'est visible
+  par le worker qu'une fois la ligne du participant validée.
+- `process_jobs` (commande de management) appelle `run_pending()` en boucle.
+- Un job en échec est reprogrammé avec un backoff exponentiel jusqu'à
+  `max_attempts`, puis passe en `failed`.
+
+Les handlers sont déclarés avec `@register('kind')` (voir tasks.py).
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def register(kind):
+    """Décorateur : associe une fonction `handler(job)` à un type de job."""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def get_handler(kind):
+    return _handlers.get(kind)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(kind, participant=None, payload=None, run_at=None, max_attempts=None):
+    """Crée un job en attente. En mode eager, il est exécuté après le commit."""
+    job = Job.objects.create(
+        kind=kind,
+        participant=participant,
+        payload=payload or {},
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or _setting('JOBS_MAX_ATTEMPTS', 5),
+    )
+    if _setting('JOBS_EAGER', False):
+        transaction.on_commit(lambda: claim(job.pk) and run_job(job.pk))
+    return job
+
+
+def enqueue_many(kind, participants, payload=None):
+    """Crée un job par participant en un seul INSERT (imports en masse)."""
+    now = timezone.now()
+    created = Job.objects.bulk_create([
+        Job(kind=kind, participant=participant, payload=payload or {},
+            run_at=now, max_attempts=_setting('JOBS_MAX_ATTEMPTS', 5))
+        for participant in participants
+    ])
+    if _setting('JOBS_EAGER', False):
+        pks = [job.pk for job in created]
+        transaction.on_commit(lambda: [run_job(pk) for pk in pks if claim(pk)])
+    return created
+
+
+def backoff_delay(attempts):
+    """Délai avant la tentative suivante : base * 2^(n-1), plafonné, avec jitter."""
+    base = _setting('JOBS_BACKOFF_BASE', 5)
+    cap = _setting('JOBS_BACKOFF_MAX', 3600)
+    delay = min(cap, base * (2 ** max(attempts - 1, 0)))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def release_stale_jobs():
+    """Remet en attente les jobs `running` dont le worker a disparu."""
+    timeout = timedelta(seconds=_setting('JOBS_LOCK_TIMEOUT', 600))
+    return Job.objects.filter(
+        status=Job.STATUS_RUNNING,
+        locked_at__lt=timezone.now() - timeout,
+    ).update(status=Job.STATUS_PENDING, locked_at=None)
+
+
+def claim(pk):
+    """
+    Réserve un job via un UPDATE conditionnel (status='pending') : deux
+    workers ne peuvent pas prendre le même job, quel que soit le moteur de
+    base de données.
+    """
+    now = timezone.now()
+    return Job.objects.filter(pk=pk, status=Job.STATUS_PENDING).update(
+        status=Job.STATUS_RUNNING, locked_at=now, updated_at=now) == 1
+
+
+def claim_batch(limit=10):
+    """Réserve jusqu'à `limit` jobs exécutables, les plus anciens d'abord."""
+    candidates = list(
+        Job.objects.filter(status=Job.STATUS_PENDING, run_at__lte=timezone.now())
+        .order_by('run_at', 'id')
+        .values_list('pk', flat=True)[:limit]
+    )
+    return [pk for pk in candidates if claim(pk)]
+
+
+def run_job(pk):
+    """Exécute un job préalablement réservé avec `claim()`."""
+    try:
+        job = Job.objects.select_related('participant').get(pk=pk)
+    except Job.DoesNotExist:
+        return None
+    if job.status == Job.STATUS_DONE:
+        return job
+
+    handler = get_handler(job.kind)
+    job.attempts += 1
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind '{job.kind}'")
+        handler(job)
+    except Exception as e:
+        job.last_error = f"{type(e).__name__}: {e}"
+        if job.attempts >= job.max_attempts:
+            job.status = Job.STATUS_FAILED
+            logger.error(f"Job {job} failed permanently: {job.last_error}")
+        else:
+            job.status = Job.STATUS_PENDING
+            job.run_at = timezone.now() + backoff_delay(job.attempts)
+            logger.warning(f"Job {job} failed (attempt {job.attempts}), retry at {job.run_at}")
+    else:
+        job.status = Job.STATUS_DONE
+        job.last_error = ''
+    job.locked_at = None
+    job.save(update_fields=['status', 'attempts', 'run_at', 'locked_at', 'last_error', 'updated_at'])
+    return job
+
+
+def run_pending(batch_size=10, max_jobs=None):
+    """Exécute les jobs disponibles jusqu'à épuisement ; retourne le nombre traité."""
+    processed = 0
+    release_stale_jobs()
+    while max_jobs is None or processed < max_jobs:
+        limit = batch_size if max_jobs is None else min(batch_size, max_jobs - processed)
+        claimed = claim_batch(limit)
+        if not claimed:
+            break
+        for pk in claimed:
+            run_job(pk)
+            processed += 1
+    return processed
+
+
+def job_states(participant):
+    """Résumé {kind: {status, attempts}} du dernier job de chaque type."""
+    states = {}
+    # `participant.jobs.all()` profite d'un éventuel prefetch_related('jobs')
+    for job in sorted(participant.jobs.all(), key=lambda j: (j.created_at, j.pk)):
+        states[job.kind] = {
+            'status': job.status,
+            'attempts': job.attempts,
+            'run_at': job.run_at,
+        }
+    return states
@@ -0,0 +1,200 @@
+# apps/events/live.py
+"""
+Tableau de bord en direct des entrées : GET /api/checkins/stream/ (admin),
+flux server-sent events.
+
+Événements envoyés :
+- `counters` : compteurs (voir counters.get_counters) à la connexion puis à
+  chaque changement ;
+- `checkin` : un participant vient d'être validé (verify, verify/batch, admin) ;
+- un commentaire `: ping` toutes les CHECKIN_STREAM_KEEPALIVE secondes.
+
+Un seul `CheckInBroadcaster` par process interroge la base toutes les
+CHECKIN_STREAM_POLL_INTERVAL secondes (compteurs + validations récentes par
+l'index sur changed_at) et diffuse le résultat à tous les tableaux de bord
+connectés : le coût en base ne dépend pas du nombre de spectateurs. La
+validation peut avoir lieu dans un autre worker, d'où l'interrogation de la
+base plutôt qu'une notification en mémoire.
+
+La vue est async : sous ASGI une connexion ne retient pas de thread. Sous WSGI
+(gunicorn sync), chaque tableau de bord occuperait un worker pendant toute la
+connexion : le flux y est refusé (503) et demande le mode ASGI.
+"""
+import asyncio
+import json
+import logging
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .counters import get_counters
+from .models import AttendanceCounter, Participant
+
+logger = logging.getLogger(__name__)
+
+STREAM_FIELDS = (
+    'id', 'first_name', 'last_name', 'organization', 'event_type', 'country', 'used_at', 'changed_at',
+)
+# Une validation committée après une lecture peut porter un changed_at
+# antérieur : on relit une courte fenêtre et on ignore ce qui a déjà été diffusé.
+POLL_OVERLAP = timedelta(seconds=5)
+POLL_LIMIT = 500
+SUBSCRIBER_QUEUE_SIZE = 1000
+STREAM_DIMENSIONS = (AttendanceCounter.DIMENSION_EVENT_TYPE, AttendanceCounter.DIMENSION_COUNTRY)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def format_event(event, data):
+    payload = json.dumps(data, separators=(',', ':'), cls=DjangoJSONEncoder)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class CheckInBroadcaster:
+    """Interroge la base dans un thread dédié tant qu'il y a des abonnés."""
+
+    def __init__(self, interval=None):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._counters = None
+        self._since = None
+        self._sent = {}
+
+    def subscribe(self, deliver):
+        """
+        `deliver(event, data)` est appelé depuis le thread de diffusion (il ne
+        doit pas bloquer). Retourne les compteurs courants.
+        """
+        with self._lock:
+            self._subscribers.add(deliver)
+            if self._thread is None or not self._thread.is_alive():
+                self.start()
+            counters = self._counters
+        return counters if counters is not None else get_counters(STREAM_DIMENSIONS)
+
+    def start(self):
+        # Après une période sans abonnés, l'état mémorisé est périmé
+        self._counters, self._since, self._sent = None, None, {}
+        self._thread = threading.Thread(target=self._run, name='checkin-broadcaster', daemon=True)
+        self._thread.start()
+
+    def unsubscribe(self, deliver):
+        with self._lock:
+            self._subscribers.discard(deliver)
+        if not self._subscribers:
+            self._wakeup.set()
+
+    def poll(self):
+        """Une passe : lit compteurs et validations récentes, diffuse les changements."""
+        now = timezone.now()
+        if self._since is None:
+            self._since = now
+        events = []
+        # Pages ordonnées par (changed_at, id) : un lot validé d'un coup
+        # partage le même changed_at et peut dépasser POLL_LIMIT
+        page = Participant.objects.filter(used=True, changed_at__gte=self._since - POLL_OVERLAP)
+        while True:
+            rows = list(page.order_by('changed_at', 'id').values(*STREAM_FIELDS)[:POLL_LIMIT])
+            for row in rows:
+                changed_at = row.pop('changed_at')
+                if self._sent.get(row['id']) != changed_at:
+                    self._sent[row['id']] = changed_at
+                    events.append(('checkin', row))
+                self._since = max(self._since, changed_at)
+            if len(rows) < POLL_LIMIT:
+                break
+            last_at, last_id = changed_at, rows[-1]['id']
+            page = Participant.objects.filter(
+                Q(changed_at__gt=last_at) | Q(changed_at=last_at, id__gt=last_id), used=True)
+        horizon = self._since - POLL_OVERLAP
+        self._sent = {pk: at for pk, at in self._sent.items() if at >= horizon}
+
+        counters = get_counters(STREAM_DIMENSIONS)
+        if counters != self._counters:
+            self._counters = counters
+            events.append(('counters', counters))
+        self.publish(events)
+
+    def publish(self, events):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for event, data in events:
+            for deliver in subscribers:
+                deliver(event, data)
+
+    def _run(self):
+        interval = self.interval or _setting('CHECKIN_STREAM_POLL_INTERVAL', 1.0)
+        try:
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                try:
+                    self.poll()
+                except Exception:
+                    logger.exception("Check-in stream poll failed")
+                close_old_connections()
+                self._wakeup.wait(interval)
+                self._wakeup.clear()
+        finally:
+            close_old_connections()
+
+
+broadcaster = CheckInBroadcaster()
+
+
+async def _async_stream(keepalive):
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def put(item):
+        if not events.full():
+            events.put_nowait(item)
+
+    def deliver(event, data):
+        try:
+            loop.call_soon_threadsafe(put, (event, data))
+        except RuntimeError:
+            pass  # boucle déjà fermée (client parti)
+
+    yield "retry: 3000\n\n"
+    try:
+        counters = await sync_to_async(broadcaster.subscribe)(deliver)
+        yield format_event('counters', counters)
+        while True:
+            try:
+                yield format_event(*await asyncio.wait_for(events.get(), keepalive))
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+    finally:
+        broadcaster.unsubscribe(deliver)
+
+
+async def checkin_stream_view(request):
+    user = await request.auser()
+    if not (user.is_authenticated and user.is_staff):
+        return JsonResponse({'detail': 'Admin access required.'}, status=403)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'Live stream requires the ASGI server (gunicorn project.asgi:application).'},
+            status=503)
+    stream = _async_stream(_setting('CHECKIN_STREAM_KEEPALIVE', 15))
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par un proxy nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,157 @@
+# apps/events/mail.py
+"""
+Couche d'envoi des emails : une connexion SMTP longue durée par worker
+(par thread), réutilisée d'un message à l'autre, avec limitation de débit
+(token bucket) et reconnexion automatique.
+
+    from .mail import get_mailer
+    get_mailer().send(message)            # un message
+    get_mailer().send_many(messages)      # un lot -> [(message, erreur|None)]
+
+Réglages : EMAIL_RATE_LIMIT (messages/s par worker, 0 = illimité),
+EMAIL_RATE_BURST, EMAIL_CONNECTION_IDLE_TIMEOUT, EMAIL_SEND_RETRIES.
+"""
+import logging
+import smtplib
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Erreurs après lesquelles la connexion est jetée et le message retenté
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, socket.error)
+
+
+class TokenBucket:
+    """Limiteur de débit : `rate` jetons par seconde, au plus `capacity` en réserve."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Bloque jusqu'à ce que `tokens` jetons soient disponibles."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            self._sleep(wait)
+
+
+class Mailer:
+    """Envoi via une connexion persistante ; voir le docstring du module."""
+
+    def __init__(self, connection_factory=None, rate=None, burst=None,
+                 idle_timeout=None, retries=None):
+        self.connection_factory = connection_factory or (lambda: get_connection(fail_silently=False))
+        rate = getattr(settings, 'EMAIL_RATE_LIMIT', 0) if rate is None else rate
+        burst = getattr(settings, 'EMAIL_RATE_BURST', None) if burst is None else burst
+        self.bucket = TokenBucket(rate, burst)
+        self.idle_timeout = getattr(settings, 'EMAIL_CONNECTION_IDLE_TIMEOUT', 60) if idle_timeout is None else idle_timeout
+        self.retries = getattr(settings, 'EMAIL_SEND_RETRIES', 2) if retries is None else retries
+        self.connection = None
+        self._last_used = 0.0
+
+    def _get_connection(self):
+        # Les serveurs SMTP coupent les connexions inactives : on rouvre
+        # plutôt que d'échouer sur le premier message après une pause.
+        if self.connection is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+        if self.connection is None:
+            self.connection = self.connection_factory()
+            self.connection.open()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def _send_one(self, message):
+        started = time.perf_counter()
+        try:
+            self._send_with_retries(message)
+        except Exception:
+            metrics.inc('smtp_messages_total', result='failed')
+            raise
+        metrics.inc('smtp_messages_total', result='sent')
+        metrics.observe('smtp_send_seconds', time.perf_counter() - started)
+
+    def _send_with_retries(self, message):
+        for attempt in range(self.retries + 1):
+            connection = self._get_connection()
+            try:
+                # send_messages ne ferme pas une connexion qu'il n'a pas ouverte
+                sent = connection.send_messages([message])
+                self._last_used = time.monotonic()
+                if not sent:
+                    raise smtplib.SMTPException("Message was not accepted")
+                return
+            except CONNECTION_ERRORS as e:
+                self.close()
+                if attempt >= self.retries:
+                    raise
+                metrics.inc('smtp_reconnects_total')
+                logger.warning(f"SMTP connection lost ({e}), reconnecting")
+
+    def send(self, message):
+        self.bucket.acquire()
+        self._send_one(message)
+
+    def send_many(self, messages):
+        """
+        Envoie les messages un par un sur la même connexion, pour savoir
+        précisément lesquels ont échoué. Retourne [(message, exception ou None), ...].
+        """
+        results = []
+        for message in messages:
+            self.bucket.acquire()
+            try:
+                self._send_one(message)
+                results.append((message, None))
+            except Exception as e:
+                logger.error(f"Failed to send email to {message.to}: {e}")
+                results.append((message, e))
+        return results
+
+
+_local = threading.local()
+
+
+def get_mailer():
+    """Mailer du thread courant (connexion SMTP réutilisée entre les envois)."""
+    mailer = getattr(_local, 'mailer', None)
+    if mailer is None:
+        mailer = _local.mailer = Mailer()
+    return mailer
+
+
+def close_mailer():
+    mailer = getattr(_local, 'mailer', None)
+    if mailer is not None:
+        mailer.close()
+        _local.mailer = None
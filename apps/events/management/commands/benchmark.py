@@ -0,0 +1,99 @@
+import json
+import os
+import platform
+import sys
+import tempfile
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from apps.events.benchmark import SCENARIOS, run_benchmark
+
+
+def _int_list(value):
+    try:
+        return [int(v) for v in value.split(',') if v.strip()]
+    except ValueError:
+        raise CommandError(f"Liste d'entiers attendue : {value!r}")
+
+
+class Command(BaseCommand):
+    help = ("Mesure latence (p50/p95/p99), requêtes SQL et débit des endpoints "
+            "create, list, retrieve, verify et toggle ; résultats en JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1000,
+                            help="Nombre de participants créés avant les mesures.")
+        parser.add_argument('--requests', type=int, default=200,
+                            help="Requêtes par scénario et par niveau de concurrence.")
+        parser.add_argument('--concurrency', default='1,4,16',
+                            help="Niveaux de concurrence (threads), séparés par des virgules.")
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+        parser.add_argument('--output', '-o', help="Fichier JSON (défaut : sortie standard).")
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Réutiliser la base de test existante.")
+
+    def handle(self, *args, **options):
+        scenarios = [s for s in options['scenarios'].split(',') if s]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Scénarios inconnus : {', '.join(sorted(unknown))}")
+        concurrency = _int_list(options['concurrency'])
+
+        # Base de test jetable (jamais la base réelle). Avec SQLite, un fichier
+        # plutôt que la mémoire : les threads de mesure partagent la base.
+        if connection.vendor == 'sqlite':
+            test_settings = connection.settings_dict.setdefault('TEST', {})
+            if not test_settings.get('NAME'):
+                test_settings['NAME'] = os.path.join(tempfile.gettempdir(), 'cin-benchmark.sqlite3')
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                JOBS_EAGER=False,
+                QR_STORE_FILES=False,
+                ALLOWED_HOSTS=['*'],
+                # Tous les clients de mesure ont la même IP : sans cela, des 429
+                # (réponses sans travail) fausseraient latences et débit. Les
+                # vues lisent leurs classes de throttle à l'import : sans débit
+                # configuré, les throttles laissent tout passer.
+                REST_FRAMEWORK=dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_CLASSES=[],
+                                    DEFAULT_THROTTLE_RATES={}),
+                LOAD_SHED_MAX_IN_FLIGHT=0,
+            ):
+                results = run_benchmark(
+                    seed=options['seed'], requests=options['requests'],
+                    concurrency=concurrency, scenarios=scenarios)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'seed': options['seed'],
+                'requests': options['requests'],
+            },
+            'results': results,
+        }
+        data = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(data + '\n')
+            for row in results:
+                self.stdout.write(
+                    f"{row['scenario']:<9} c={row['concurrency']:<3} p50={row['p50_ms']}ms "
+                    f"p95={row['p95_ms']}ms p99={row['p99_ms']}ms q/req={row['queries_per_request']} "
+                    f"{row['throughput_rps']} req/s errors={row['errors']}")
+        else:
+            sys.stdout.write(data + '\n')
@@ -0,0 +1,41 @@
+# apps/events/management/commands/export_participants.py
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from apps.events.exports import EXPORT_FORMATS, iter_export
+from apps.events.filters import DATE_RANGE_PARAMS, filter_participants
+from apps.events.models import Participant
+
+
+class Command(BaseCommand):
+    help = "Exporte les participants (et leur présence) en CSV ou JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help="Fichier de sortie (défaut : sortie standard).")
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--used', help="true / false")
+        parser.add_argument('--event-type')
+        parser.add_argument('--country')
+        for name in DATE_RANGE_PARAMS:
+            parser.add_argument(f"--{name.replace('_', '-')}", help="Date ISO 8601")
+
+    def handle(self, *args, **options):
+        params = {
+            name: options[name]
+            for name in ['used', 'event_type', 'country', *DATE_RANGE_PARAMS]
+            if options.get(name)
+        }
+        try:
+            queryset = filter_participants(Participant.objects.all(), params)
+        except ValidationError as e:
+            raise CommandError(e.detail)
+
+        out = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in iter_export(queryset, options['format']):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
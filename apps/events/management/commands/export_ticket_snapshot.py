@@ -0,0 +1,18 @@
+# apps/events/management/commands/export_ticket_snapshot.py
+from django.core.management.base import BaseCommand
+
+from apps.events.snapshot import build_snapshot
+
+
+class Command(BaseCommand):
+    help = "Exporte l'instantané binaire des tickets valides (validation hors-ligne)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Fichier de sortie (ex: tickets.bin).")
+
+    def handle(self, *args, **options):
+        version, data = build_snapshot()
+        with open(options['output'], 'wb') as f:
+            f.write(data)
+        self.stdout.write(self.style.SUCCESS(
+            f"Instantané version {version} écrit dans {options['output']} ({len(data)} octets)"))
@@ -0,0 +1,39 @@
+# apps/events/management/commands/import_participants.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.events.importer import (
+    DEFAULT_CHUNK_SIZE, ImportFormatError, import_participants, read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Importe des participants depuis un fichier CSV ou XLSX."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier .csv ou .xlsx")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--no-invitations', action='store_true',
+                            help="Générer les QR sans envoyer les emails d'invitation.")
+        parser.add_argument('--report', help="Écrire le rapport JSON dans ce fichier.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as f:
+                report = import_participants(
+                    read_rows(f, options['path']),
+                    chunk_size=options['chunk_size'],
+                    send_invitations=not options['no_invitations'],
+                )
+        except (OSError, ImportFormatError) as e:
+            raise CommandError(str(e))
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        for error in report['errors']:
+            self.stderr.write(f"Ligne {error['row']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} participant(s) créé(s) sur {report['total']} ligne(s), "
+            f"{len(report['errors'])} erreur(s)"))
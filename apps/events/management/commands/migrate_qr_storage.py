@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.events.storage import migrate_files
+
+
+class Command(BaseCommand):
+    help = ("Déplace les images QR existantes vers l'arborescence par préfixe de hash "
+            "du stockage QR (STORAGES['qr']) et met à jour Participant.qr_code par lots.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='source', metavar='ALIAS',
+                            help="Alias STORAGES où se trouvent les fichiers actuels "
+                                 "(ex. default, avant un passage au stockage objet).")
+        parser.add_argument('--workers', type=int, default=8, help="Copies en parallèle.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Compter les fichiers à déplacer sans rien modifier.")
+
+    def handle(self, *args, **options):
+        if options['source'] and options['source'] not in settings.STORAGES:
+            raise CommandError(f"Stockage inconnu : {options['source']}")
+        stats = migrate_files(
+            source_alias=options['source'],
+            workers=max(1, options['workers']),
+            batch_size=max(1, options['batch_size']),
+            dry_run=options['dry_run'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        verb = "à déplacer" if options['dry_run'] else "déplacé(s)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['moved']} {verb}, {stats['skipped']} déjà en place, "
+            f"{stats['missing']} introuvable(s), {stats['failed']} échec(s)."))
+        if stats['failed']:
+            raise CommandError("Des fichiers n'ont pas pu être copiés ; relancer la commande.")
@@ -0,0 +1,40 @@
+# apps/events/management/commands/process_jobs.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.events.jobs import run_pending
+from apps.events.mail import close_mailer
+
+
+class Command(BaseCommand):
+    help = "Worker de la file de jobs (rendu des QR, envoi des emails...)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Traiter les jobs disponibles puis quitter.")
+        parser.add_argument('--batch-size', type=int, default=10,
+                            help="Nombre de jobs réservés à la fois.")
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help="Attente (secondes) quand la file est vide.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if options['once']:
+            processed = run_pending(batch_size=batch_size)
+            close_mailer()
+            self.stdout.write(self.style.SUCCESS(f"{processed} job(s) traité(s)"))
+            return
+
+        self.stdout.write("Worker démarré (Ctrl+C pour arrêter)")
+        try:
+            while True:
+                # Connexion périmée (CONN_MAX_AGE) ou coupée par la base : rouverte
+                close_old_connections()
+                if not run_pending(batch_size=batch_size):
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write("Worker arrêté")
+        finally:
+            close_mailer()
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.events.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = ("Supprime les réponses mémorisées pour les en-têtes Idempotency-Key "
+            "dont la durée de conservation (IDEMPOTENCY_TTL) est dépassée.")
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} clé(s) d'idempotence supprimée(s)."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.events.snapshot import purge_ticket_deletions
+
+
+class Command(BaseCommand):
+    help = ("Supprime les traces de tickets supprimés plus anciennes que la "
+            "conservation des deltas (TICKET_DELETION_RETENTION).")
+
+    def handle(self, *args, **options):
+        deleted = purge_ticket_deletions()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} suppression(s) de ticket purgée(s)."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.events.counters import rebuild
+
+
+class Command(BaseCommand):
+    help = ("Recalcule les compteurs de participation (inscrits / validés) "
+            "depuis la table des participants.")
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{count} compteur(s) recalculé(s)."))
@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from apps.events.campaigns import cancel_campaign, resume_campaign, start_campaign
+from apps.events.filters import DATE_RANGE_PARAMS
+from apps.events.jobs import run_pending
+from apps.events.models import Campaign
+
+
+class Command(BaseCommand):
+    help = "Envoie (ou renvoie) les billets à une sélection de participants."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--name', default='')
+        parser.add_argument('--template', choices=dict(Campaign.TEMPLATE_CHOICES),
+                            default=Campaign.TEMPLATE_INVITATION)
+        parser.add_argument('--used', help="true / false")
+        parser.add_argument('--event-type')
+        parser.add_argument('--country')
+        parser.add_argument('--search')
+        for name in DATE_RANGE_PARAMS:
+            parser.add_argument(f"--{name.replace('_', '-')}", help="Date ISO 8601")
+        parser.add_argument('--resume', type=int, metavar='ID',
+                            help="Relancer la campagne ID au lieu d'en créer une.")
+        parser.add_argument('--cancel', type=int, metavar='ID', help="Annuler la campagne ID.")
+        parser.add_argument('--wait', action='store_true',
+                            help="Traiter les jobs dans ce process jusqu'à la fin de la campagne.")
+
+    def _get(self, pk):
+        try:
+            return Campaign.objects.get(pk=pk)
+        except Campaign.DoesNotExist:
+            raise CommandError(f"Campagne {pk} introuvable")
+
+    def _progress(self, campaign):
+        return (f"{campaign}: {campaign.get_status_display()} — "
+                f"{campaign.sent} envoyé(s), {campaign.failed} échec(s), "
+                f"{campaign.skipped} ignoré(s) / {campaign.total}")
+
+    def handle(self, *args, **options):
+        if options['cancel']:
+            campaign = self._get(options['cancel'])
+            cancel_campaign(campaign)
+            campaign.refresh_from_db()
+            self.stdout.write(self._progress(campaign))
+            return
+
+        if options['resume']:
+            campaign = self._get(options['resume'])
+            count = resume_campaign(campaign)
+            self.stdout.write(f"{count} tranche(s) reprogrammée(s)")
+        else:
+            filters = {
+                name: options[name]
+                for name in ['used', 'event_type', 'country', 'search', *DATE_RANGE_PARAMS]
+                if options.get(name)
+            }
+            try:
+                campaign = start_campaign(filters, template=options['template'], name=options['name'])
+            except ValidationError as e:
+                raise CommandError(e.detail)
+            self.stdout.write(f"Campagne #{campaign.pk} : {campaign.total} destinataire(s)")
+
+        if not options['wait']:
+            return
+        campaign.refresh_from_db()
+        while campaign.status == Campaign.STATUS_RUNNING:
+            if not run_pending():
+                time.sleep(1)
+            campaign.refresh_from_db()
+            self.stdout.write(self._progress(campaign))
+        self.stdout.write(self.style.SUCCESS(self._progress(campaign)))
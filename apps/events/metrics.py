@@ -0,0 +1,235 @@
+# apps/events/metrics.py
+"""
+Métriques applicatives au format texte Prometheus (GET /api/metrics/).
+
+- `MetricsMiddleware` : nombre de requêtes et histogramme de latence par
+  route (motif d'URL, pas l'URL réelle), requêtes SQL et temps SQL par route.
+- Les requêtes SQL sont comptées par un execute wrapper installé sur chaque
+  connexion (signal `connection_created`) ; il retrouve la requête HTTP en
+  cours par une ContextVar, donc aussi pour les vues async.
+- `utils_qr` et `mail` publient le temps de rendu des QR, les accès au cache
+  et la durée des envois SMTP via `inc()` / `observe()`.
+
+Les valeurs sont propres à chaque process (chaque worker gunicorn expose les
+siennes). METRICS_ENABLED=False désactive la collecte.
+"""
+import bisect
+import contextvars
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# nom -> (type, aide)
+METRICS = {
+    'http_requests_total': ('counter', "Requêtes HTTP traitées"),
+    'http_request_duration_seconds': ('histogram', "Latence des requêtes HTTP"),
+    'http_request_db_queries': ('histogram', "Requêtes SQL par requête HTTP"),
+    'db_queries_total': ('counter', "Requêtes SQL exécutées"),
+    'db_query_seconds_total': ('counter', "Temps passé en base de données"),
+    'qr_render_seconds': ('histogram', "Durée de génération d'une image QR (hors cache)"),
+    'qr_cache_requests_total': ('counter', "Accès au cache des images QR par niveau"),
+    'smtp_send_seconds': ('histogram', "Durée d'envoi d'un email"),
+    'smtp_messages_total': ('counter', "Emails envoyés ou en échec"),
+    'smtp_reconnects_total': ('counter', "Reconnexions SMTP après une coupure"),
+    'ticket_codes_rejected_total': ('counter', "Codes de ticket rejetés avant accès à la base"),
+    'throttled_requests_total': ('counter', "Requêtes refusées (429) par classe d'endpoint et type de seau"),
+    'load_shed_requests_total': ('counter', "Requêtes délestées (503) sous charge"),
+    'idempotent_requests_total': ('counter', "Requêtes avec Idempotency-Key par issue (exécutée, rejouée...)"),
+}
+
+
+def enabled():
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Compteurs et histogrammes en mémoire, indexés par (nom, labels)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        """Exposition au format texte Prometheus 0.0.4."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (h.buckets, list(h.counts), h.sum, h.count))
+                for key, h in self._histograms.items())
+
+        by_name = {}
+        for (name, labels), value in counters:
+            by_name.setdefault(name, []).append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), (buckets, counts, total, count) in histograms:
+            lines = by_name.setdefault(name, [])
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels, ('le', _number(bound)))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels, ('le', '+Inf'))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        out = []
+        for name in sorted(by_name):
+            kind, help_text = METRICS.get(name, ('untyped', ''))
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(by_name[name])
+        return '\n'.join(out) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def inc(name, value=1, **labels):
+    if enabled():
+        registry.inc(name, value, **labels)
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    if enabled():
+        registry.observe(name, value, buckets, **labels)
+
+
+class _RequestStats:
+    __slots__ = ('queries', 'db_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+_current_request = contextvars.ContextVar('events_metrics_request', default=None)
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    """Execute wrapper : compte les requêtes SQL de la requête HTTP en cours."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = _current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += time.perf_counter() - started
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """Receiver de `connection_created` (branché dans EventsConfig.ready)."""
+    if enabled() and db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match is not None and match.route else 'unmatched'
+
+
+def _record(request, response, stats, started):
+    elapsed = time.perf_counter() - started
+    route = _route(request)
+    registry.inc('http_requests_total', route=route, method=request.method,
+                 status=getattr(response, 'status_code', 500))
+    registry.observe('http_request_duration_seconds', elapsed, route=route, method=request.method)
+    registry.observe('http_request_db_queries', stats.queries, QUERY_BUCKETS, route=route)
+    if stats.queries:
+        registry.inc('db_queries_total', stats.queries, route=route)
+        registry.inc('db_query_seconds_total', stats.db_time, route=route)
+
+
+class MetricsMiddleware:
+    """Mesure chaque requête ; compatible WSGI et ASGI. À placer en tête de MIDDLEWARE."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = _RequestStats()
+        token = _current_request.set(stats)
+        started = time.perf_counter()
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            _current_request.reset(token)
+            _record(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats = _RequestStats()
+        token = _current_request.set(stats)
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            _current_request.reset(token)
+            _record(request, response, stats, started)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:10
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_changed_at(apps, schema_editor):
+    """Initialise changed_at avec la dernière date connue (utilisation ou création)."""
+    Participant = apps.get_model('events', 'Participant')
+    Participant.objects.update(changed_at=Coalesce('used_at', 'created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='changed_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Modifié le'),
+        ),
+        migrations.RunPython(backfill_changed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:13
+
+from django.db import migrations, models
+
+# Index trigrammes (PostgreSQL uniquement) pour ?search= : Django traduit
+# `icontains` en UPPER(col::text) LIKE UPPER(%s), d'où l'index sur l'expression.
+TRIGRAM_COLUMNS = (
+    'first_name', 'last_name', 'email', 'phone',
+    'organization', 'position', 'country', 'event_type',
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS events_part_{column}_trgm '
+            f'ON events_participant USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS events_part_{column}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0010_participant_changed_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['created_at', 'id'], name='events_part_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['last_name', 'id'], name='events_part_last_name_id'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['used'], name='events_part_used'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['event_type'], name='events_part_event_type'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['country'], name='events_part_country'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
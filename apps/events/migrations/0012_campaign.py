@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:19
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0011_participant_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Campaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=200, verbose_name='Nom')),
+                ('template', models.CharField(choices=[('invitation', 'Invitation'), ('update', 'Mise à jour')], default='invitation', max_length=20, verbose_name='Modèle')),
+                ('filters', models.JSONField(blank=True, default=dict, verbose_name='Filtres')),
+                ('event_context', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name="Contexte de l'événement")),
+                ('status', models.CharField(choices=[('running', 'En cours'), ('done', 'Terminée'), ('cancelled', 'Annulée')], default='running', max_length=20, verbose_name='Statut')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Destinataires')),
+                ('sent', models.PositiveIntegerField(default=0, verbose_name='Envoyés')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Échecs')),
+                ('chunks_total', models.PositiveIntegerField(default=0, verbose_name='Tranches')),
+                ('chunks_done', models.PositiveIntegerField(default=0, verbose_name='Tranches terminées')),
+                ('last_error', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créée le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Mise à jour le')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminée le')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Créée par')),
+            ],
+            options={
+                'verbose_name': 'Campagne',
+                'verbose_name_plural': 'Campagnes',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
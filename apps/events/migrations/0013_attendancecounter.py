@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:37
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_counters(apps, schema_editor):
+    """
+    Initialise les compteurs à partir des participants existants.
+    """
+    Participant = apps.get_model('events', 'Participant')
+    AttendanceCounter = apps.get_model('events', 'AttendanceCounter')
+    aggregates = {'registered': Count('pk'), 'used': Count('pk', filter=Q(used=True))}
+
+    counters = [AttendanceCounter(dimension='total', key='', **Participant.objects.aggregate(**aggregates))]
+    for dimension in ('event_type', 'country'):
+        counters += [
+            AttendanceCounter(dimension=dimension, key=row[dimension],
+                              registered=row['registered'], used=row['used'])
+            for row in Participant.objects.order_by().values(dimension).annotate(**aggregates)
+        ]
+    AttendanceCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_campaign'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=30, verbose_name='Dimension')),
+                ('key', models.CharField(blank=True, max_length=200, verbose_name='Valeur')),
+                ('registered', models.BigIntegerField(default=0, verbose_name='Inscrits')),
+                ('used', models.BigIntegerField(default=0, verbose_name='Validés')),
+            ],
+            options={
+                'verbose_name': 'Compteur de participation',
+                'verbose_name_plural': 'Compteurs de participation',
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='events_counter_dimension_key')],
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
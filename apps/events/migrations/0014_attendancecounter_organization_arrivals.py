@@ -0,0 +1,41 @@
+from datetime import timezone
+
+from django.db import migrations
+from django.db.models import Count, Q
+from django.db.models.functions import TruncHour
+
+
+def fill_counters(apps, schema_editor):
+    """
+    Ajoute les compteurs par organisation et par heure d'arrivée.
+    """
+    Participant = apps.get_model('events', 'Participant')
+    AttendanceCounter = apps.get_model('events', 'AttendanceCounter')
+    aggregates = {'registered': Count('pk'), 'used': Count('pk', filter=Q(used=True))}
+
+    counters = [
+        AttendanceCounter(dimension='organization', key=row['organization'],
+                          registered=row['registered'], used=row['used'])
+        for row in Participant.objects.order_by().values('organization').annotate(**aggregates)
+    ]
+    arrivals = (
+        Participant.objects.filter(used=True, used_at__isnull=False).order_by()
+        .values(hour=TruncHour('used_at', tzinfo=timezone.utc)).annotate(used=Count('pk'))
+    )
+    counters += [
+        AttendanceCounter(dimension='arrival_hour', key=row['hour'].strftime('%Y-%m-%dT%H:00:00Z'),
+                          used=row['used'])
+        for row in arrivals
+    ]
+    AttendanceCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_attendancecounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
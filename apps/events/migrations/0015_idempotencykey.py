@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:48
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0014_attendancecounter_organization_arrivals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50, verbose_name='Endpoint')),
+                ('key', models.CharField(max_length=255, verbose_name='Clé')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='Empreinte de la requête')),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Statut HTTP')),
+                ('response_body', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Réponse')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Réservée le')),
+                ('expires_at', models.DateTimeField(verbose_name='Expire le')),
+            ],
+            options={
+                'verbose_name': "Clé d'idempotence",
+                'verbose_name_plural': "Clés d'idempotence",
+                'indexes': [models.Index(fields=['expires_at'], name='events_idempotency_expires')],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'key'), name='events_idempotency_scope_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:55
+
+import apps.events.models
+import apps.events.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0015_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='participant',
+            name='qr_code',
+            field=models.ImageField(blank=True, null=True, storage=apps.events.storage.get_qr_storage, upload_to=apps.events.models.upload_qr_path, verbose_name='QR Code'),
+        ),
+    ]
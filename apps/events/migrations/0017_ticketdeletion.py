@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0016_participant_qr_code_sharded_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket_uuid', models.UUIDField(verbose_name='Ticket UUID')),
+                ('deleted_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Supprimé le')),
+            ],
+            options={
+                'verbose_name': 'Ticket supprimé',
+                'verbose_name_plural': 'Tickets supprimés',
+            },
+        ),
+    ]
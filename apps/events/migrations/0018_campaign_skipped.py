@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0017_ticketdeletion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='skipped',
+            field=models.PositiveIntegerField(default=0, verbose_name='Ignorés'),
+        ),
+    ]
@@ -1,15 +1,22 @@
 # apps/events/models.py
-from django.db import models
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
 import uuid
+from datetime import timezone as dt_timezone
 from django.utils import timezone
 import os
 
+from .singletons import SingletonCache
+from .storage import get_qr_storage, qr_file_name
+
 
 def upload_qr_path(instance, filename):
     """
     Génère le path où sera stockée l'image QR pour le participant.
     La migration importe directement cette fonction, donc elle doit exister.
-    Exemple de path : qr_codes/<ticket_uuid>.png
+    Exemple de path : qr_codes/3f/<ticket_uuid>.png (répertoire = préfixe du
+    hash du ticket, voir storage.py)
     """
     try:
         # si ticket_uuid est un UUID, on le convertit en str
@@ -21,7 +28,7 @@ def upload_qr_path(instance, filename):
     base, ext = os.path.splitext(filename)
     if not ext:
         ext = ".png"
-    return os.path.join("qr_codes", f"{uuid_str}{ext}")
+    return qr_file_name(uuid_str, ext)
 
 
 class Participant(models.Model):
@@ -43,7 +50,8 @@ class Participant(models.Model):
     )
     qr_code = models.ImageField(
         "QR Code",
-        upload_to='qr_codes/',
+        upload_to=upload_qr_path,
+        storage=get_qr_storage,
         null=True,
         blank=True
     )
@@ -52,24 +60,216 @@ class Participant(models.Model):
     # usage flag
     used = models.BooleanField("Utilisé", default=False)
     used_at = models.DateTimeField("Utilisé le", null=True, blank=True)
+    # Horloge serveur de la dernière création / validation : sert aux deltas
+    # de synchronisation des appareils (used_at peut venir de l'appareil).
+    changed_at = models.DateTimeField(
+        "Modifié le", default=timezone.now, db_index=True, editable=False)
 
     class Meta:
         verbose_name = "Participant"
         verbose_name_plural = "Participants"
         ordering = ["-created_at"]
+        indexes = [
+            # pagination par curseur et tris de la liste
+            models.Index(fields=['created_at', 'id'], name='events_part_created_id'),
+            models.Index(fields=['last_name', 'id'], name='events_part_last_name_id'),
+            # filtres
+            models.Index(fields=['used'], name='events_part_used'),
+            models.Index(fields=['event_type'], name='events_part_event_type'),
+            models.Index(fields=['country'], name='events_part_country'),
+        ]
+
+    # Colonnes renvoyées au point de contrôle (pas de QR)
+    CHECK_IN_FIELDS = (
+        'id', 'first_name', 'last_name', 'email', 'organization',
+        'country', 'event_type', 'ticket_uuid', 'used', 'used_at',
+    )
 
     def mark_used(self):
-        """Idempotent: marque le ticket comme utilisé et enregistre la date."""
-        if not self.used:
-            self.used = True
-            self.used_at = timezone.now()
-            self.save(update_fields=['used', 'used_at'])
+        """
+        Idempotent: marque le ticket comme utilisé et enregistre la date.
+        L'UPDATE est conditionnel (used=false) : retourne True uniquement pour
+        l'appel qui a effectivement validé le ticket.
+        """
+        if self.used:
+            return False
+        now = timezone.now()
+        with transaction.atomic(savepoint=False):
+            updated = Participant.objects.filter(pk=self.pk, used=False).update(
+                used=True, used_at=now, changed_at=now)
+            if updated:
+                self.used, self.used_at, self.changed_at = True, now, now
+                AttendanceCounter.record([self], used=1)
+        if not updated:
+            self.refresh_from_db(fields=['used', 'used_at', 'changed_at'])
+        return bool(updated)
+
+    @classmethod
+    def check_in(cls, ticket_uuid):
+        """
+        Valide un ticket en une seule instruction :
+            UPDATE ... SET used=true, used_at=now
+            WHERE ticket_uuid=%s AND used=false RETURNING <CHECK_IN_FIELDS>
+
+        Retourne (admitted, participant) ; participant est None si le ticket
+        n'existe pas, et ne charge que CHECK_IN_FIELDS. Deux scans simultanés
+        du même ticket ne peuvent pas être admis tous les deux.
+        """
+        now = timezone.now()
+        # Validation et compteurs dans la même transaction
+        with transaction.atomic(savepoint=False):
+            if connection.features.can_return_columns_from_insert:
+                participant = cls._update_returning(ticket_uuid, now)
+            else:
+                # Moteurs sans RETURNING : UPDATE conditionnel puis lecture
+                updated = cls.objects.filter(ticket_uuid=ticket_uuid, used=False).update(
+                    used=True, used_at=now, changed_at=now)
+                participant = cls.objects.only(*cls.CHECK_IN_FIELDS).filter(
+                    ticket_uuid=ticket_uuid).first() if updated else None
+            if participant is not None:
+                AttendanceCounter.record([participant], used=1)
+        if participant is not None:
+            return True, participant
+        # Non admis : ticket inconnu ou déjà utilisé
+        return False, cls.objects.only(*cls.CHECK_IN_FIELDS).filter(
+            ticket_uuid=ticket_uuid).first()
+
+    @classmethod
+    def _update_returning(cls, ticket_uuid, now):
+        opts = cls._meta
+        qn = connection.ops.quote_name
+        field = opts.get_field
+        returning = ', '.join(qn(field(name).column) for name in cls.CHECK_IN_FIELDS)
+        sql = (
+            f"UPDATE {qn(opts.db_table)} "
+            f"SET {qn(field('used').column)} = %s, {qn(field('used_at').column)} = %s, "
+            f"{qn(field('changed_at').column)} = %s "
+            f"WHERE {qn(field('ticket_uuid').column)} = %s AND {qn(field('used').column)} = %s "
+            f"RETURNING {returning}"
+        )
+        params = [
+            field('used').get_db_prep_value(True, connection),
+            field('used_at').get_db_prep_value(now, connection),
+            field('changed_at').get_db_prep_value(now, connection),
+            field('ticket_uuid').get_db_prep_value(ticket_uuid, connection),
+            field('used').get_db_prep_value(False, connection),
+        ]
+        # raw() applique les convertisseurs des champs aux valeurs renvoyées
+        rows = list(cls.objects.raw(sql, params))
+        return rows[0] if rows else None
 
     def __str__(self):
         full_name = f"{self.first_name} {self.last_name}".strip()
         return f"{full_name} <{self.email}>"
 
 
+class TicketDeletion(models.Model):
+    """
+    Trace de la suppression d'un participant : la version de l'instantané des
+    tickets change et les deltas signalent le ticket retiré (voir snapshot.py).
+    """
+    ticket_uuid = models.UUIDField("Ticket UUID")
+    deleted_at = models.DateTimeField("Supprimé le", default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "Ticket supprimé"
+        verbose_name_plural = "Tickets supprimés"
+
+    def __str__(self):
+        return f"{self.ticket_uuid} ({self.deleted_at:%Y-%m-%d %H:%M})"
+
+
+class AttendanceCounter(models.Model):
+    """
+    Compteurs d'inscriptions et de validations, au total, par valeur de
+    chaque dimension (type d'événement, pays, organisation) et par heure
+    d'arrivée (`used_at`). Tenus à jour par incréments à chaque création,
+    suppression ou validation (voir counters.py) : statistiques et tableaux de
+    bord les lisent sans parcourir la table des participants.
+    """
+    DIMENSION_TOTAL = 'total'
+    DIMENSION_EVENT_TYPE = 'event_type'
+    DIMENSION_COUNTRY = 'country'
+    DIMENSION_ORGANIZATION = 'organization'
+    # Heure (UTC) de validation, clé 'AAAA-MM-JJTHH:00:00Z' ; seul `used` y est compté
+    DIMENSION_ARRIVAL_HOUR = 'arrival_hour'
+    # Dimensions = champs du participant
+    PARTICIPANT_DIMENSIONS = (DIMENSION_EVENT_TYPE, DIMENSION_COUNTRY, DIMENSION_ORGANIZATION)
+
+    dimension = models.CharField("Dimension", max_length=30)
+    key = models.CharField("Valeur", max_length=200, blank=True)
+    registered = models.BigIntegerField("Inscrits", default=0)
+    used = models.BigIntegerField("Validés", default=0)
+
+    class Meta:
+        verbose_name = "Compteur de participation"
+        verbose_name_plural = "Compteurs de participation"
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='events_counter_dimension_key'),
+        ]
+
+    @classmethod
+    def keys_for(cls, participant):
+        return [(cls.DIMENSION_TOTAL, '')] + [
+            (dimension, getattr(participant, dimension) or '')
+            for dimension in cls.PARTICIPANT_DIMENSIONS
+        ]
+
+    @staticmethod
+    def arrival_hour(used_at):
+        return used_at.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:00:00Z')
+
+    @classmethod
+    def deltas_for(cls, participant, registered=0, used=0):
+        """{(dimension, key): (registered, used)} pour un participant."""
+        deltas = {key: (registered, used) for key in cls.keys_for(participant)}
+        if used and participant.used_at is not None:
+            deltas[(cls.DIMENSION_ARRIVAL_HOUR, cls.arrival_hour(participant.used_at))] = (0, used)
+        return deltas
+
+    @classmethod
+    def record(cls, participants, registered=0, used=0):
+        """
+        Ajoute `registered` / `used` (éventuellement négatifs) aux compteurs de
+        chaque participant (`used_at` doit être renseigné pour une validation).
+        """
+        totals = {}
+        for participant in participants:
+            for key, (r, u) in cls.deltas_for(participant, registered, used).items():
+                total_r, total_u = totals.get(key, (0, 0))
+                totals[key] = (total_r + r, total_u + u)
+        cls.apply(totals)
+
+    @classmethod
+    def apply(cls, deltas):
+        """
+        `deltas` : {(dimension, key): (registered, used)}, appliqués en une
+        seule instruction sans relire les compteurs :
+            INSERT ... ON CONFLICT (dimension, key)
+            DO UPDATE SET registered = registered + excluded.registered, ...
+        (SQLite et PostgreSQL).
+        """
+        rows = [(dimension, key, r, u) for (dimension, key), (r, u) in deltas.items() if r or u]
+        if not rows:
+            return
+        qn = connection.ops.quote_name
+        table = qn(cls._meta.db_table)
+        dimension, key, registered, used = (
+            qn(cls._meta.get_field(name).column) for name in ('dimension', 'key', 'registered', 'used'))
+        sql = (
+            f"INSERT INTO {table} ({dimension}, {key}, {registered}, {used}) "
+            f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(rows))} "
+            f"ON CONFLICT ({dimension}, {key}) DO UPDATE SET "
+            f"{registered} = {table}.{registered} + excluded.{registered}, "
+            f"{used} = {table}.{used} + excluded.{used}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [value for row in rows for value in row])
+
+    def __str__(self):
+        return f"{self.dimension}={self.key}: {self.used}/{self.registered}"
+
+
 class RegistrationSetting(models.Model):
     """
     Small singleton model to store whether registration is open.
@@ -83,9 +283,21 @@ class RegistrationSetting(models.Model):
 
     @classmethod
     def get_solo(cls) -> "RegistrationSetting":
-        obj, created = cls.objects.get_or_create(
-            pk=1, defaults={'is_open': True})
-        return obj
+        # Servi depuis le cache du process (voir singletons.py)
+        return _registration_setting_cache.get()
+
+    @classmethod
+    async def aget_solo(cls) -> "RegistrationSetting":
+        return await _registration_setting_cache.aget()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        _registration_setting_cache.invalidate()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        _registration_setting_cache.invalidate()
+        return result
 
 
 class EventSettings(models.Model):
@@ -106,6 +318,158 @@ class EventSettings(models.Model):
 
     @classmethod
     def get_solo(cls) -> "EventSettings":
-        obj, created = cls.objects.get_or_create(
-            pk=1, defaults={'event_name': 'Notre Événement'})
-        return obj
+        # Servi depuis le cache du process (voir singletons.py)
+        return _event_settings_cache.get()
+
+    @classmethod
+    async def aget_solo(cls) -> "EventSettings":
+        return await _event_settings_cache.aget()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        _event_settings_cache.invalidate()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        _event_settings_cache.invalidate()
+        return result
+
+
+_registration_setting_cache = SingletonCache(RegistrationSetting, defaults={'is_open': True})
+_event_settings_cache = SingletonCache(EventSettings, defaults={'event_name': 'Notre Événement'})
+
+
+class Job(models.Model):
+    """
+    Tâche d'arrière-plan persistée en base (rendu du QR, envoi d'email...).
+    Les jobs sont exécutés par `python manage.py process_jobs` ; voir jobs.py.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'En attente'),
+        (STATUS_RUNNING, 'En cours'),
+        (STATUS_DONE, 'Terminé'),
+        (STATUS_FAILED, 'Échec'),
+    ]
+
+    kind = models.CharField("Type", max_length=50)
+    participant = models.ForeignKey(
+        Participant,
+        verbose_name="Participant",
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        null=True,
+        blank=True,
+    )
+    payload = models.JSONField("Données", default=dict, blank=True)
+    status = models.CharField(
+        "Statut", max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField("Tentatives", default=0)
+    max_attempts = models.PositiveIntegerField("Tentatives max", default=5)
+    run_at = models.DateTimeField("Exécuter à partir de", default=timezone.now)
+    locked_at = models.DateTimeField("Verrouillé le", null=True, blank=True)
+    last_error = models.TextField("Dernière erreur", blank=True)
+    created_at = models.DateTimeField("Créé le", auto_now_add=True)
+    updated_at = models.DateTimeField("Mis à jour le", auto_now=True)
+
+    class Meta:
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+        ordering = ['run_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='events_job_status_run_at'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class Campaign(models.Model):
+    """
+    Envoi en masse des billets (invitation ou mise à jour) à une sélection de
+    participants. Le contexte de l'événement est figé à la création ; l'envoi
+    est découpé en jobs par tranches d'ids, qui reprennent là où ils s'étaient
+    arrêtés après un redémarrage du worker. Voir campaigns.py.
+    """
+    TEMPLATE_INVITATION = 'invitation'
+    TEMPLATE_UPDATE = 'update'
+    TEMPLATE_CHOICES = [
+        (TEMPLATE_INVITATION, 'Invitation'),
+        (TEMPLATE_UPDATE, 'Mise à jour'),
+    ]
+
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'En cours'),
+        (STATUS_DONE, 'Terminée'),
+        (STATUS_CANCELLED, 'Annulée'),
+    ]
+
+    name = models.CharField("Nom", max_length=200, blank=True)
+    template = models.CharField(
+        "Modèle", max_length=20, choices=TEMPLATE_CHOICES, default=TEMPLATE_INVITATION)
+    filters = models.JSONField("Filtres", default=dict, blank=True)
+    event_context = models.JSONField(
+        "Contexte de l'événement", default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(
+        "Statut", max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    total = models.PositiveIntegerField("Destinataires", default=0)
+    sent = models.PositiveIntegerField("Envoyés", default=0)
+    failed = models.PositiveIntegerField("Échecs", default=0)
+    # Destinataires supprimés ou sans email entre le lancement et l'envoi
+    skipped = models.PositiveIntegerField("Ignorés", default=0)
+    chunks_total = models.PositiveIntegerField("Tranches", default=0)
+    chunks_done = models.PositiveIntegerField("Tranches terminées", default=0)
+    last_error = models.TextField("Dernière erreur", blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="Créée par",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField("Créée le", auto_now_add=True)
+    updated_at = models.DateTimeField("Mise à jour le", auto_now=True)
+    finished_at = models.DateTimeField("Terminée le", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Campagne"
+        verbose_name_plural = "Campagnes"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.name or f"Campagne #{self.pk}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Réponse mémorisée d'une requête POST envoyée avec un en-tête
+    `Idempotency-Key` (inscription, validation de ticket) : un renvoi de la
+    même requête rejoue la réponse au lieu de refaire le travail. Une ligne
+    sans `response_status` est en cours de traitement. Voir idempotency.py.
+    """
+    scope = models.CharField("Endpoint", max_length=50)
+    key = models.CharField("Clé", max_length=255)
+    fingerprint = models.CharField("Empreinte de la requête", max_length=64)
+    response_status = models.PositiveSmallIntegerField("Statut HTTP", null=True, blank=True)
+    response_body = models.JSONField("Réponse", null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField("Réservée le", default=timezone.now)
+    expires_at = models.DateTimeField("Expire le")
+
+    class Meta:
+        verbose_name = "Clé d'idempotence"
+        verbose_name_plural = "Clés d'idempotence"
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='events_idempotency_scope_key'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='events_idempotency_expires'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
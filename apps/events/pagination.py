@@ -0,0 +1,132 @@
+# apps/events/pagination.py
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Pagination par curseur (keyset) sur un tuple de champs d'ordre, par
+    défaut ('-created_at', '-id').
+
+    Contrairement à la pagination par offset, chaque page est obtenue par un
+    simple `WHERE (created_at, id) < (...) ORDER BY ... LIMIT n` : le coût est
+    constant quel que soit le nombre d'inscrits. Le dernier champ de l'ordre
+    doit être unique (id) pour départager les égalités.
+
+    La vue peut fournir `get_cursor_ordering()` (ou un attribut
+    `cursor_ordering`) pour changer l'ordre.
+    """
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.prepare_queryset(queryset, request, view)))
+
+    def prepare_queryset(self, queryset, request, view=None):
+        """Requête (non évaluée) de la page ; évaluée par l'appelant, éventuellement en async."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+
+        queryset = queryset.order_by(*self.ordering)
+        values = self.decode_cursor(request, queryset.model)
+        if values is not None:
+            queryset = queryset.filter(self.build_keyset_filter(values))
+
+        # Un élément de plus pour savoir s'il existe une page suivante
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, view):
+        if view is not None and hasattr(view, 'get_cursor_ordering'):
+            return tuple(view.get_cursor_ordering())
+        return tuple(getattr(view, 'cursor_ordering', self.ordering))
+
+    def build_keyset_filter(self, values):
+        """
+        Construit `(a, b, c) > (va, vb, vc)` en tenant compte du sens de chaque
+        champ : (a > va) OR (a = va AND b > vb) OR (a = va AND b = vb AND c > vc).
+        """
+        condition = Q()
+        equal_prefix = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal_prefix & Q(**{f'{name}__{lookup}': value})
+            equal_prefix &= Q(**{name: value})
+        return condition
+
+    def encode_cursor(self, instance):
+        values = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError(encoded)
+            # Reconvertir les valeurs JSON dans le type Python du champ
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'page_size': self.page_size,
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
@@ -1,26 +1,25 @@
 # apps/events/serializers.py
-import io
-import base64
-from django.core.files.base import ContentFile
-from django.core.mail import EmailMessage
 from django.db import transaction
-from django.utils import timezone
+from django.urls import reverse
 
-import qrcode
 from rest_framework import serializers
 
-from .models import Participant, RegistrationSetting, EventSettings
-from .email_utils import send_participant_invitation_email, send_participant_update_email
+from .models import Participant, RegistrationSetting, EventSettings, Campaign
+from .jobs import enqueue, job_states
+from .tasks import KIND_RENDER_QR
+from .utils_qr import build_qr_payload, qr_bytes_to_base64, render_qr_png
 
 
 class QRMixin:
-    """Mixin providing helper methods to return QR image as base64 or absolute URL."""
+    """
+    Mixin providing helper methods to return QR image as base64 or absolute URL.
+    The image comes from the QR render cache (utils_qr), not from the stored file.
+    """
 
     def get_qr_base64(self, obj):
         try:
-            if obj and obj.qr_code:
-                with obj.qr_code.open('rb') as f:
-                    return base64.b64encode(f.read()).decode('utf-8')
+            if obj and obj.ticket_uuid:
+                return qr_bytes_to_base64(render_qr_png(build_qr_payload(obj)))
         except Exception:
             return None
         return None
@@ -28,18 +27,46 @@ class QRMixin:
     def get_qr_url(self, obj):
         request = self.context.get('request')
         try:
-            if obj and obj.qr_code:
+            if obj and obj.ticket_uuid:
+                url = reverse('ticket-qr', kwargs={'ticket_uuid': obj.ticket_uuid})
                 if request is not None:
-                    return request.build_absolute_uri(obj.qr_code.url)
-                return obj.qr_code.url
+                    return request.build_absolute_uri(url)
+                return url
         except Exception:
             return None
         return None
 
 
-class ParticipantSerializer(QRMixin, serializers.ModelSerializer):
+class ProjectionMixin:
+    """
+    Permet de restreindre les champs sérialisés : `Serializer(obj, fields=[...])`.
+    Les noms inconnus sont ignorés ; `fields=None` conserve tous les champs.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            allowed = set(fields)
+            for name in list(self.fields):
+                if name not in allowed:
+                    self.fields.pop(name)
+
+
+class ParticipantSerializer(ProjectionMixin, QRMixin, serializers.ModelSerializer):
+    # Champs renvoyés par défaut dans les listes : sans qr_base64 / qr_url,
+    # qui imposent une lecture disque (et un encodage base64) par ligne.
+    LIST_DEFAULT_FIELDS = (
+        'id', 'first_name', 'last_name', 'email',
+        'phone', 'organization', 'position', 'country', 'event_type',
+        'ticket_uuid', 'qr_code', 'created_at',
+        'used', 'used_at',
+    )
+
     qr_base64 = serializers.SerializerMethodField(read_only=True)
     qr_url = serializers.SerializerMethodField(read_only=True)
+    # État des traitements d'arrière-plan (QR, email) que le frontend peut suivre
+    jobs = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Participant
@@ -48,20 +75,32 @@ class ParticipantSerializer(QRMixin, serializers.ModelSerializer):
             'phone', 'organization', 'position', 'country', 'event_type',
             'ticket_uuid', 'qr_code', 'created_at',
             'used', 'used_at',
-            'qr_base64', 'qr_url',
+            'qr_base64', 'qr_url', 'jobs',
         ]
         read_only_fields = [
             'id', 'ticket_uuid', 'qr_code',
-            'created_at', 'used', 'used_at', 'qr_base64', 'qr_url'
+            'created_at', 'used', 'used_at', 'qr_base64', 'qr_url', 'jobs'
         ]
 
+    def get_jobs(self, obj):
+        return job_states(obj)
+
+
+class ParticipantCheckInSerializer(serializers.ModelSerializer):
+    """Réponse légère du point de contrôle : pas d'image QR."""
+
+    class Meta:
+        model = Participant
+        fields = list(Participant.CHECK_IN_FIELDS)
+        read_only_fields = fields
+
 
 class ParticipantCreateSerializer(QRMixin, serializers.ModelSerializer):
     """
     Serializer used for creating participants.
     - Accepts the new fields (phone, organization, position, country, event_type).
-    - Generates and saves a QR image after participant instance is created.
-    - Tries to send an email with the QR attached (best effort).
+    - Enqueues the QR rendering and the invitation email as background jobs
+      (see tasks.py), so the request returns as soon as the row is committed.
     """
     qr_base64 = serializers.SerializerMethodField(read_only=True)
     qr_url = serializers.SerializerMethodField(read_only=True)
@@ -106,39 +145,12 @@ class ParticipantCreateSerializer(QRMixin, serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        # Use a transaction so we don't leave a half-created participant if something se casse (optionnel)
+        # Le job est créé dans la même transaction que le participant :
+        # le worker ne le voit qu'une fois la ligne validée.
         with transaction.atomic():
             participant = Participant.objects.create(**validated_data)
-
-            # Construire le payload pour le QR — ici on encode le ticket_uuid (modifiable)
-            qr_payload = f"ticket:{participant.ticket_uuid}"
-
-            qr_bytes = None
-            try:
-                # Générer image QR (PIL.Image) puis bytes PNG
-                qr_img = qrcode.make(qr_payload)
-                buf = io.BytesIO()
-                qr_img.save(buf, format='PNG')
-                qr_bytes = buf.getvalue()
-                buf.close()
-
-                # Sauvegarder le fichier image dans le champ ImageField
-                filename = f"{participant.ticket_uuid}.png"
-                participant.qr_code.save(
-                    filename, ContentFile(qr_bytes), save=False)
-                participant.save()  # sauvegarde finale avec qr_code
-            except Exception:
-                # On continue même si génération du QR échoue
-                # participant reste créé — qr_code restera null
-                pass
-
-        # Envoi d'email d'invitation avec template
-        try:
-            if participant.email:
-                send_participant_invitation_email(participant, qr_bytes)
-        except Exception:
-            # fail_silently-like: on ignore l'erreur d'envoi
-            pass
+            enqueue(KIND_RENDER_QR, participant,
+                    payload={'send_invitation': bool(participant.email)})
 
         return participant
 
@@ -162,3 +174,25 @@ class EventSettingsSerializer(serializers.ModelSerializer):
             # Fallback to APP_DOMAIN setting
             return f"{settings.APP_DOMAIN}{obj.logo.url}"
         return None
+
+
+class CampaignSerializer(serializers.ModelSerializer):
+    """Campagne d'envoi et sa progression (lecture seule)."""
+    remaining = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Campaign
+        fields = ['id', 'name', 'template', 'filters', 'status', 'total', 'sent',
+                  'failed', 'skipped', 'remaining', 'last_error', 'created_at', 'updated_at', 'finished_at']
+        read_only_fields = fields
+
+    def get_remaining(self, obj):
+        return max(obj.total - obj.sent - obj.failed - obj.skipped, 0)
+
+
+class CampaignCreateSerializer(serializers.Serializer):
+    """Paramètres d'une nouvelle campagne ; `filters` reprend ceux de la liste des participants."""
+    name = serializers.CharField(max_length=200, required=False, allow_blank=True)
+    template = serializers.ChoiceField(
+        choices=Campaign.TEMPLATE_CHOICES, default=Campaign.TEMPLATE_INVITATION)
+    filters = serializers.DictField(required=False, default=dict)
@@ -0,0 +1,78 @@
+# apps/events/singletons.py
+"""
+Cache local (par process) des modèles singleton (RegistrationSetting,
+EventSettings), invalidé par un numéro de version stocké dans le cache Django.
+
+Une lecture coûte un `cache.get` de la version (aucune requête SQL) ; une
+sauvegarde change la version après le commit, ce qui force tous les workers
+à recharger l'objet à leur prochaine lecture. Sans cache partagé (LocMemCache),
+les autres process rechargent au plus tard après SINGLETON_CACHE_TTL secondes.
+"""
+import copy
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class SingletonCache:
+
+    def __init__(self, model, defaults=None):
+        self.model = model
+        self.defaults = defaults or {}
+        self.version_key = f"events:singleton-version:{model._meta.label_lower}"
+        # (version, chargé à (monotonic), instance)
+        self._entry = None
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'SINGLETON_CACHE_TTL', 5)
+
+    def _current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid.uuid4().hex, None)
+            version = cache.get(self.version_key)
+        return version
+
+    async def _acurrent_version(self):
+        version = await cache.aget(self.version_key)
+        if version is None:
+            await cache.aadd(self.version_key, uuid.uuid4().hex, None)
+            version = await cache.aget(self.version_key)
+        return version
+
+    def _is_fresh(self, entry, version):
+        return entry is not None and entry[0] == version and time.monotonic() - entry[1] <= self.ttl
+
+    def get(self):
+        """Retourne une copie de l'instance (les appelants peuvent la modifier)."""
+        version = self._current_version()
+        entry = self._entry
+        if not self._is_fresh(entry, version):
+            with self._lock:
+                obj, _ = self.model.objects.get_or_create(pk=1, defaults=self.defaults)
+                entry = (version, time.monotonic(), obj)
+                self._entry = entry
+        return copy.copy(entry[2])
+
+    async def aget(self):
+        """Version async de get() (cache et ORM async, pour les vues ASGI)."""
+        version = await self._acurrent_version()
+        entry = self._entry
+        if not self._is_fresh(entry, version):
+            # Sans verrou : deux chargements simultanés donnent le même objet
+            obj, _ = await self.model.objects.aget_or_create(pk=1, defaults=self.defaults)
+            entry = (version, time.monotonic(), obj)
+            self._entry = entry
+        return copy.copy(entry[2])
+
+    def invalidate(self):
+        """Change la version partagée ; appelé après le commit de la sauvegarde."""
+        self._entry = None
+        transaction.on_commit(
+            lambda: cache.set(self.version_key, uuid.uuid4().hex, None))
@@ -0,0 +1,169 @@
+# apps/events/snapshot.py
+"""
+Instantané des tickets valides pour la validation hors-ligne aux entrées.
+
+Format binaire (big-endian) :
+    b'CINS' | version: uint64 | count: uint32 | count x 16 octets (UUID triés)
+
+La version est l'horodatage serveur (en microsecondes depuis l'epoch) de la
+dernière création / validation (`changed_at`) ou suppression
+(`TicketDeletion`) de ticket. Un appareil garde
+l'instantané en mémoire, teste un ticket par recherche dichotomique
+(O(log n)) et se resynchronise avec `build_delta(version)`.
+
+Les traces de suppression sont conservées TICKET_DELETION_RETENTION secondes
+(purge : `purge_ticket_deletions()`). Un delta demandé depuis une version plus
+ancienne ne peut plus signaler tous les tickets retirés : `build_delta` lève
+`SnapshotExpired` et l'appareil retélécharge l'instantané complet.
+"""
+import bisect
+import struct
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Participant, TicketDeletion
+
+MAGIC = b'CINS'
+HEADER = struct.Struct('>4sQI')
+# Les transactions en cours au moment d'un delta peuvent valider des lignes
+# dont changed_at est antérieur à la version renvoyée : on relit une petite
+# fenêtre avant `since` (les appareils appliquent les deltas de façon idempotente).
+DELTA_OVERLAP = timedelta(seconds=5)
+CACHE_KEY = 'events:ticket-snapshot:{version}'
+CACHE_TIMEOUT = 300
+
+
+class SnapshotExpired(Exception):
+    """Version antérieure à la conservation des suppressions : instantané complet requis."""
+
+
+def _retention():
+    return timedelta(seconds=getattr(settings, 'TICKET_DELETION_RETENTION', 7 * 86400))
+
+
+def datetime_to_version(value):
+    if value is None:
+        return 0
+    delta = value - datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def version_to_datetime(version):
+    return datetime(1970, 1, 1, tzinfo=dt_timezone.utc) + timedelta(microseconds=int(version))
+
+
+def current_version():
+    return max(
+        datetime_to_version(Participant.objects.aggregate(latest=Max('changed_at'))['latest']),
+        datetime_to_version(TicketDeletion.objects.aggregate(latest=Max('deleted_at'))['latest']),
+    )
+
+
+def participant_post_delete(sender, instance, **kwargs):
+    """Trace la suppression : nouvelle version d'instantané, ticket retiré des deltas."""
+    TicketDeletion.objects.create(ticket_uuid=instance.ticket_uuid)
+
+
+def oldest_delta_version(now=None):
+    """Plus ancienne version depuis laquelle un delta est encore complet."""
+    return datetime_to_version((now or timezone.now()) - _retention())
+
+
+def purge_ticket_deletions(now=None):
+    """
+    Supprime les traces plus anciennes que tout delta encore accepté
+    (TICKET_DELETION_RETENTION + DELTA_OVERLAP) ; retourne leur nombre.
+    """
+    cutoff = (now or timezone.now()) - _retention() - DELTA_OVERLAP
+    deleted, _ = TicketDeletion.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
+
+
+def build_snapshot():
+    """Retourne (version, bytes) ; mis en cache tant que la version ne change pas."""
+    version = current_version()
+    key = CACHE_KEY.format(version=version)
+    data = cache.get(key)
+    if data is None:
+        tickets = sorted(
+            ticket.bytes for ticket in Participant.objects.filter(used=False)
+            .values_list('ticket_uuid', flat=True).iterator(chunk_size=5000)
+        )
+        data = HEADER.pack(MAGIC, version, len(tickets)) + b''.join(tickets)
+        cache.set(key, data, CACHE_TIMEOUT)
+    return version, data
+
+
+def build_delta(since):
+    """
+    Tickets modifiés depuis la version `since` :
+        {version, since, valid: [uuid, ...], used: [uuid, ...], removed: [uuid, ...]}
+    `valid` contient les nouveaux tickets, `used` ceux validés depuis et
+    `removed` ceux des participants supprimés depuis. Lève `SnapshotExpired`
+    si `since` précède la conservation des suppressions.
+    """
+    if int(since) < oldest_delta_version():
+        raise SnapshotExpired(since)
+    start = version_to_datetime(since) - DELTA_OVERLAP
+    rows = Participant.objects.filter(
+        changed_at__gt=start,
+    ).values_list('ticket_uuid', 'used', 'changed_at')
+
+    version = int(since)
+    valid, used = [], []
+    for ticket, is_used, changed_at in rows.iterator(chunk_size=5000):
+        (used if is_used else valid).append(str(ticket))
+        version = max(version, datetime_to_version(changed_at))
+
+    current = set(valid + used)
+    removed = []
+    deletions = TicketDeletion.objects.filter(deleted_at__gt=start).values_list('ticket_uuid', 'deleted_at')
+    for ticket, deleted_at in deletions.iterator(chunk_size=5000):
+        # Un ticket recréé depuis (même UUID) reste dans valid / used
+        if str(ticket) not in current:
+            removed.append(str(ticket))
+        version = max(version, datetime_to_version(deleted_at))
+    return {'version': version, 'since': int(since), 'valid': valid, 'used': used, 'removed': removed}
+
+
+class TicketSnapshot:
+    """Lecture d'un instantané binaire (implémentation de référence côté appareil)."""
+
+    def __init__(self, data):
+        magic, self.version, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a ticket snapshot")
+        body = data[HEADER.size:HEADER.size + 16 * count]
+        self._tickets = [body[i:i + 16] for i in range(0, len(body), 16)]
+        self._used = set()
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def __contains__(self, ticket):
+        key = uuid.UUID(str(ticket)).bytes
+        if key in self._used:
+            return False
+        index = bisect.bisect_left(self._tickets, key)
+        return index < len(self._tickets) and self._tickets[index] == key
+
+    def apply_delta(self, delta):
+        for ticket in delta['valid']:
+            key = uuid.UUID(ticket).bytes
+            self._used.discard(key)
+            index = bisect.bisect_left(self._tickets, key)
+            if index == len(self._tickets) or self._tickets[index] != key:
+                self._tickets.insert(index, key)
+        for ticket in delta['used']:
+            self._used.add(uuid.UUID(ticket).bytes)
+        for ticket in delta.get('removed', ()):
+            key = uuid.UUID(ticket).bytes
+            index = bisect.bisect_left(self._tickets, key)
+            if index < len(self._tickets) and self._tickets[index] == key:
+                del self._tickets[index]
+        self.version = max(self.version, delta['version'])
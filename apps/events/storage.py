@@ -0,0 +1,148 @@
+# apps/events/storage.py
+"""
+Stockage des images QR (Participant.qr_code).
+
+- Emplacement : `qr_codes/<h>/<ticket_uuid>.png`, où `<h>` est formé des
+  premiers caractères hexadécimaux du SHA-256 du ticket (QR_SHARD_DEPTH
+  niveaux de 2 caractères, 256 sous-répertoires par niveau) : aucun
+  répertoire ne contient des dizaines de milliers de fichiers.
+- Backend : l'alias STORAGES['qr'] (système de fichiers sous MEDIA_ROOT par
+  défaut, ou stockage objet compatible S3 via django-storages), résolu à
+  chaque accès : changer STORAGES ne demande pas de migration du modèle.
+
+`migrate_files()` (commande `migrate_qr_storage`) déplace les fichiers
+existants vers cet emplacement, éventuellement depuis un autre stockage, en
+parallèle, et met à jour `qr_code` par lots.
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import storages
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.functional import LazyObject, empty
+
+QR_DIRECTORY = 'qr_codes'
+QR_STORAGE_ALIAS = 'qr'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _alias():
+    return QR_STORAGE_ALIAS if QR_STORAGE_ALIAS in settings.STORAGES else 'default'
+
+
+class QRStorage(LazyObject):
+    """Stockage STORAGES['qr'] (ou 'default'), résolu au premier accès."""
+
+    def _setup(self):
+        self._wrapped = storages[_alias()]
+
+
+qr_storage = QRStorage()
+
+
+def get_qr_storage():
+    """`storage=` du champ qr_code (un callable : la migration ne fige pas le backend)."""
+    return qr_storage
+
+
+@receiver(setting_changed)
+def _reset_qr_storage(setting, **kwargs):
+    if setting == 'STORAGES':
+        qr_storage._wrapped = empty
+
+
+def shard(ticket_uuid):
+    digest = hashlib.sha256(str(ticket_uuid).encode('ascii')).hexdigest()
+    depth = _setting('QR_SHARD_DEPTH', 1)
+    return [digest[2 * i:2 * i + 2] for i in range(depth)]
+
+
+def qr_file_name(ticket_uuid, ext='.png'):
+    """qr_codes/<h>/<ticket_uuid>.png (séparateurs '/' : noms de stockage, pas de chemins)."""
+    return '/'.join([QR_DIRECTORY, *shard(ticket_uuid), f"{ticket_uuid}{ext}"])
+
+
+def _copy(source, target, old_name, new_name):
+    """Copie un fichier ; 'missing' si la source n'existe plus."""
+    if target.exists(new_name):
+        # Copié lors d'une exécution interrompue
+        return 'copied'
+    if not source.exists(old_name):
+        return 'missing'
+    with source.open(old_name, 'rb') as f:
+        saved = target.save(new_name, f)
+    if saved != new_name:
+        # Le stockage a renommé le fichier : ne pas laisser de doublon
+        target.delete(saved)
+        raise OSError(f"{new_name}: nom refusé par le stockage ({saved})")
+    return 'copied'
+
+
+def migrate_files(source_alias=None, workers=8, batch_size=500, dry_run=False, log=None):
+    """
+    Déplace les QR stockés vers `qr_file_name()` dans le stockage QR, par lots
+    d'ids : copies en parallèle, un `bulk_update` de `qr_code` par lot, puis
+    suppression des anciens fichiers. Relançable : les fichiers déjà copiés
+    sont repris. Retourne {'moved', 'skipped', 'missing', 'failed'}.
+    """
+    from .models import Participant
+
+    source = storages[source_alias] if source_alias else qr_storage
+    target = qr_storage
+    same_storage = source_alias is None or source_alias == _alias()
+    stats = {'moved': 0, 'skipped': 0, 'missing': 0, 'failed': 0}
+    queryset = (Participant.objects.exclude(qr_code='').exclude(qr_code__isnull=True)
+                .only('id', 'ticket_uuid', 'qr_code').order_by('id'))
+    last_id = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            moves = []
+            for participant in batch:
+                old_name = participant.qr_code.name
+                new_name = qr_file_name(participant.ticket_uuid, os.path.splitext(old_name)[1] or '.png')
+                if same_storage and old_name == new_name:
+                    stats['skipped'] += 1
+                else:
+                    moves.append((participant, old_name, new_name))
+            if dry_run:
+                stats['moved'] += len(moves)
+                continue
+
+            results = executor.map(
+                lambda move: _safe_copy(source, target, move[1], move[2]), moves)
+            updated = []
+            for (participant, old_name, new_name), outcome in zip(moves, results):
+                if outcome != 'copied':
+                    stats[outcome] += 1
+                    if log and outcome == 'failed':
+                        log(f"{participant.ticket_uuid}: échec de la copie de {old_name}")
+                    continue
+                participant.qr_code.name = new_name
+                updated.append((participant, old_name))
+            Participant.objects.bulk_update([p for p, _ in updated], ['qr_code'])
+            stats['moved'] += len(updated)
+
+            # Anciens fichiers supprimés une fois les nouveaux noms enregistrés
+            list(executor.map(lambda old_name: source.delete(old_name), [old for _, old in updated]))
+            if log:
+                log(f"jusqu'à l'id {last_id} : {stats['moved']} déplacé(s)")
+    return stats
+
+
+def _safe_copy(source, target, old_name, new_name):
+    try:
+        return _copy(source, target, old_name, new_name)
+    except Exception:
+        return 'failed'
@@ -0,0 +1,51 @@
+# apps/events/tasks.py
+"""
+Handlers des jobs d'arrière-plan liés aux participants.
+Importé par EventsConfig.ready() pour enregistrer les handlers.
+"""
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .email_utils import send_participant_invitation_email
+from .jobs import enqueue, register
+from .utils_qr import build_qr_payload, render_qr_png
+
+KIND_RENDER_QR = 'render_qr'
+KIND_SEND_INVITATION = 'send_invitation'
+
+
+def read_qr_bytes(participant, variant='default'):
+    """PNG du QR du participant, depuis le cache de rendu (voir utils_qr)."""
+    return render_qr_png(build_qr_payload(participant), variant)
+
+
+@register(KIND_RENDER_QR)
+def render_qr(job):
+    """
+    Génère le QR du participant et, si QR_STORE_FILES est actif, le stocke
+    dans `qr_code` ; programme ensuite l'invitation.
+    """
+    participant = job.participant
+    if participant is None:
+        return
+
+    qr_bytes = read_qr_bytes(participant)
+    # Idempotent : une nouvelle tentative ne restocke pas un QR existant
+    if getattr(settings, 'QR_STORE_FILES', True) and not participant.qr_code:
+        participant.qr_code.save(
+            f"{participant.ticket_uuid}.png", ContentFile(qr_bytes), save=False)
+        participant.save(update_fields=['qr_code'])
+
+    if job.payload.get('send_invitation') and participant.email:
+        enqueue(KIND_SEND_INVITATION, participant)
+
+
+@register(KIND_SEND_INVITATION)
+def send_invitation(job):
+    """Envoie l'email d'invitation ; lève une erreur pour déclencher un retry."""
+    participant = job.participant
+    if participant is None or not participant.email:
+        return
+    qr_bytes = read_qr_bytes(participant, getattr(settings, 'QR_EMAIL_VARIANT', 'email'))
+    if not send_participant_invitation_email(participant, qr_bytes):
+        raise RuntimeError(f"Invitation email to {participant.email} was not sent")
@@ -1,9 +1,51 @@
 # apps/events/tests/test_api.py
+import json
+import shutil
+import smtplib
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
 from django.urls import reverse, NoReverseMatch
+from django.utils import timezone
 from rest_framework.test import APIClient
-from django.test import TestCase
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-from .models import Participant
+from . import idempotency, jobs, usernames
+from .benchmark import percentile, run_benchmark
+from .campaigns import resume_campaign, start_campaign
+from .checkin import check_in_batch
+from .counters import get_counters, rebuild
+from .email_utils import build_participant_email, get_event_context, send_participant_invitation_emails
+from .importer import import_participants
+from .live import CheckInBroadcaster
+from .mail import Mailer, TokenBucket, get_mailer
+from .metrics import registry
+from .models import (
+    Campaign, EventSettings, IdempotencyKey, Job, Participant, RegistrationSetting, TicketDeletion,
+)
+from .serializers import ParticipantSerializer
+from .snapshot import TicketSnapshot, datetime_to_version
+from .storage import qr_file_name
+from .tasks import KIND_RENDER_QR
+from .throttling import LoadSheddingMiddleware, parse_rate, take
+from .ticket_codes import InvalidTicketCode, decode_ticket, encode_ticket
+from .usernames import allocate_username
+from .utils_qr import build_qr_payload, build_ticket_payload, get_cached_qr_png, qr_digest, render_qr_png
 
 
 class ParticipantAPITest(TestCase):
@@ -67,3 +109,1248 @@ class ParticipantAPITest(TestCase):
             # Pas d'endpoint verify-ticket : on considère que la vérification sera faite via une autre route / UI
             self.skipTest(
                 "No 'verify-ticket' URL configured; basic DB assertions performed instead.")
+
+
+class ParticipantListPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for i in range(5):
+            Participant.objects.create(
+                first_name=f'P{i}', email=f'p{i}@example.com')
+
+    def test_cursor_pages_cover_all_rows_without_qr_fields(self):
+        url = '/api/participants/?page_size=2'
+        seen = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            for row in resp.data['results']:
+                self.assertNotIn('qr_base64', row)
+                self.assertNotIn('qr_url', row)
+                seen.append(row['id'])
+            url = resp.data['next']
+
+        expected = list(Participant.objects.order_by(
+            '-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_fields_projection(self):
+        resp = self.client.get('/api/participants/?fields=id,email,qr_url')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(set(resp.data['results'][0]), {'id', 'email', 'qr_url'})
+
+    def test_invalid_cursor(self):
+        resp = self.client.get('/api/participants/?cursor=not-a-cursor')
+        self.assertEqual(resp.status_code, 404)
+
+
+class TemporaryMediaMixin:
+    """Fichiers écrits (QR rendus) dans un MEDIA_ROOT temporaire, supprimé après le test."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+class AdminClientMixin:
+    """`self.client` authentifié en superutilisateur (`self.admin_user`)."""
+
+    def setUp(self):
+        super().setUp()
+        self.admin_user = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin_user)
+
+
+class BackgroundJobsTest(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_registration_defers_qr_and_email_to_worker(self):
+        resp = self.client.post('/api/participants/', {
+            'first_name': 'Bob', 'email': 'bob@example.com'}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['jobs']['render_qr']['status'], Job.STATUS_PENDING)
+        self.assertEqual(len(mail.outbox), 0)
+
+        # render_qr puis send_invitation (programmé par le premier)
+        self.assertEqual(jobs.run_pending(), 2)
+
+        participant = Participant.objects.get(email='bob@example.com')
+        self.assertTrue(participant.qr_code)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            set(participant.jobs.values_list('status', flat=True)), {Job.STATUS_DONE})
+
+    def test_failed_job_is_retried_with_backoff(self):
+        calls = []
+
+        @jobs.register('test_flaky')
+        def flaky(job):
+            calls.append(job.attempts)
+            raise RuntimeError('boom')
+
+        job = jobs.enqueue('test_flaky', max_attempts=2)
+        self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('boom', job.last_error)
+
+        # Pas encore exécutable : rien à traiter
+        self.assertEqual(jobs.run_pending(), 0)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now() - timedelta(seconds=1))
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(calls, [1, 2])
+
+
+class VerifyTicketTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.participant = Participant.objects.create(
+            first_name='Carol', email='carol@example.com')
+
+    def test_check_in_is_single_statement_and_exactly_once(self):
+        # UPDATE ... RETURNING, plus l'incrément des compteurs de participation
+        with self.assertNumQueries(2):
+            admitted, participant = Participant.check_in(self.participant.ticket_uuid)
+        self.assertTrue(admitted)
+        self.assertTrue(participant.used)
+        self.assertEqual(participant.email, 'carol@example.com')
+
+        admitted, participant = Participant.check_in(self.participant.ticket_uuid)
+        self.assertFalse(admitted)
+        self.assertTrue(participant.used)
+
+    def test_verify_endpoint_slim_response(self):
+        payload = {'ticket_uuid': str(self.participant.ticket_uuid), 'mark_used': True}
+        resp = self.client.post('/api/verify/', payload, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.data['valid'])
+        self.assertNotIn('qr_base64', resp.data['participant'])
+
+        resp = self.client.post('/api/verify/', payload, format='json')
+        self.assertFalse(resp.data['valid'])
+        self.assertTrue(resp.data['already_used'])
+
+    def test_verify_unknown_or_malformed_ticket(self):
+        for ticket in ('00000000-0000-0000-0000-000000000000', 'garbage'):
+            resp = self.client.post('/api/verify/', {'ticket_uuid': ticket}, format='json')
+            self.assertEqual(resp.status_code, 404)
+            self.assertFalse(resp.data['valid'])
+
+    def test_batch_verify_first_scan_wins(self):
+        other = Participant.objects.create(first_name='Dan', email='dan@example.com')
+        other.mark_used()
+        ticket = str(self.participant.ticket_uuid)
+        scans = [
+            {'ticket_uuid': ticket, 'scanned_at': '2025-10-01T10:05:00Z', 'gate_id': 'B'},
+            {'ticket_uuid': ticket, 'scanned_at': '2025-10-01T10:00:00Z', 'gate_id': 'A'},
+            {'ticket_uuid': str(other.ticket_uuid), 'gate_id': 'A'},
+            {'ticket_uuid': '00000000-0000-0000-0000-000000000000', 'gate_id': 'A'},
+            {'ticket_uuid': 'garbage', 'gate_id': 'A'},
+        ]
+        resp = self.client.post('/api/verify/batch/', {'scans': scans}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            [r['status'] for r in resp.data['results']],
+            ['duplicate', 'admitted', 'already_used', 'not_found', 'invalid'])
+        self.assertEqual(resp.data['admitted'], 1)
+
+        self.participant.refresh_from_db()
+        self.assertTrue(self.participant.used)
+        self.assertEqual(self.participant.used_at.isoformat(), '2025-10-01T10:00:00+00:00')
+
+
+class TicketSnapshotTest(AdminClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.a = Participant.objects.create(first_name='A', email='a@example.com')
+        self.b = Participant.objects.create(first_name='B', email='b@example.com')
+
+    def test_snapshot_and_delta(self):
+        resp = self.client.get('/api/tickets/snapshot/')
+        self.assertEqual(resp.status_code, 200)
+        snapshot = TicketSnapshot(resp.content)
+        self.assertEqual(len(snapshot), 2)
+        self.assertIn(self.a.ticket_uuid, snapshot)
+        self.assertNotIn('00000000-0000-0000-0000-000000000000', snapshot)
+
+        resp304 = self.client.get('/api/tickets/snapshot/', HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp304.status_code, 304)
+
+        self.a.mark_used()
+        c = Participant.objects.create(first_name='C', email='c@example.com')
+        delta = self.client.get(f'/api/tickets/delta/?since={snapshot.version}').data
+        self.assertIn(str(self.a.ticket_uuid), delta['used'])
+        self.assertIn(str(c.ticket_uuid), delta['valid'])
+
+        snapshot.apply_delta(delta)
+        self.assertNotIn(self.a.ticket_uuid, snapshot)
+        self.assertIn(c.ticket_uuid, snapshot)
+        self.assertIn(self.b.ticket_uuid, snapshot)
+
+    def test_deletion_changes_version_and_appears_in_delta(self):
+        resp = self.client.get('/api/tickets/snapshot/')
+        snapshot = TicketSnapshot(resp.content)
+        self.b.delete()
+
+        resp2 = self.client.get('/api/tickets/snapshot/', HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp2.status_code, 200)
+        self.assertNotEqual(resp2['ETag'], resp['ETag'])
+        self.assertNotIn(self.b.ticket_uuid, TicketSnapshot(resp2.content))
+
+        delta = self.client.get(f'/api/tickets/delta/?since={snapshot.version}').data
+        self.assertEqual(delta['removed'], [str(self.b.ticket_uuid)])
+        self.assertEqual(delta['version'], int(resp2['X-Snapshot-Version']))
+        snapshot.apply_delta(delta)
+        self.assertNotIn(self.b.ticket_uuid, snapshot)
+        self.assertIn(self.a.ticket_uuid, snapshot)
+
+    def test_old_deletions_are_purged_and_old_versions_rejected(self):
+        self.b.delete()
+        old = timezone.now() - timedelta(days=8)
+        TicketDeletion.objects.update(deleted_at=old)
+        self.a.delete()
+
+        call_command('purge_ticket_deletions', stdout=StringIO())
+        self.assertEqual(list(TicketDeletion.objects.values_list('ticket_uuid', flat=True)),
+                         [self.a.ticket_uuid])
+
+        resp = self.client.get(f'/api/tickets/delta/?since={datetime_to_version(old)}')
+        self.assertEqual(resp.status_code, 410)
+        recent = datetime_to_version(timezone.now() - timedelta(days=1))
+        resp = self.client.get(f'/api/tickets/delta/?since={recent}')
+        self.assertEqual(resp.data['removed'], [str(self.a.ticket_uuid)])
+
+    def test_snapshot_requires_admin(self):
+        self.assertEqual(APIClient().get('/api/tickets/snapshot/').status_code, 403)
+
+
+class ParticipantImportTest(AdminClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        Participant.objects.create(first_name='Old', email='old@example.com')
+
+    def test_csv_import_reports_errors_per_row(self):
+        content = (
+            "Prénoms;Nom;email;country\n"
+            "Eve;Martin;info@a.org;BJ\n"
+            "Finn;;info@b.org;BJ\n"
+            "Gus;;not-an-email;BJ\n"
+            "Old;;old@example.com;BJ\n"
+            "Eve2;;info@a.org;BJ\n"
+        ).encode('utf-8')
+        upload = SimpleUploadedFile('delegation.csv', content, content_type='text/csv')
+        resp = self.client.post('/api/participants/import/', {'file': upload, 'chunk_size': 2})
+
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data['total'], 5)
+        self.assertEqual(resp.data['created'], 2)
+        self.assertEqual([e['row'] for e in resp.data['errors']], [4, 5, 6])
+
+        names = set(get_user_model().objects.filter(
+            email__in=['info@a.org', 'info@b.org']).values_list('username', flat=True))
+        self.assertEqual(names, {'info', 'info_1'})
+        self.assertEqual(Job.objects.filter(kind='render_qr').count(), 2)
+
+    def test_csv_import_accepts_excel_windows_encoding(self):
+        content = "Prénoms;email\nJosé;jose@example.com\n".encode('cp1252')
+        upload = SimpleUploadedFile('excel.csv', content, content_type='text/csv')
+        resp = self.client.post('/api/participants/import/', {'file': upload})
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(Participant.objects.get(email='jose@example.com').first_name, 'José')
+
+        # Ni UTF-8 ni cp1252 (0x81 non défini) : 400 avant tout enregistrement
+        content = b"first_name;email\nAda;ada@example.com\nBob\x81;bob@example.com\n"
+        upload = SimpleUploadedFile('bad.csv', content, content_type='text/csv')
+        resp = self.client.post('/api/participants/import/', {'file': upload, 'chunk_size': 1})
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(Participant.objects.filter(email='ada@example.com').exists())
+
+    def test_rejects_unknown_format(self):
+        upload = SimpleUploadedFile('list.pdf', b'%PDF', content_type='application/pdf')
+        resp = self.client.post('/api/participants/import/', {'file': upload})
+        self.assertEqual(resp.status_code, 400)
+
+
+class ParticipantExportTest(AdminClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.used = Participant.objects.create(first_name='U', email='u@example.com', country='BJ')
+        self.used.mark_used()
+        Participant.objects.create(first_name='N', email='n@example.com', country='TG')
+
+    def _content(self, resp):
+        return b''.join(resp.streaming_content).decode('utf-8')
+
+    def test_jsonl_export_with_filters(self):
+        resp = self.client.get('/api/participants/export/?output=jsonl&used=true')
+        self.assertEqual(resp.status_code, 200)
+        rows = [json.loads(line) for line in self._content(resp).splitlines()]
+        self.assertEqual([r['email'] for r in rows], ['u@example.com'])
+        self.assertTrue(rows[0]['used'])
+
+    def test_csv_export(self):
+        resp = self.client.get('/api/participants/export/?country=TG')
+        lines = self._content(resp).lstrip('\ufeff').splitlines()
+        self.assertTrue(lines[0].startswith('id,first_name'))
+        self.assertEqual(len(lines), 2)
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.admin_user)
+        expected = await sync_to_async(
+            lambda: self._content(self.client.get('/api/participants/export/?output=jsonl')))()
+        # Lots d'une ligne : plusieurs lectures entre deux envois
+        with mock.patch('apps.events.exports.CHUNK_SIZE', 1):
+            resp = await client.get('/api/participants/export/?output=jsonl')
+            self.assertTrue(resp.is_async)
+            content = b''.join([chunk async for chunk in resp.streaming_content]).decode('utf-8')
+        self.assertEqual(content, expected)
+        self.assertEqual(len(content.splitlines()), 2)
+
+    def test_invalid_filter(self):
+        resp = self.client.get('/api/participants/export/?created_after=yesterday')
+        self.assertEqual(resp.status_code, 400)
+
+
+class ParticipantSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        Participant.objects.create(first_name='Awa', last_name='Diallo', email='awa@gov.bj',
+                                   organization='Ministère', country='BJ', event_type='Forum')
+        Participant.objects.create(first_name='Koffi', last_name='Mensah', email='koffi@corp.tg',
+                                   organization='Corp', country='TG', event_type='Atelier')
+        Participant.objects.create(first_name='Zoe', last_name='Adjovi', email='zoe@corp.tg',
+                                   organization='Corp', country='TG', event_type='Forum',
+                                   used=True)
+
+    def _emails(self, query):
+        resp = self.client.get(f'/api/participants/?{query}')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        return [row['email'] for row in resp.data['results']]
+
+    def test_search_filters_and_ordering(self):
+        self.assertEqual(self._emails('search=CORP mensah'), ['koffi@corp.tg'])
+        self.assertEqual(self._emails('event_type=Forum&used=false'), ['awa@gov.bj'])
+        self.assertEqual(
+            self._emails('ordering=last_name'),
+            ['zoe@corp.tg', 'awa@gov.bj', 'koffi@corp.tg'])
+
+    def test_ordering_paginates_with_cursor(self):
+        resp = self.client.get('/api/participants/?ordering=-last_name&page_size=2')
+        second = self.client.get(resp.data['next'])
+        emails = [r['email'] for r in resp.data['results'] + second.data['results']]
+        self.assertEqual(emails, ['koffi@corp.tg', 'awa@gov.bj', 'zoe@corp.tg'])
+
+    def test_invalid_ordering(self):
+        resp = self.client.get('/api/participants/?ordering=password')
+        self.assertEqual(resp.status_code, 400)
+
+
+class SingletonCacheTest(TestCase):
+    def tearDown(self):
+        # Nouvelle version au prochain accès : pas de fuite entre tests
+        cache.clear()
+
+    def test_get_solo_is_served_from_cache_and_invalidated_on_save(self):
+        RegistrationSetting.get_solo()
+        with self.assertNumQueries(0):
+            self.assertTrue(RegistrationSetting.get_solo().is_open)
+
+        setting = RegistrationSetting.get_solo()
+        setting.is_open = False
+        with self.captureOnCommitCallbacks(execute=True):
+            setting.save()
+        self.assertFalse(RegistrationSetting.get_solo().is_open)
+
+        # Modification faite par un autre worker : visible dès le changement de version
+        RegistrationSetting.objects.filter(pk=1).update(is_open=True)
+        self.assertFalse(RegistrationSetting.get_solo().is_open)
+        cache.set('events:singleton-version:events.registrationsetting', 'other-worker')
+        self.assertTrue(RegistrationSetting.get_solo().is_open)
+
+
+class TicketQRCodeTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.participant = Participant.objects.create(first_name='Q', email='q@example.com')
+
+    def test_qr_endpoint_caching_headers(self):
+        url = f'/api/tickets/{self.participant.ticket_uuid}/qr.png'
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'image/png')
+        self.assertTrue(resp.content.startswith(b'\x89PNG'))
+        self.assertIn('max-age', resp['Cache-Control'])
+
+        # Cache chaud : pas de rendu, seulement la vérification du ticket
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).content, resp.content)
+        with self.assertNumQueries(1):
+            resp304 = self.client.get(url, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp304.status_code, 304)
+
+    def test_deleted_ticket_is_not_served_from_cache(self):
+        url = f'/api/tickets/{self.participant.ticket_uuid}/qr.png'
+        etag = self.client.get(url)['ETag']
+        digest = qr_digest(build_ticket_payload(self.participant.ticket_uuid))
+        self.assertIsNotNone(get_cached_qr_png(digest))
+
+        self.participant.delete()
+        self.assertIsNone(get_cached_qr_png(digest))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+    def test_unknown_ticket(self):
+        resp = self.client.get('/api/tickets/00000000-0000-0000-0000-000000000000/qr.png')
+        self.assertEqual(resp.status_code, 404)
+
+    def test_serializer_returns_endpoint_url(self):
+        data = ParticipantSerializer(self.participant).data
+        self.assertEqual(data['qr_url'], f'/api/tickets/{self.participant.ticket_uuid}/qr.png')
+
+
+class MailerTest(TestCase):
+    class FlakyConnection:
+        """Connexion SMTP factice qui tombe après le premier message."""
+        opened = 0
+
+        def __init__(self, sent):
+            self.sent = sent
+
+        def open(self):
+            type(self).opened += 1
+
+        def close(self):
+            pass
+
+        def send_messages(self, messages):
+            if len(self.sent) == 1 and not getattr(self, 'failed', False):
+                self.failed = True
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            self.sent.extend(messages)
+            return len(messages)
+
+    def test_send_many_reuses_connection_and_reconnects(self):
+        sent = []
+        flaky = self.FlakyConnection(sent)
+        self.FlakyConnection.opened = 0
+        mailer = Mailer(connection_factory=lambda: flaky, rate=0)
+        messages = [EmailMessage('s', 'b', 'from@example.com', [f'u{i}@example.com']) for i in range(5)]
+
+        results = mailer.send_many(messages)
+        self.assertEqual([error for _, error in results], [None] * 5)
+        self.assertEqual(sent, messages)
+        # Une ouverture initiale + une reconnexion, pas une par message
+        self.assertEqual(self.FlakyConnection.opened, 2)
+
+    def test_token_bucket_waits_for_tokens(self):
+        now = [0.0]
+        waits = []
+
+        def sleep(seconds):
+            waits.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(rate=10, capacity=2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(4):
+            bucket.acquire()
+        # 2 jetons en réserve, puis un message toutes les 100 ms
+        self.assertEqual(len(waits), 2)
+        self.assertAlmostEqual(now[0], 0.2)
+
+    def test_invitation_email_goes_through_mailer(self):
+        participants = [
+            Participant.objects.create(first_name=f'M{i}', email=f'm{i}@example.com')
+            for i in range(3)
+        ]
+        mail.outbox = []
+        results = send_participant_invitation_emails(participants)
+        self.assertEqual([error for _, error in results], [None] * 3)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox),
+                         ['m0@example.com', 'm1@example.com', 'm2@example.com'])
+
+
+class CampaignTest(AdminClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            Participant.objects.create(first_name=f'A{i}', email=f'a{i}@example.com', event_type='Gala')
+        Participant.objects.create(first_name='B', email='b@example.com', event_type='Forum')
+        Participant.objects.filter(email='a4@example.com').update(used=True)
+        mail.outbox = []
+
+    def test_campaign_sends_to_selection_in_chunks(self):
+        with override_settings(CAMPAIGN_CHUNK_SIZE=2):
+            resp = self.client.post('/api/campaigns/', {
+                'template': 'update', 'filters': {'event_type': 'Gala', 'used': False},
+            }, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['total'], 4)
+        self.assertEqual(Job.objects.filter(kind='campaign_chunk').count(), 2)
+
+        jobs.run_pending()
+        resp = self.client.get(f"/api/campaigns/{resp.data['id']}/")
+        self.assertEqual(resp.data['status'], 'done')
+        self.assertEqual((resp.data['sent'], resp.data['failed'], resp.data['remaining']), (4, 0, 0))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox),
+                         ['a0@example.com', 'a1@example.com', 'a2@example.com', 'a3@example.com'])
+        self.assertTrue(all('Mise à jour' in m.subject for m in mail.outbox))
+
+    def test_recipients_are_frozen_at_start(self):
+        campaign = start_campaign({'event_type': 'Gala', 'used': False})
+        # Modifiés après le lancement : la sélection n'est pas réévaluée
+        Participant.objects.filter(email='a0@example.com').update(event_type='Forum')
+        Participant.objects.filter(email='a1@example.com').delete()
+        Participant.objects.create(first_name='C', email='c@example.com', event_type='Gala')
+
+        jobs.run_pending()
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, Campaign.STATUS_DONE)
+        self.assertEqual((campaign.total, campaign.sent, campaign.failed, campaign.skipped), (4, 3, 0, 1))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox),
+                         ['a0@example.com', 'a2@example.com', 'a3@example.com'])
+        resp = self.client.get(f'/api/campaigns/{campaign.pk}/')
+        self.assertEqual((resp.data['skipped'], resp.data['remaining']), (1, 0))
+
+    def test_interrupted_chunk_resumes_after_last_sent_batch(self):
+        real = get_mailer()
+        calls = []
+
+        def send_many(messages):
+            calls.append(1)
+            if len(calls) > 1:
+                raise RuntimeError('worker killed')
+            return real.send_many(messages)
+
+        with override_settings(EMAIL_BATCH_SIZE=2):
+            campaign = start_campaign({'event_type': 'Gala'})
+            with mock.patch('apps.events.campaigns.get_mailer') as get:
+                get.return_value.send_many.side_effect = send_many
+                jobs.run_pending()
+            campaign.refresh_from_db()
+            self.assertEqual((campaign.status, campaign.sent), (Campaign.STATUS_RUNNING, 2))
+
+            Job.objects.filter(kind='campaign_chunk').update(run_at=timezone.now())
+            jobs.run_pending()
+
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.sent), (Campaign.STATUS_DONE, 5))
+        # Aucun destinataire n'a reçu l'email deux fois
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(len({m.to[0] for m in mail.outbox}), 5)
+
+    def test_failed_recipients_are_retried(self):
+        real = get_mailer()
+        refused = {'a1@example.com'}
+
+        def send_many(messages):
+            messages = list(messages)
+            if refused == {'*'}:
+                return [(m, smtplib.SMTPServerDisconnected('lost')) for m in messages]
+            real.send_many([m for m in messages if m.to[0] not in refused])
+            return [(m, ValueError('refused') if m.to[0] in refused else None) for m in messages]
+
+        campaign = start_campaign({'event_type': 'Gala', 'used': False})
+        with mock.patch('apps.events.campaigns.get_mailer') as get:
+            get.return_value.send_many.side_effect = send_many
+            jobs.run_pending()
+            campaign.refresh_from_db()
+            self.assertEqual((campaign.status, campaign.sent, campaign.failed), (Campaign.STATUS_DONE, 3, 1))
+
+            # Lot entier en échec : le job est rejoué sans avancer
+            refused = {'*'}
+            self.assertEqual(resume_campaign(campaign), 1)
+            campaign.refresh_from_db()
+            self.assertEqual((campaign.status, campaign.failed), (Campaign.STATUS_RUNNING, 0))
+            jobs.run_pending()
+            retry = Job.objects.filter(kind='campaign_chunk').latest('id')
+            self.assertEqual((retry.status, retry.payload.get('done_id')), (Job.STATUS_PENDING, None))
+
+            refused = set()
+            Job.objects.filter(pk=retry.pk).update(run_at=timezone.now())
+            jobs.run_pending()
+
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.sent, campaign.failed), (Campaign.STATUS_DONE, 4, 0))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox),
+                         ['a0@example.com', 'a1@example.com', 'a2@example.com', 'a3@example.com'])
+
+    def test_unknown_filter_is_rejected(self):
+        resp = self.client.post('/api/campaigns/', {'filters': {'vip': 'true'}}, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+
+class EmailRenderingTest(TestCase):
+    def test_event_context_is_cached_until_settings_change(self):
+        event_settings = EventSettings.get_solo()
+        event_settings.event_name = 'Gala 2025'
+        event_settings.venue = 'Cotonou'
+        event_settings.save()
+
+        context = get_event_context()
+        self.assertIs(get_event_context(), context)
+        self.assertIs(context.fragments(), context.fragments())
+
+        participant = Participant.objects.create(first_name='Ana', email='ana@example.com')
+        # Les deux templates existent : pas de repli sur le texte de secours
+        with self.assertNoLogs('apps.events.email_utils', level='ERROR'):
+            email = build_participant_email(participant)
+        self.assertIn('Gala 2025', email.body)
+        self.assertIn('Bonjour Ana', email.body)
+        self.assertIn('Cotonou', email.alternatives[0][0])
+
+        event_settings = EventSettings.get_solo()
+        event_settings.venue = 'Porto-Novo'
+        event_settings.save()
+        self.assertIsNot(get_event_context(), context)
+        self.assertIn('Porto-Novo', build_participant_email(participant).body)
+
+    def test_qr_is_an_inline_cid_image(self):
+        participant = Participant.objects.create(first_name='Cid', email='cid@example.com')
+        payload = build_qr_payload(participant)
+        qr_bytes = render_qr_png(payload, 'email')
+        self.assertLess(len(qr_bytes), len(render_qr_png(payload)))
+
+        message = build_participant_email(participant, qr_bytes).message()
+        self.assertEqual(message.get_content_type(), 'multipart/related')
+        image = [part for part in message.walk() if part.get_content_type() == 'image/png'][0]
+        cid = image['Content-ID'].strip('<>')
+        self.assertEqual(image.get_payload(decode=True), qr_bytes)
+        html = [part for part in message.walk() if part.get_content_type() == 'text/html'][0]
+        html = html.get_payload(decode=True).decode()
+        self.assertIn(f'cid:{cid}', html)
+        self.assertNotIn('data:image/png;base64', html)
+
+
+class UsernameAllocationTest(TestCase):
+    def setUp(self):
+        self.User = get_user_model()
+
+    def test_thousands_of_colliding_emails(self):
+        rows = [(i + 2, {'first_name': f'C{i}', 'email': f'contact@org{i}.example.com'})
+                for i in range(2000)]
+        report = import_participants(rows, send_invitations=False)
+        self.assertEqual(report['created'], 2000)
+        names = set(self.User.objects.values_list('username', flat=True))
+        self.assertEqual(len(names), 2000)
+        self.assertIn('contact_1999', names)
+
+        # Inscription suivante : nombre de requêtes constant malgré 2000 collisions
+        with self.assertNumQueries(1):
+            self.assertEqual(allocate_username('contact'), 'contact_2000')
+        # Même préfixe, hors de la série : ignorés
+        self.User.objects.create(username='contact_99999x')
+        self.User.objects.create(username='contactus_5000')
+        self.assertEqual(allocate_username('contact'), 'contact_2000')
+
+        resp = APIClient().post('/api/participants/', {
+            'first_name': 'Late', 'email': 'contact@late.example.com'}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(self.User.objects.get(email='contact@late.example.com').username, 'contact_2000')
+
+    def test_concurrent_allocation_retries_on_integrity_error(self):
+        self.User.objects.create_user(username='info', email='first@example.com')
+        participant = Participant.objects.create(first_name='I', email='info@example.com')
+        # Une autre inscription a pris `info_1` entre le calcul et l'INSERT
+        self.User.objects.create_user(username='info_1', email='racer@example.com')
+        real = usernames.allocate_username
+        with mock.patch.object(usernames, 'allocate_username', side_effect=['info_1', real('info')]):
+            user = usernames.create_participant_user(participant)
+        self.assertEqual(user.username, 'info_2')
+        self.assertFalse(user.is_active)
+
+
+class BenchmarkTest(TestCase):
+    def test_benchmark_reports_percentiles_and_queries(self):
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile([1, 2, 3, 4], 99), 4)
+
+        results = run_benchmark(seed=20, requests=5, concurrency=[1])
+        self.assertEqual([r['scenario'] for r in results],
+                         ['create', 'list', 'retrieve', 'verify', 'toggle'])
+        for row in results:
+            self.assertEqual((row['requests'], row['errors']), (5, 0))
+            self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+            self.assertGreater(row['queries_per_request'], 0)
+
+
+class MetricsTest(AdminClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def test_metrics_endpoint_reports_routes_queries_and_qr(self):
+        participant = Participant.objects.create(first_name='M', email='metrics@example.com')
+        client = APIClient()
+        client.post('/api/verify/', {'ticket_uuid': str(participant.ticket_uuid)}, format='json')
+        client.get(f'/api/tickets/{participant.ticket_uuid}/qr.png')
+
+        self.assertEqual(client.get('/api/metrics/').status_code, 403)
+        resp = self.client.get('/api/metrics/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp['Content-Type'].startswith('text/plain'))
+        body = resp.content.decode()
+        self.assertIn('http_requests_total{method="POST",route="api/verify/",status="200"} 1', body)
+        self.assertIn('db_queries_total{route="api/verify/"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{method="POST",route="api/verify/",le="+Inf"} 1', body)
+        self.assertIn('qr_render_seconds_count', body)
+        self.assertIn('route="api/tickets/<uuid:ticket_uuid>/qr.png"', body)
+
+        with override_settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(APIClient().get(
+                '/api/metrics/', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+            self.assertEqual(APIClient().get(
+                '/api/metrics/', HTTP_AUTHORIZATION='Bearer nope').status_code, 403)
+
+
+class HealthCheckTest(TestCase):
+    def test_liveness_answers_before_host_and_session_middleware(self):
+        resp = self.client.get('/health/', HTTP_HOST='10.0.0.7:8000')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), {'status': 'ok'})
+        self.assertNotIn('sessionid', resp.cookies)
+
+    def test_readiness_reports_dependencies(self):
+        resp = self.client.get('/ready/')
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        self.assertEqual(body['status'], 'ok')
+        self.assertEqual(body['checks']['database']['status'], 'ok')
+        self.assertEqual(body['checks']['smtp']['status'], 'skipped')  # backend locmem
+
+        # File de jobs saturée : signalée mais le worker reste routable
+        jobs.enqueue('test_noop')
+        with override_settings(READINESS_MAX_JOB_BACKLOG=0):
+            resp = self.client.get('/ready/')
+        self.assertEqual((resp.status_code, resp.json()['status']), (200, 'degraded'))
+
+        # Dépendance critique KO : 503
+        with mock.patch('apps.events.health.os.access', return_value=False):
+            resp = self.client.get('/ready/')
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.json()['checks']['media']['status'], 'error')
+
+
+class AttendanceCountersTest(AdminClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = Participant.objects.create(
+            first_name='Alice', email='alice@example.com', event_type='Gala', country='BJ')
+        self.bob = Participant.objects.create(
+            first_name='Bob', email='bob@example.com', event_type='Gala', country='TG')
+
+    def counters(self):
+        return get_counters()
+
+    def test_counters_follow_create_check_in_update_and_delete(self):
+        self.assertEqual(self.counters()['event_type'], {'Gala': {'total': 2, 'used': 0}})
+
+        self.client.post('/api/verify/', {'ticket_uuid': str(self.alice.ticket_uuid),
+                                          'mark_used': True}, format='json')
+        check_in_batch([{'ticket_uuid': str(self.bob.ticket_uuid)}])
+        counters = self.counters()
+        self.assertEqual((counters['total'], counters['used']), (2, 2))
+        self.assertEqual(counters['country'], {'BJ': {'total': 1, 'used': 1},
+                                               'TG': {'total': 1, 'used': 1}})
+
+        # Changement de pays : le compteur suit le participant
+        self.bob.refresh_from_db()
+        self.bob.country = 'NE'
+        self.bob.save()
+        self.alice.delete()
+        counters = self.counters()
+        self.assertEqual((counters['total'], counters['used']), (1, 1))
+        self.assertEqual(counters['country'], {'NE': {'total': 1, 'used': 1}})
+
+        # Le recalcul complet retrouve les mêmes valeurs
+        rebuild()
+        self.assertEqual(self.counters(), counters)
+
+    def test_stats_endpoint_reads_counters_in_one_query(self):
+        Participant.objects.filter(pk=self.bob.pk).update(organization='ACME')
+        rebuild()
+        self.alice.mark_used()
+        check_in = datetime(2025, 10, 1, 9, 45, tzinfo=dt_timezone.utc)
+        check_in_batch([{'ticket_uuid': str(self.bob.ticket_uuid), 'scanned_at': check_in.isoformat()}])
+
+        self.assertEqual(APIClient().get('/api/stats/').status_code, 403)
+        with self.assertNumQueries(1):
+            resp = self.client.get('/api/stats/')
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual((data['total'], data['used'], data['remaining']), (2, 2, 0))
+        self.assertEqual(data['organization'], {'': {'total': 1, 'used': 1},
+                                                'ACME': {'total': 1, 'used': 1}})
+        self.assertEqual(data['arrivals_by_hour']['2025-10-01T09:00:00Z'], 1)
+        self.assertEqual(sum(data['arrivals_by_hour'].values()), 2)
+
+        # Suppression : l'heure d'arrivée est décomptée elle aussi
+        Participant.objects.get(pk=self.bob.pk).delete()
+        data = self.client.get('/api/stats/').json()
+        self.assertNotIn('2025-10-01T09:00:00Z', data['arrivals_by_hour'])
+        self.assertEqual((data['total'], data['used'], data['remaining']), (1, 1, 0))
+
+        # Le recalcul complet retrouve les mêmes valeurs
+        rebuild()
+        self.assertEqual(self.client.get('/api/stats/').json(), data)
+
+    def test_broadcaster_pushes_check_ins_and_counters(self):
+        received = []
+        broadcaster = CheckInBroadcaster()
+        broadcaster._subscribers.add(lambda event, data: received.append((event, data)))
+        broadcaster.poll()
+        self.assertEqual([e for e, _ in received], ['counters'])
+
+        received.clear()
+        self.alice.mark_used()
+        with self.assertNumQueries(2):
+            broadcaster.poll()
+        self.assertEqual([e for e, _ in received], ['checkin', 'counters'])
+        self.assertEqual(received[0][1]['first_name'], 'Alice')
+        self.assertEqual(received[1][1]['used'], 1)
+
+        # Rien de nouveau : rien n'est diffusé
+        received.clear()
+        broadcaster.poll()
+        self.assertEqual(received, [])
+
+    def test_broadcaster_pages_through_large_check_in_batch(self):
+        received = []
+        broadcaster = CheckInBroadcaster()
+        broadcaster._subscribers.add(lambda event, data: received.append((event, data)))
+        broadcaster.poll()
+
+        # Même changed_at pour tout le lot, plus long que POLL_LIMIT
+        others = [Participant.objects.create(first_name=f'P{i}', email=f'p{i}@example.com')
+                  for i in range(5)]
+        tickets = [self.alice, self.bob, *others]
+        received.clear()
+        with mock.patch('apps.events.live.POLL_LIMIT', 3):
+            check_in_batch([{'ticket_uuid': str(p.ticket_uuid)} for p in tickets])
+            broadcaster.poll()
+            checked_in = [data['id'] for event, data in received if event == 'checkin']
+            self.assertEqual(sorted(checked_in), sorted(p.pk for p in tickets))
+
+            received.clear()
+            broadcaster.poll()
+            self.assertEqual(received, [])
+
+    def test_stream_endpoint_is_admin_only_and_refused_under_wsgi(self):
+        self.assertEqual(APIClient().get('/api/checkins/stream/').status_code, 403)
+
+        # Sous WSGI, un tableau de bord retiendrait un worker : 503
+        self.client.force_login(self.admin_user)
+        resp = self.client.get('/api/checkins/stream/')
+        self.assertEqual(resp.status_code, 503)
+        self.assertIn('ASGI', resp.json()['detail'])
+
+    async def test_stream_endpoint_under_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.admin_user)
+        with mock.patch.object(CheckInBroadcaster, 'start'):
+            resp = await client.get('/api/checkins/stream/')
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp['Content-Type'], 'text/event-stream')
+            stream = aiter(resp.streaming_content)
+            self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+            first = (await anext(stream)).decode()
+            await stream.aclose()
+        self.assertTrue(first.startswith('event: counters\ndata: '))
+        self.assertIn('"total":2', first)
+
+
+class TicketCodesTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.participant = Participant.objects.create(first_name='Eve', email='eve@example.com')
+
+    def test_signed_code_round_trip_and_rotation(self):
+        ticket = self.participant.ticket_uuid
+        code = build_qr_payload(self.participant)
+        self.assertRegex(code, r'^T1[A-Z0-9]\.[A-Z2-7]{42}$')
+        self.assertEqual(decode_ticket(code), ticket)
+        self.assertEqual(decode_ticket(code.lower()), ticket)
+
+        with override_settings(QR_SIGNING_KEYS='A:old-secret'):
+            old_code = encode_ticket(ticket)
+        # Nouvelle clé courante : les QR signés avec l'ancienne restent valides
+        with override_settings(QR_SIGNING_KEYS='B:new-secret,A:old-secret'):
+            self.assertTrue(encode_ticket(ticket).startswith('T1B.'))
+            self.assertEqual(decode_ticket(old_code), ticket)
+        with override_settings(QR_SIGNING_KEYS='B:new-secret'):
+            with self.assertRaises(InvalidTicketCode):
+                decode_ticket(old_code)
+
+        # Un UUID valide avec une signature d'un autre ticket
+        forged = encode_ticket(ticket)[:4] + encode_ticket(Participant().ticket_uuid)[4:30] + code[30:]
+        for bad in (forged, 'T1Z.AAAA', 'T1', 'garbage'):
+            with self.assertRaises(InvalidTicketCode):
+                decode_ticket(bad)
+
+    def test_verify_rejects_bad_signature_without_database(self):
+        code = build_qr_payload(self.participant)
+        # Caractère du MAC (le dernier ne porte que 3 bits, dont du remplissage)
+        tampered = code[:-5] + ('A' if code[-5] != 'A' else 'B') + code[-4:]
+        with self.assertNumQueries(0):
+            resp = self.client.post('/api/verify/', {'ticket_uuid': tampered}, format='json')
+        self.assertEqual(resp.status_code, 404)
+
+        resp = self.client.post('/api/verify/', {'ticket_uuid': code, 'mark_used': True}, format='json')
+        self.assertTrue(resp.data['valid'])
+
+        # Anciens QR acceptés pendant la migration, puis refusés
+        legacy = {'ticket_uuid': f'ticket:{self.participant.ticket_uuid}'}
+        self.assertTrue(self.client.post('/api/verify/', legacy, format='json').data['already_used'])
+        with override_settings(QR_ACCEPT_LEGACY_PAYLOADS=False):
+            self.assertEqual(self.client.post('/api/verify/', legacy, format='json').status_code, 404)
+
+    def test_batch_verify_accepts_signed_codes(self):
+        scans = [{'ticket': build_qr_payload(self.participant)}, {'ticket': 'T1Z.AAAA'}]
+        resp = self.client.post('/api/verify/batch/', {'scans': scans}, format='json')
+        self.assertEqual([r['status'] for r in resp.data['results']], ['admitted', 'invalid'])
+
+
+class AsyncViewsTest(AdminClientMixin, TestCase):
+    """Endpoints du mode ASGI (project/urls_asgi.py) : mêmes réponses que les vues DRF."""
+
+    def setUp(self):
+        super().setUp()
+        self.alice = Participant.objects.create(
+            first_name='Alice', email='alice@example.com', event_type='Gala', country='BJ')
+        self.bob = Participant.objects.create(
+            first_name='Bob', email='bob@example.com', event_type='Gala', country='TG')
+
+    def asgi_urls(self):
+        return override_settings(ROOT_URLCONF='project.urls_asgi')
+
+    async def test_verify_matches_sync_view(self):
+        client = AsyncClient()
+        code = await sync_to_async(build_qr_payload)(self.alice)
+        with self.asgi_urls():
+            resp = await client.post('/api/verify/', {'ticket_uuid': code}, content_type='application/json')
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.json()['participant']['first_name'], 'Alice')
+
+            payload = {'ticket_uuid': code, 'mark_used': True}
+            resp = await client.post('/api/verify/', payload, content_type='application/json')
+            self.assertTrue(resp.json()['valid'])
+            resp = await client.post('/api/verify/', payload, content_type='application/json')
+            self.assertEqual(resp.json()['already_used'], True)
+
+            legacy = {'ticket_uuid': f'ticket:{self.bob.ticket_uuid}'}
+            resp = await client.post('/api/verify/', legacy, content_type='application/json')
+            self.assertTrue(resp.json()['valid'])
+
+            resp = await client.post('/api/verify/', {'ticket_uuid': 'T1Z.AAAA'},
+                                     content_type='application/json')
+            self.assertEqual(resp.status_code, 404)
+            resp = await client.post('/api/verify/', {}, content_type='application/json')
+            self.assertEqual(resp.status_code, 400)
+        await self.alice.arefresh_from_db()
+        self.assertTrue(self.alice.used)
+
+    async def test_participant_list_pagination_and_filters(self):
+        client = AsyncClient()
+        sync_client = APIClient()
+        url = '/api/participants/?page_size=1&fields=id,first_name'
+        with self.asgi_urls():
+            resp = await client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            first = resp.json()
+            self.assertEqual(first['results'], [{'id': self.bob.id, 'first_name': 'Bob'}])
+            self.assertIsNotNone(first['next'])
+
+            resp = await client.get(first['next'])
+            self.assertEqual(resp.json()['results'], [{'id': self.alice.id, 'first_name': 'Alice'}])
+            self.assertIsNone(resp.json()['next'])
+
+            resp = await client.get('/api/participants/?country=BJ&fields=first_name')
+            self.assertEqual(resp.json()['results'], [{'first_name': 'Alice'}])
+            self.assertEqual((await client.get('/api/participants/?cursor=bad')).status_code, 404)
+        sync_first = await sync_to_async(sync_client.get)(url)
+        self.assertEqual(sync_first.json(), first)
+
+    async def test_detail_and_settings_are_admin_only(self):
+        client = AsyncClient()
+        with self.asgi_urls():
+            for url in (f'/api/participants/{self.alice.id}/', '/api/event-settings/',
+                        '/api/toggle-registration/'):
+                self.assertEqual((await client.get(url)).status_code, 403)
+
+            await client.aforce_login(self.admin_user)
+            resp = await client.get(f'/api/participants/{self.alice.id}/')
+            self.assertEqual(resp.json()['first_name'], 'Alice')
+            self.assertIn('qr_url', resp.json())
+            self.assertEqual((await client.get('/api/participants/999999/')).status_code, 404)
+            self.assertEqual((await client.get('/api/event-settings/')).status_code, 200)
+            resp = await client.get('/api/toggle-registration/')
+            self.assertIn('is_open', resp.json())
+
+    async def test_writes_are_delegated_to_drf_views(self):
+        client = AsyncClient()
+        with self.asgi_urls():
+            resp = await client.post('/api/participants/', {
+                'first_name': 'Carol', 'last_name': 'C', 'email': 'carol@example.com',
+            }, content_type='application/json')
+            self.assertEqual(resp.status_code, 201)
+            self.assertEqual(await Participant.objects.filter(email='carol@example.com').acount(), 1)
+
+            # Utilisateur connecté : le jeton CSRF est exigé, comme avec DRF
+            csrf_client = AsyncClient(enforce_csrf_checks=True)
+            await csrf_client.aforce_login(self.admin_user)
+            resp = await csrf_client.post('/api/verify/', {'ticket_uuid': str(self.bob.ticket_uuid)},
+                                          content_type='application/json')
+            self.assertEqual(resp.status_code, 403)
+            self.assertIn('CSRF', resp.json()['detail'])
+
+
+class IdempotencyKeyTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.participant = Participant.objects.create(first_name='Eve', email='eve@example.com')
+        self.payload = {'first_name': 'Carol', 'last_name': 'C', 'email': 'carol@example.com'}
+
+    def post(self, url, data, key):
+        return self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_registration_retry_replays_first_response(self):
+        first = self.post('/api/participants/', self.payload, 'k-1')
+        self.assertEqual(first.status_code, 201)
+        # Le renvoi ne touche pas aux participants (ni validation, ni QR, ni email)
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.post('/api/participants/', self.payload, 'k-1')
+        self.assertFalse([q for q in queries if 'events_participant' in q['sql']])
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json()['ticket_uuid'], first.json()['ticket_uuid'])
+        self.assertEqual(Participant.objects.filter(email='carol@example.com').count(), 1)
+
+        # Même clé, autre contenu : erreur du client
+        other = dict(self.payload, email='other@example.com')
+        self.assertEqual(self.post('/api/participants/', other, 'k-1').status_code, 422)
+        # Sans clé : comportement inchangé (email déjà utilisé)
+        self.assertEqual(self.client.post('/api/participants/', self.payload, format='json').status_code, 400)
+        self.assertEqual(self.post('/api/participants/', self.payload, ' ').status_code, 400)
+
+    def test_check_in_retry_is_not_already_used(self):
+        data = {'ticket_uuid': str(self.participant.ticket_uuid), 'mark_used': True}
+        self.assertTrue(self.post('/api/verify/', data, 'scan-1').json()['valid'])
+        retry = self.post('/api/verify/', data, 'scan-1')
+        self.assertTrue(retry.json()['valid'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        # Nouveau scan (nouvelle clé) : déjà utilisé
+        self.assertTrue(self.post('/api/verify/', data, 'scan-2').json()['already_used'])
+
+    def test_rejected_scans_do_not_claim_or_store_keys(self):
+        # Code forgé : refusé avant toute écriture
+        with self.assertNumQueries(0):
+            resp = self.post('/api/verify/', {'ticket_uuid': 'garbage', 'mark_used': True}, 'scan-1')
+        self.assertEqual(resp.status_code, 404)
+
+        # Ticket supprimé : 404, non mémorisé
+        code = encode_ticket(self.participant.ticket_uuid)
+        self.participant.delete()
+        resp = self.post('/api/verify/', {'ticket_uuid': code, 'mark_used': True}, 'scan-2')
+        self.assertEqual(resp.status_code, 404)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_concurrent_duplicate_waits_for_first_request(self):
+        data = {'ticket_uuid': str(self.participant.ticket_uuid), 'mark_used': True}
+        fp = idempotency.fingerprint('POST', '/api/verify/', self.client.get('/').wsgi_request.user, data)
+        outcome, record = idempotency.claim('verify-ticket', 'scan-1', fp)
+        self.assertEqual(outcome, idempotency.CLAIMED)
+
+        # La première requête se termine pendant que le doublon attend
+        def finish(seconds):
+            idempotency.complete(record, 200, {'valid': True, 'participant': {'first_name': 'Eve'}})
+        with mock.patch('apps.events.idempotency.time.sleep', side_effect=finish) as sleep:
+            resp = self.post('/api/verify/', data, 'scan-1')
+        sleep.assert_called_once()
+        self.assertEqual(resp.json()['participant'], {'first_name': 'Eve'})
+        self.participant.refresh_from_db()
+        self.assertFalse(self.participant.used)
+
+        # Toujours en cours au-delà du délai d'attente : 409
+        idempotency.claim('verify-ticket', 'scan-2', fp)
+        with override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0):
+            resp = self.post('/api/verify/', data, 'scan-2')
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp['Retry-After'], '1')
+
+        # Réservation orpheline (process tué) : reprise après IDEMPOTENCY_LOCK_TIMEOUT
+        IdempotencyKey.objects.filter(key='scan-2').update(
+            created_at=timezone.now() - timedelta(minutes=5))
+        self.assertTrue(self.post('/api/verify/', data, 'scan-2').json()['valid'])
+
+    def test_failures_release_the_key_and_expired_keys_are_purged(self):
+        with mock.patch.object(Participant, 'check_in', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                self.post('/api/verify/', {'ticket_uuid': str(self.participant.ticket_uuid),
+                                           'mark_used': True}, 'scan-1')
+        self.assertFalse(IdempotencyKey.objects.filter(key='scan-1').exists())
+
+        self.post('/api/verify/', {'ticket_uuid': str(self.participant.ticket_uuid)}, 'scan-2')
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        self.assertEqual(IdempotencyKey.objects.count(), 0)
+
+    async def test_async_verify_shares_keys_with_drf_view(self):
+        data = {'ticket_uuid': str(self.participant.ticket_uuid), 'mark_used': True}
+        first = await sync_to_async(self.post)('/api/verify/', data, 'scan-1')
+        client = AsyncClient()
+        with override_settings(ROOT_URLCONF='project.urls_asgi'):
+            retry = await client.post('/api/verify/', data, content_type='application/json',
+                                      headers={'Idempotency-Key': 'scan-1'})
+            self.assertEqual(retry['Idempotent-Replayed'], 'true')
+            self.assertEqual(retry.json(), first.json())
+            fresh = await client.post('/api/verify/', data, content_type='application/json',
+                                      headers={'Idempotency-Key': 'scan-2'})
+            self.assertTrue(fresh.json()['already_used'])
+
+
+class ThrottlingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.participant = Participant.objects.create(first_name='Eve', email='eve@example.com')
+
+    def rates(self, **rates):
+        return override_settings(REST_FRAMEWORK=dict(
+            settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES=rates))
+
+    def test_token_bucket_refills_over_time(self):
+        rate = parse_rate('3/min')
+        self.assertEqual(rate, (3, 60.0))
+        with mock.patch('apps.events.throttling.time.time', return_value=1000.0) as now:
+            self.assertEqual([take('k', rate) for _ in range(3)], [0, 0, 0])
+            self.assertAlmostEqual(take('k', rate), 20.0)
+            # Un jeton toutes les 20 secondes
+            now.return_value = 1020.0
+            self.assertEqual(take('k', rate), 0)
+            self.assertGreater(take('k', rate), 0)
+
+    def test_activation_is_limited_per_session_and_per_ip(self):
+        data = {'email': 'nobody@example.com', 'password': 'pw'}
+        with self.rates(**{'activate:ip': '5/min', 'activate:session': '2/min'}):
+            self.client.cookies['csrftoken'] = 'k' * 32
+            codes = [self.client.post('/api/activate-user/', data, format='json').status_code
+                     for _ in range(3)]
+            self.assertEqual(codes, [404, 404, 429])
+            resp = self.client.post('/api/activate-user/', data, format='json')
+            self.assertEqual(int(resp['Retry-After']), 30)
+
+            # Autre navigateur, même IP : seau de session neuf, seau IP presque vide
+            other = APIClient()
+            other.cookies['csrftoken'] = 'j' * 32
+            self.assertEqual(other.post('/api/activate-user/', data, format='json').status_code, 404)
+            self.assertEqual(other.post('/api/activate-user/', data, format='json').status_code, 429)
+            # Autre IP, sans cookie : seulement le seau IP
+            resp = APIClient().post('/api/activate-user/', data, format='json', REMOTE_ADDR='10.0.0.2')
+            self.assertEqual(resp.status_code, 404)
+            # Autre classe d'endpoint : non limitée
+            resp = self.client.post('/api/verify/', {'ticket_uuid': str(self.participant.ticket_uuid)},
+                                    format='json')
+            self.assertEqual(resp.status_code, 200)
+
+    async def test_async_views_share_the_buckets(self):
+        data = {'ticket_uuid': str(self.participant.ticket_uuid)}
+        client = AsyncClient()
+        with self.rates(**{'verify:ip': '2/min'}), override_settings(ROOT_URLCONF='project.urls_asgi'):
+            resp = await sync_to_async(self.client.post)('/api/verify/', data, format='json')
+            self.assertEqual(resp.status_code, 200)
+            resp = await client.post('/api/verify/', data, content_type='application/json')
+            self.assertEqual(resp.status_code, 200)
+            resp = await client.post('/api/verify/', data, content_type='application/json')
+            self.assertEqual(resp.status_code, 429)
+            self.assertEqual(resp['Retry-After'], '30')
+
+    def test_load_shedding_keeps_check_in(self):
+        def request(path):
+            req = HttpRequest()
+            req.path_info = path
+            return req
+
+        seen = []
+        with override_settings(LOAD_SHED_MAX_IN_FLIGHT=1, LOAD_SHED_RETRY_AFTER=3):
+            def view(req):
+                # Une requête est en cours : les suivantes non critiques sont délestées
+                if req.path_info == '/api/participants/':
+                    seen.append(middleware(request('/api/stats/')))
+                    seen.append(middleware(request('/api/verify/')))
+                return HttpResponse('ok')
+            middleware = LoadSheddingMiddleware(view)
+            self.assertEqual(middleware(request('/api/participants/')).status_code, 200)
+        self.assertEqual([r.status_code for r in seen], [503, 200])
+        self.assertEqual(seen[0]['Retry-After'], '3')
+        self.assertEqual(middleware.in_flight, 0)
+
+
+class QRStorageTest(TestCase):
+    """Stockage objet simulé par InMemoryStorage (même API qu'un backend S3)."""
+
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+        'legacy': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+        'qr': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    }
+
+    def setUp(self):
+        override = override_settings(STORAGES=self.STORAGES)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.participants = [
+            Participant.objects.create(first_name=f'P{i}', email=f'p{i}@example.com') for i in range(5)]
+
+    def test_render_job_stores_into_sharded_directory(self):
+        name = qr_file_name('4b6f0f3e-2b7a-4f55-9f39-0d3c2a6f5e11')
+        self.assertRegex(name, r'^qr_codes/[0-9a-f]{2}/4b6f0f3e-2b7a-4f55-9f39-0d3c2a6f5e11\.png$')
+
+        participant = self.participants[0]
+        jobs.enqueue(KIND_RENDER_QR, participant)
+        jobs.run_pending()
+        participant.refresh_from_db()
+        self.assertEqual(participant.qr_code.name, qr_file_name(participant.ticket_uuid))
+        self.assertTrue(storages['qr'].exists(participant.qr_code.name))
+        self.assertFalse(storages['default'].exists(participant.qr_code.name))
+
+    def test_migrate_command_moves_files_and_rewrites_names(self):
+        legacy = storages['legacy']
+        for participant in self.participants[:4]:
+            old_name = legacy.save(f'qr_codes/{participant.ticket_uuid}.png', ContentFile(b'png'))
+            Participant.objects.filter(pk=participant.pk).update(qr_code=old_name)
+        # Fichier disparu : signalé, nom conservé
+        Participant.objects.filter(pk=self.participants[4].pk).update(qr_code='qr_codes/gone.png')
+
+        out = StringIO()
+        call_command('migrate_qr_storage', '--from', 'legacy', '--dry-run', stdout=out)
+        self.assertIn('5 à déplacer', out.getvalue())
+        self.assertTrue(legacy.exists(f'qr_codes/{self.participants[0].ticket_uuid}.png'))
+
+        call_command('migrate_qr_storage', '--from', 'legacy', '--batch-size', '2', stdout=out)
+        self.assertIn('4 déplacé(s), 0 déjà en place, 1 introuvable(s)', out.getvalue())
+        for participant in self.participants[:4]:
+            participant.refresh_from_db()
+            self.assertEqual(participant.qr_code.name, qr_file_name(participant.ticket_uuid))
+            self.assertEqual(storages['qr'].open(participant.qr_code.name).read(), b'png')
+            self.assertFalse(legacy.exists(f'qr_codes/{participant.ticket_uuid}.png'))
+        self.participants[4].refresh_from_db()
+        self.assertEqual(self.participants[4].qr_code.name, 'qr_codes/gone.png')
+
+        # Relance dans le même stockage : rien à faire
+        out = StringIO()
+        Participant.objects.filter(pk=self.participants[4].pk).update(qr_code='')
+        call_command('migrate_qr_storage', stdout=out)
+        self.assertIn('0 déplacé(s), 4 déjà en place', out.getvalue())
@@ -0,0 +1,223 @@
+# apps/events/throttling.py
+"""
+Limitation de débit par client (seau à jetons) et délestage sous charge.
+
+Throttles DRF (REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES']) :
+
+- `IPTokenBucketThrottle` : un seau par adresse IP (derrière Caddy, régler
+  NUM_PROXIES pour lire X-Forwarded-For) ;
+- `SessionTokenBucketThrottle` : un seau par utilisateur connecté, sinon par
+  session ou cookie CSRF du navigateur (un kiosque qui tourne en boucle est
+  limité même si tout le lieu partage une IP).
+
+Chaque vue déclare sa classe d'endpoint (`throttle_scope` : register, verify,
+activate, login, sinon default) ; les débits sont dans
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] sous `<classe>:ip` et
+`<classe>:session` ('60/min' : 60 requêtes d'affilée au plus, puis une par
+seconde). Sans débit configuré, pas de limite.
+
+Les seaux sont dans le cache Django (Redis partagé en production) : une
+seule valeur par seau, l'instant théorique où il sera de nouveau plein
+(algorithme GCRA). Lecture puis écriture sans verrou : sous forte
+concurrence quelques requêtes de plus peuvent passer, jamais moins.
+
+`LoadSheddingMiddleware` compte les requêtes en cours dans le process : au-delà
+de LOAD_SHED_MAX_IN_FLIGHT, les routes non critiques reçoivent tout de suite
+un 503 avec Retry-After ; les routes de validation des tickets
+(LOAD_SHED_CRITICAL_PATHS) passent toujours. Le compteur est propre au
+process : il n'a de sens qu'en ASGI ou avec des workers à threads (gthread) ;
+un worker gunicorn sync ne traite qu'une requête à la fois et ne déleste jamais.
+"""
+import logging
+import math
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+SCOPE_DEFAULT = 'default'
+SCOPE_REGISTER = 'register'
+SCOPE_VERIFY = 'verify'
+SCOPE_ACTIVATE = 'activate'
+SCOPE_LOGIN = 'login'
+
+KIND_IP = 'ip'
+KIND_SESSION = 'session'
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def parse_rate(rate):
+    """'60/min' -> (60, 60.0) : capacité du seau et période en secondes."""
+    if not rate:
+        return None
+    count, _, period = rate.partition('/')
+    return int(count), float(PERIODS[period.strip()[0]])
+
+
+def get_rate(scope, kind):
+    return parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}:{kind}'))
+
+
+def get_scope(view):
+    return getattr(view, 'throttle_scope', None) or SCOPE_DEFAULT
+
+
+def session_ident(request, user):
+    """Utilisateur connecté, sinon session ou cookie CSRF ; None si aucun."""
+    if user is not None and user.is_authenticated:
+        return f'user-{user.pk}'
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        return f'session-{session.session_key}'
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+    if csrf_cookie:
+        return f'csrf-{csrf_cookie}'
+    return None
+
+
+def bucket_key(scope, kind, ident):
+    return f'events:throttle:{scope}:{kind}:{ident}'
+
+
+def _take(tat, rate, now):
+    """
+    GCRA : `tat` est l'instant où le seau sera plein. Retourne (nouvel
+    instant, attente) ; attente 0 si la requête passe.
+    """
+    capacity, period = rate
+    interval = period / capacity
+    tat = max(tat or now, now)
+    excess = tat - now - (period - interval)
+    if excess > 0:
+        return None, excess
+    return tat + interval, 0
+
+
+def take(key, rate):
+    """Prend un jeton du seau `key` ; retourne l'attente (secondes), 0 si accepté."""
+    now = time.time()
+    tat, wait = _take(cache.get(key), rate, now)
+    if tat is not None:
+        cache.set(key, tat, math.ceil(tat - now) + 1)
+    return wait
+
+
+def _throttled(scope, kind):
+    metrics.inc('throttled_requests_total', scope=scope, kind=kind)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Seau à jetons par client et par classe d'endpoint (voir le module)."""
+    kind = None
+
+    def get_bucket_ident(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = get_scope(view)
+        rate = get_rate(scope, self.kind)
+        ident = self.get_bucket_ident(request) if rate else None
+        if ident is None:
+            return True
+        self.wait_seconds = take(bucket_key(scope, self.kind, ident), rate)
+        if self.wait_seconds:
+            _throttled(scope, self.kind)
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    kind = KIND_IP
+
+    def get_bucket_ident(self, request):
+        return self.get_ident(request)
+
+
+class SessionTokenBucketThrottle(TokenBucketThrottle):
+    kind = KIND_SESSION
+
+    def get_bucket_ident(self, request):
+        return session_ident(request, request.user)
+
+
+class LoadSheddingMiddleware:
+    """
+    503 immédiat (Retry-After) pour les routes non critiques quand le process
+    traite déjà LOAD_SHED_MAX_IN_FLIGHT requêtes ; WSGI (threads) et ASGI.
+    0 désactive le délestage.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.max_in_flight = _setting('LOAD_SHED_MAX_IN_FLIGHT', 0)
+        if not self.max_in_flight:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.critical_paths = tuple(_setting('LOAD_SHED_CRITICAL_PATHS', ()))
+        self.retry_after = str(_setting('LOAD_SHED_RETRY_AFTER', 2))
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        else:
+            logger.warning(
+                "LOAD_SHED_MAX_IN_FLIGHT=%s under WSGI: load shedding only triggers with "
+                "threaded workers (gunicorn --threads); sync workers serve one request at a time.",
+                self.max_in_flight)
+
+    def _enter(self, request):
+        """Compte la requête ; False si elle doit être délestée."""
+        critical = request.path_info.startswith(self.critical_paths)
+        with self._lock:
+            if not critical and self.in_flight >= self.max_in_flight:
+                return False
+            self.in_flight += 1
+        return True
+
+    def _leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _shed(self):
+        metrics.inc('load_shed_requests_total')
+        response = JsonResponse({'detail': 'Server overloaded, retry later.'}, status=503)
+        response['Retry-After'] = self.retry_after
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self._enter(request):
+            return self._shed()
+        try:
+            return self.get_response(request)
+        finally:
+            self._leave()
+
+    async def __acall__(self, request):
+        if not self._enter(request):
+            return self._shed()
+        try:
+            return await self.get_response(request)
+        finally:
+            self._leave()
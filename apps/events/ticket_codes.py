@@ -0,0 +1,126 @@
+# apps/events/ticket_codes.py
+"""
+Contenu signé des QR de tickets.
+
+Format (version 1) :
+    T1<kid>.<base32(uuid sur 16 octets + MAC tronqué à 10 octets)>
+    ex. T1A.3BQH2...  (46 caractères)
+
+- MAC : HMAC-SHA256 de `T1<kid>` + UUID, avec une clé dérivée du secret
+  `kid` de QR_SIGNING_KEYS, tronqué à 80 bits.
+- Les caractères (majuscules, chiffres, `.`) restent dans le mode
+  alphanumérique des QR : le code est plus dense qu'un `ticket:<uuid>`.
+- Rotation : le premier secret de QR_SIGNING_KEYS signe les nouveaux QR, les
+  suivants restent acceptés tant qu'ils sont listés.
+
+`decode_ticket()` vérifie la signature sans aucun accès à la base : un code
+forgé ou illisible est rejeté avant toute requête. Les anciens contenus
+(`ticket:<uuid>` ou UUID nu) sont acceptés tant que
+QR_ACCEPT_LEGACY_PAYLOADS est vrai.
+"""
+import base64
+import binascii
+import hmac
+import string
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+
+from . import metrics
+
+VERSION = 'T1'
+MAC_BYTES = 10
+LEGACY_PREFIX = 'ticket:'
+KEY_SALT = 'apps.events.ticket_codes'
+KEY_IDS = string.ascii_uppercase + string.digits
+
+
+class InvalidTicketCode(ValueError):
+    pass
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+@lru_cache(maxsize=8)
+def _parse_keys(raw, fallback):
+    """'A:secret1,B:secret2' -> [('A', 'secret1'), ('B', 'secret2')]."""
+    keys = []
+    for item in (raw or '').split(','):
+        kid, sep, secret = item.strip().partition(':')
+        if not sep or not secret:
+            continue
+        if len(kid) != 1 or kid not in KEY_IDS:
+            raise ValueError(f"QR_SIGNING_KEYS: identifiant de clé invalide {kid!r} (une majuscule ou un chiffre)")
+        keys.append((kid, secret))
+    # Par défaut : clé dérivée de SECRET_KEY
+    return tuple(keys) or (('0', fallback),)
+
+
+def signing_keys():
+    return _parse_keys(_setting('QR_SIGNING_KEYS', ''), settings.SECRET_KEY)
+
+
+def _mac(kid, secret, ticket_bytes):
+    message = f'{VERSION}{kid}'.encode() + ticket_bytes
+    return salted_hmac(KEY_SALT, message, secret=secret, algorithm='sha256').digest()[:MAC_BYTES]
+
+
+def encode_ticket(ticket_uuid):
+    """Code signé (clé courante) pour un ticket."""
+    if not isinstance(ticket_uuid, uuid.UUID):
+        ticket_uuid = uuid.UUID(str(ticket_uuid))
+    kid, secret = signing_keys()[0]
+    raw = ticket_uuid.bytes + _mac(kid, secret, ticket_uuid.bytes)
+    return f"{VERSION}{kid}.{base64.b32encode(raw).decode().rstrip('=')}"
+
+
+def _reject(reason, message):
+    metrics.inc('ticket_codes_rejected_total', reason=reason)
+    raise InvalidTicketCode(message)
+
+
+def _decode_signed(code):
+    header, dot, body = code.partition('.')
+    if not dot or len(header) != len(VERSION) + 1:
+        _reject('malformed', "Code de ticket mal formé")
+    kid = header[-1]
+    secret = dict(signing_keys()).get(kid)
+    if secret is None:
+        _reject('unknown_key', "Clé de signature inconnue")
+    try:
+        raw = base64.b32decode(body + '=' * (-len(body) % 8))
+    except (binascii.Error, ValueError):
+        _reject('malformed', "Code de ticket mal formé")
+    if len(raw) != 16 + MAC_BYTES:
+        _reject('malformed', "Code de ticket mal formé")
+    ticket_bytes, mac = raw[:16], raw[16:]
+    if not hmac.compare_digest(mac, _mac(kid, secret, ticket_bytes)):
+        _reject('bad_signature', "Signature du ticket invalide")
+    return uuid.UUID(bytes=ticket_bytes)
+
+
+def decode_ticket(code):
+    """
+    Retourne l'UUID du ticket contenu dans `code` (code signé, ou ancien
+    format si autorisé). Lève InvalidTicketCode sinon ; aucune requête SQL.
+    """
+    if isinstance(code, uuid.UUID):
+        code = str(code)
+    if not isinstance(code, str) or not code:
+        _reject('malformed', "Code de ticket manquant")
+    code = code.strip()
+    if code.upper().startswith(VERSION):
+        # Certains lecteurs renvoient le mode alphanumérique en minuscules
+        return _decode_signed(code.upper())
+    if not _setting('QR_ACCEPT_LEGACY_PAYLOADS', True):
+        _reject('legacy', "Ancien format de ticket refusé")
+    if code.startswith(LEGACY_PREFIX):
+        code = code[len(LEGACY_PREFIX):]
+    try:
+        return uuid.UUID(code)
+    except ValueError:
+        _reject('malformed', "Code de ticket mal formé")
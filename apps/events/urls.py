@@ -3,23 +3,64 @@ from django.urls import path
 from .views import (
     ParticipantListCreateAPIView,
     ParticipantRetrieveUpdateDestroyAPIView,
+    ParticipantImportAPIView,
+    ParticipantExportAPIView,
+    CampaignListCreateAPIView,
+    CampaignDetailAPIView,
+    CampaignActionAPIView,
     VerifyTicketAPIView,
+    VerifyTicketBatchAPIView,
+    TicketSnapshotAPIView,
+    TicketDeltaAPIView,
+    TicketQRCodeView,
     ToggleRegistrationAPIView,
+    AttendanceStatsAPIView,
+    MetricsAPIView,
     CurrentUserAPIView,
     CsrfTokenView, LoginAPIView, LogoutAPIView,
     ActivateUserAPIView,
     EventSettingsAPIView
 )
+from .live import checkin_stream_view
 
 urlpatterns = [
     # participants
     path('participants/', ParticipantListCreateAPIView.as_view(),
          name='participants-list-create'),
+    path('participants/import/', ParticipantImportAPIView.as_view(),
+         name='participants-import'),
+    path('participants/export/', ParticipantExportAPIView.as_view(),
+         name='participants-export'),
     path('participants/<int:pk>/', ParticipantRetrieveUpdateDestroyAPIView.as_view(),
          name='participant-detail'),
 
+    # campagnes d'envoi des billets (admin only)
+    path('campaigns/', CampaignListCreateAPIView.as_view(), name='campaigns'),
+    path('campaigns/<int:pk>/', CampaignDetailAPIView.as_view(), name='campaign-detail'),
+    path('campaigns/<int:pk>/cancel/', CampaignActionAPIView.as_view(action='cancel'),
+         name='campaign-cancel'),
+    path('campaigns/<int:pk>/resume/', CampaignActionAPIView.as_view(action='resume'),
+         name='campaign-resume'),
+
     # verification
     path('verify/', VerifyTicketAPIView.as_view(), name='verify-ticket'),
+    path('verify/batch/', VerifyTicketBatchAPIView.as_view(), name='verify-ticket-batch'),
+
+    # statistiques de participation (admin only)
+    path('stats/', AttendanceStatsAPIView.as_view(), name='attendance-stats'),
+
+    # tableau de bord des entrées en direct, server-sent events (admin only)
+    path('checkins/stream/', checkin_stream_view, name='checkins-stream'),
+
+    # image QR d'un ticket (rendue à la demande, mise en cache)
+    path('tickets/<uuid:ticket_uuid>/qr.png', TicketQRCodeView.as_view(), name='ticket-qr'),
+
+    # synchronisation hors-ligne des appareils de contrôle (admin only)
+    path('tickets/snapshot/', TicketSnapshotAPIView.as_view(), name='tickets-snapshot'),
+    path('tickets/delta/', TicketDeltaAPIView.as_view(), name='tickets-delta'),
+
+    # métriques Prometheus (admin ou METRICS_TOKEN)
+    path('metrics/', MetricsAPIView.as_view(), name='metrics'),
 
     # toggle registration (admin only)
     path('toggle-registration/', ToggleRegistrationAPIView.as_view(),
@@ -0,0 +1,93 @@
+# apps/events/usernames.py
+"""
+Attribution des noms d'utilisateur des comptes créés automatiquement pour les
+participants : partie locale de l'email, suffixée `_1`, `_2`... si elle est prise.
+
+Le nom suivant est calculé à partir du plus grand suffixe existant (une seule
+requête, quel que soit le nombre de collisions) ; en cas d'inscriptions
+concurrentes, la contrainte d'unicité tranche et l'attribution est rejouée.
+"""
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+CREATE_RETRIES = 5
+
+
+def username_base(email):
+    return email.split('@')[0]
+
+
+def _suffix(username, base):
+    """Suffixe numérique de `base_N` (0 pour `base`), None si ce n'est pas un nom de la série."""
+    if username == base:
+        return 0
+    rest = username[len(base) + 1:]
+    if username.startswith(f"{base}_") and rest.isdigit() and not rest.startswith('0'):
+        return int(rest)
+    return None
+
+
+def allocate_username(base):
+    """
+    Nom libre pour `base` en une requête : `username LIKE 'base%'` (servi par
+    l'index `_like` sous Postgres, contrairement à une regex), la série
+    `base`/`base_N` étant reconnue en Python.
+    """
+    return allocate_usernames([base])[0]
+
+
+def allocate_usernames(bases):
+    """
+    Attribue un nom libre pour chaque base (l'ordre est conservé), en une
+    seule requête pour tout le lot.
+    """
+    distinct = set(bases)
+    if not distinct:
+        return []
+    User = get_user_model()
+    condition = Q()
+    for base in distinct:
+        condition |= Q(username__startswith=base)
+
+    # Plus grand suffixe déjà pris par base (-1 : base libre)
+    highest = {base: -1 for base in distinct}
+    for username in User.objects.filter(condition).values_list('username', flat=True).iterator():
+        # Un nom `x` ou `x_N` appartient à la série de la base `x`
+        for base in {username, username.rsplit('_', 1)[0]} & distinct:
+            suffix = _suffix(username, base)
+            if suffix is not None and suffix > highest[base]:
+                highest[base] = suffix
+
+    usernames = []
+    for base in bases:
+        highest[base] += 1
+        usernames.append(f"{base}_{highest[base]}" if highest[base] else base)
+    return usernames
+
+
+def create_participant_user(participant):
+    """
+    Crée le compte (inactif) d'un participant. Si une inscription concurrente
+    prend le même nom entre le calcul et l'INSERT, l'IntegrityError est
+    absorbée par un savepoint et un nouveau nom est calculé.
+    """
+    User = get_user_model()
+    base = username_base(participant.email)
+    for attempt in range(CREATE_RETRIES + 1):
+        # Dernier recours : suffixe aléatoire, sans collision en pratique
+        username = allocate_username(base) if attempt < CREATE_RETRIES else f"{base}_{uuid.uuid4().hex[:8]}"
+        try:
+            with transaction.atomic():
+                return User.objects.create_user(
+                    username=username,
+                    email=participant.email,
+                    first_name=participant.first_name,
+                    last_name=participant.last_name,
+                    password=None,  # Pas de mot de passe par défaut
+                    is_active=False,
+                )
+        except IntegrityError:
+            continue
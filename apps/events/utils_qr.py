@@ -1,11 +1,47 @@
 import qrcode
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
 from io import BytesIO
+from django.conf import settings
 from django.core.files.base import ContentFile
 import base64
 
+from . import metrics
+from .ticket_codes import LEGACY_PREFIX, encode_ticket
 
-def generate_qr_image_bytes(data: str):
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
+# À incrémenter si les paramètres de rendu changent (invalide ETag et caches)
+QR_RENDER_VERSION = 1
+
+
+def build_ticket_payload(ticket_uuid) -> str:
+    """
+    Contenu encodé dans le QR d'un ticket : code signé (voir ticket_codes),
+    ou ancien format `ticket:<uuid>` si QR_SIGNED_PAYLOADS est faux.
+    """
+    if getattr(settings, 'QR_SIGNED_PAYLOADS', True):
+        return encode_ticket(ticket_uuid)
+    return f"{LEGACY_PREFIX}{ticket_uuid}"
+
+
+def build_qr_payload(participant) -> str:
+    """Contenu encodé dans le QR d'un participant."""
+    return build_ticket_payload(participant.ticket_uuid)
+
+
+# Paramètres de rendu par variante : `default` pour l'API et l'écran,
+# `email` plus compacte (correction d'erreur L, modules plus petits) pour
+# alléger les emails ; un QR affiché sur un écran propre se lit sans mal.
+QR_VARIANTS = {
+    'default': {'box_size': 10, 'border': 4, 'error_correction': qrcode.constants.ERROR_CORRECT_M},
+    'email': {'box_size': 6, 'border': 2, 'error_correction': qrcode.constants.ERROR_CORRECT_L},
+}
+
+
+def generate_qr_image_bytes(data: str, variant: str = 'default'):
+    qr = qrcode.QRCode(version=1, **QR_VARIANTS[variant])
     qr.add_data(data)
     qr.make(fit=True)
     img = qr.make_image(fill_color='black', back_color='white')
@@ -17,3 +53,110 @@ def generate_qr_image_bytes(data: str):
 
 def qr_bytes_to_base64(qr_bytes: bytes) -> str:
     return base64.b64encode(qr_bytes).decode('utf-8')
+
+
+class LRUBytesCache:
+    """Petit cache LRU thread-safe, borné en nombre d'entrées."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_memory_cache = LRUBytesCache(getattr(settings, 'QR_MEMORY_CACHE_SIZE', 2048))
+
+
+def qr_digest(payload: str, variant: str = 'default') -> str:
+    """Adresse du contenu : même payload et même rendu => même image."""
+    key = f"{QR_RENDER_VERSION}:{payload}" if variant == 'default' else f"{QR_RENDER_VERSION}:{variant}:{payload}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _disk_cache_path(digest):
+    directory = getattr(settings, 'QR_DISK_CACHE_DIR', None)
+    if not directory:
+        return None
+    return os.path.join(directory, digest[:2], f"{digest}.png")
+
+
+def get_cached_qr_png(digest):
+    """PNG déjà rendu (mémoire puis disque), ou None."""
+    png = _memory_cache.get(digest)
+    if png is not None:
+        metrics.inc('qr_cache_requests_total', layer='memory')
+        return png
+    path = _disk_cache_path(digest)
+    if path and os.path.exists(path):
+        with open(path, 'rb') as f:
+            png = f.read()
+        _memory_cache.set(digest, png)
+        metrics.inc('qr_cache_requests_total', layer='disk')
+        return png
+    metrics.inc('qr_cache_requests_total', layer='miss')
+    return None
+
+
+def evict_ticket_qr(ticket_uuid):
+    """Retire des caches mémoire (de ce process) et disque les QR d'un ticket."""
+    for payload in {build_ticket_payload(ticket_uuid), f"{LEGACY_PREFIX}{ticket_uuid}"}:
+        for variant in QR_VARIANTS:
+            digest = qr_digest(payload, variant)
+            _memory_cache.delete(digest)
+            path = _disk_cache_path(digest)
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def participant_post_delete(sender, instance, **kwargs):
+    """Un ticket supprimé ne doit plus être servi depuis les caches."""
+    evict_ticket_qr(instance.ticket_uuid)
+
+
+def render_qr_png(payload: str, variant: str = 'default') -> bytes:
+    """Rend le QR d'un payload en passant par le cache mémoire / disque."""
+    digest = qr_digest(payload, variant)
+    png = get_cached_qr_png(digest)
+    if png is not None:
+        return png
+    started = time.perf_counter()
+    png = generate_qr_image_bytes(payload, variant)
+    metrics.observe('qr_render_seconds', time.perf_counter() - started, variant=variant)
+    _memory_cache.set(digest, png)
+    path = _disk_cache_path(digest)
+    if path:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Le cache disque est optionnel
+            pass
+    return png
@@ -1,12 +1,33 @@
 # apps/events/views.py
+
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAdminUser, AllowAny
-
-from .serializers import ParticipantCreateSerializer, ParticipantSerializer, EventSettingsSerializer
-from .models import Participant, RegistrationSetting, EventSettings
-from .email_utils import send_participant_update_email
+from rest_framework.permissions import IsAdminUser, AllowAny, BasePermission
+from rest_framework.parsers import MultiPartParser, FormParser
+
+from .serializers import (
+    ParticipantCreateSerializer, ParticipantSerializer, ParticipantCheckInSerializer,
+    EventSettingsSerializer, CampaignSerializer, CampaignCreateSerializer,
+)
+from .models import Participant, RegistrationSetting, EventSettings, Campaign
+from .campaigns import cancel_campaign, resume_campaign, start_campaign
+from .usernames import create_participant_user
+from .counters import get_counters
+from . import metrics
+from .pagination import KeysetCursorPagination
+from .checkin import (
+    STATUS_ADMITTED, VerifyRejected, check_in_batch, decode_verify_request, verify_ticket,
+)
+from .snapshot import SnapshotExpired, build_delta, build_snapshot
+from .importer import ImportFormatError, import_participants, read_rows
+from .idempotency import idempotent
+from .throttling import (
+    SCOPE_ACTIVATE, SCOPE_DEFAULT, SCOPE_LOGIN, SCOPE_REGISTER, SCOPE_VERIFY,
+)
+from .filters import filter_participants, parse_ordering
+from .exports import EXPORT_FORMATS, aiter_export, iter_export
+from .utils_qr import build_ticket_payload, get_cached_qr_png, qr_digest, render_qr_png
 from django.db import transaction
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth import get_user_model
@@ -14,14 +35,34 @@ from django.views.decorators.csrf import ensure_csrf_cookie
 from django.middleware.csrf import get_token
 from django.utils.decorators import method_decorator
 from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.conf import settings as django_settings
 
 
 class ParticipantListCreateAPIView(generics.ListCreateAPIView):
     """
-    GET  /api/participants/  -> liste des participants
-    POST /api/participants/  -> créer un participant (génère QR + envoie mail)
+    GET  /api/participants/  -> liste paginée des participants
+         ?cursor=...     page suivante (voir `next` dans la réponse)
+         ?page_size=N    taille de page (max 500)
+         ?fields=a,b,c   projection ; par défaut sans qr_base64 / qr_url
+         ?search=...     recherche (nom, email, téléphone, organisation, poste, pays, type)
+         ?used=true|false, ?event_type=..., ?country=..., ?email=...
+         ?created_after=, ?created_before=, ?used_after=, ?used_before= (ISO 8601)
+         ?ordering=[-]created_at|first_name|last_name|email|organization|country|event_type
+    POST /api/participants/  -> créer un participant ; le QR et l'email
+         d'invitation sont traités en arrière-plan (voir `jobs` dans la réponse) ;
+         en-tête Idempotency-Key facultatif (voir idempotency.py)
     """
-    queryset = Participant.objects.all().order_by('-created_at')
+    queryset = Participant.objects.all().order_by('-created_at', '-id')
+    pagination_class = KeysetCursorPagination
+
+    @property
+    def throttle_scope(self):
+        # Débit propre aux inscriptions (QR, email) ; la liste suit le débit par défaut
+        return SCOPE_REGISTER if self.request.method == 'POST' else SCOPE_DEFAULT
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -32,6 +73,39 @@ class ParticipantListCreateAPIView(generics.ListCreateAPIView):
         # met le request dans le contexte pour construire des URLs absolues
         return {'request': self.request}
 
+    def get_cursor_ordering(self):
+        return parse_ordering(self.request.query_params.get('ordering'))
+
+    def filter_queryset(self, queryset):
+        return filter_participants(queryset, self.request.query_params)
+
+    def get_projection(self):
+        """Champs demandés via ?fields=, sinon la projection légère par défaut."""
+        requested = self.request.query_params.get('fields')
+        if requested:
+            return [f.strip() for f in requested.split(',') if f.strip()]
+        return list(ParticipantSerializer.LIST_DEFAULT_FIELDS)
+
+    def get_projected_queryset(self, fields):
+        """Ne charge que les colonnes nécessaires à la projection demandée."""
+        columns = {f.name for f in Participant._meta.concrete_fields}
+        needed = {'id'} | {f.lstrip('-') for f in self.get_cursor_ordering()}
+        needed |= columns.intersection(fields)
+        if {'qr_base64', 'qr_url'}.intersection(fields):
+            needed.add('qr_code')
+        queryset = self.filter_queryset(self.get_queryset()).only(*needed)
+        if 'jobs' in fields:
+            queryset = queryset.prefetch_related('jobs')
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        fields = self.get_projection()
+        page = self.paginate_queryset(self.get_projected_queryset(fields))
+        serializer = ParticipantSerializer(
+            page, many=True, fields=fields, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @idempotent('participants-create')
     def create(self, request, *args, **kwargs):
         # Bloquer la création si les inscriptions sont fermées
         try:
@@ -60,27 +134,10 @@ class ParticipantListCreateAPIView(generics.ListCreateAPIView):
                 
                 # Vérifier si un utilisateur avec cet email existe déjà
                 if not User.objects.filter(email=email).exists():
-                    # Générer un nom d'utilisateur basé sur l'email
-                    username = email.split('@')[0]
-                    # S'assurer que le nom d'utilisateur est unique
-                    original_username = username
-                    counter = 1
-                    while User.objects.filter(username=username).exists():
-                        username = f"{original_username}_{counter}"
-                        counter += 1
-                    
-                    # Créer l'utilisateur
-                    user = User.objects.create_user(
-                        username=username,
-                        email=email,
-                        first_name=participant.first_name,
-                        last_name=participant.last_name,
-                        password=None  # Pas de mot de passe par défaut
-                    )
-                    # Marquer l'utilisateur comme inactif par défaut (sécurité)
-                    user.is_active = False
-                    user.save()
-                    
+                    # Nom d'utilisateur unique basé sur l'email, compte inactif
+                    # par défaut (sécurité) ; voir usernames.py
+                    create_participant_user(participant)
+
             except Exception as e:
                 # En cas d'erreur lors de la création de l'utilisateur,
                 # on continue sans échouer la création du participant
@@ -114,6 +171,113 @@ class ParticipantListCreateAPIView(generics.ListCreateAPIView):
         return Response(out, status=status.HTTP_201_CREATED, headers=headers)
 
 
+class ParticipantImportAPIView(APIView):
+    """
+    POST /api/participants/import/  (multipart : file=<.csv|.xlsx>)
+    Options : chunk_size (défaut 500), send_invitations (défaut true).
+    Retourne { total, created, errors: [ { row, errors }, ... ] }.
+    Protégé aux administrateurs.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'detail': 'file required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            chunk_size = max(1, int(request.data.get('chunk_size', 500)))
+        except (TypeError, ValueError):
+            return Response({'detail': 'chunk_size must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        send_invitations = str(request.data.get('send_invitations', 'true')).lower() not in ('0', 'false', 'no')
+
+        try:
+            report = import_participants(
+                read_rows(upload, upload.name),
+                chunk_size=chunk_size,
+                send_invitations=send_invitations,
+            )
+        except ImportFormatError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+
+
+class ParticipantExportAPIView(APIView):
+    """
+    GET /api/participants/export/?output=csv|jsonl
+    Filtres : used, event_type, country, created_after, created_before,
+              used_after, used_before (dates ISO 8601).
+    Réponse en streaming : la mémoire reste constante quelle que soit la taille.
+    Protégé aux administrateurs.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'detail': f"output must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = filter_participants(Participant.objects.all(), request.query_params)
+
+        # Sous ASGI, un itérateur synchrone serait lu en entier avant l'envoi
+        export = aiter_export if isinstance(request._request, ASGIRequest) else iter_export
+        response = StreamingHttpResponse(
+            export(queryset, export_format), content_type=EXPORT_FORMATS[export_format])
+        filename = f"participants-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class CampaignListCreateAPIView(generics.ListAPIView):
+    """
+    GET  /api/campaigns/ -> dernières campagnes et leur progression
+    POST /api/campaigns/ {name, template: invitation|update, filters: {...}}
+         filters : used, event_type, country, email, created_after/before,
+                   used_after/before, search (comme la liste des participants).
+    L'envoi est fait par les workers `process_jobs`. Protégé aux administrateurs.
+    """
+    permission_classes = [IsAdminUser]
+    serializer_class = CampaignSerializer
+
+    def get_queryset(self):
+        return Campaign.objects.all()[:50]
+
+    def post(self, request):
+        serializer = CampaignCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        campaign = start_campaign(created_by=request.user, **serializer.validated_data)
+        return Response(CampaignSerializer(campaign).data, status=status.HTTP_201_CREATED)
+
+
+class CampaignDetailAPIView(generics.RetrieveAPIView):
+    """GET /api/campaigns/<pk>/ -> progression de la campagne (admin only)."""
+    permission_classes = [IsAdminUser]
+    serializer_class = CampaignSerializer
+    queryset = Campaign.objects.all()
+
+
+class CampaignActionAPIView(APIView):
+    """
+    POST /api/campaigns/<pk>/cancel/ : arrête l'envoi après le lot en cours.
+    POST /api/campaigns/<pk>/resume/ : relance les tranches arrêtées ou en échec.
+    Protégé aux administrateurs.
+    """
+    permission_classes = [IsAdminUser]
+    action = None
+
+    def post(self, request, pk):
+        campaign = generics.get_object_or_404(Campaign, pk=pk)
+        if self.action == 'cancel':
+            cancel_campaign(campaign)
+        else:
+            resume_campaign(campaign)
+        campaign.refresh_from_db()
+        return Response(CampaignSerializer(campaign).data)
+
+
 class ParticipantRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     """
     GET /api/participants/<pk>/ -> détail d'un participant
@@ -181,21 +345,7 @@ class ParticipantRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIV
                     user.save()
                 except User.DoesNotExist:
                     # Si l'utilisateur n'existe pas, créer un nouvel utilisateur
-                    username = participant.email.split('@')[0]
-                    original_username = username
-                    counter = 1
-                    while User.objects.filter(username=username).exists():
-                        username = f"{original_username}_{counter}"
-                        counter += 1
-                    
-                    user = User.objects.create_user(
-                        username=username,
-                        email=participant.email,
-                        first_name=participant.first_name,
-                        last_name=participant.last_name,
-                        password=None,
-                        is_active=False
-                    )
+                    create_participant_user(participant)
             except Exception:
                 # En cas d'erreur, on continue sans échouer la mise à jour du participant
                 pass
@@ -243,58 +393,202 @@ class ParticipantRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIV
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+# Clés partagées par la vue DRF et sa version async (async_views.py)
+VERIFY_IDEMPOTENCY_SCOPE = 'verify-ticket'
+
+
 class VerifyTicketAPIView(APIView):
     """
     POST /api/verify/
     Body: { "ticket_uuid": "...", "mark_used": true|false (optional) }
 
+    ticket_uuid peut être le contenu du QR : code signé (ticket_codes), ou
+    `ticket:<uuid>` / UUID nu tant que QR_ACCEPT_LEGACY_PAYLOADS est vrai.
+
     Réponses :
       - 200 { valid: true, participant: {...} } si trouvé (et non déjà utilisé),
       - 200 { valid: false, already_used: true, participant: {...} } si déjà utilisé,
-      - 404 { valid: false } si non trouvé.
+      - 404 { valid: false } si non trouvé (ou code invalide, sans requête SQL).
+
+    Avec mark_used, la validation est un UPDATE conditionnel unique : un
+    ticket ne peut être admis qu'une seule fois, même scanné simultanément à
+    deux entrées. La réponse ne contient pas l'image QR. Avec un en-tête
+    Idempotency-Key, un renvoi de la validation (mark_used) rejoue la première
+    réponse (voir idempotency.py) au lieu de répondre `already_used` ; la clé
+    n'est réservée qu'une fois le code décodé.
     """
     permission_classes = [AllowAny]
+    throttle_scope = SCOPE_VERIFY
 
     def post(self, request):
-        ticket_uuid = request.data.get(
-            'ticket_uuid') or request.data.get('ticket')
-        if not ticket_uuid:
-            return Response({'detail': 'ticket_uuid required'}, status=status.HTTP_400_BAD_REQUEST)
-
         try:
-            participant = Participant.objects.get(ticket_uuid=ticket_uuid)
-        except Participant.DoesNotExist:
-            return Response({'valid': False}, status=status.HTTP_404_NOT_FOUND)
-
-        # Si déjà utilisé
-        if getattr(participant, 'used', False):
-            data = ParticipantSerializer(
-                participant, context={'request': request}).data
-            return Response({'valid': False, 'already_used': True, 'participant': data}, status=status.HTTP_200_OK)
-
-        # Si on demande de marquer comme utilisé
-        mark_used = request.data.get('mark_used', False)
-        if mark_used and hasattr(participant, 'used'):
-            try:
-                participant.mark_used()
-            except Exception:
-                # ne doit pas empêcher la réponse
-                pass
+            # Signature vérifiée en mémoire : un code forgé n'atteint pas la
+            # base (ni la table des clés d'idempotence)
+            ticket_uuid = decode_verify_request(request.data)
+        except VerifyRejected as e:
+            return Response(e.body, status=e.status)
+
+        if request.data.get('mark_used', False):
+            return self.check_in(request, ticket_uuid)
+        response_status, body = verify_ticket(ticket_uuid)
+        return Response(body, status=response_status)
 
-        # Construire la réponse avec info QR
-        data = ParticipantSerializer(
-            participant, context={'request': request}).data
+    @idempotent(VERIFY_IDEMPOTENCY_SCOPE)
+    def check_in(self, request, ticket_uuid):
+        response_status, body = verify_ticket(ticket_uuid, mark_used=True)
+        return Response(body, status=response_status)
+
+
+class VerifyTicketBatchAPIView(APIView):
+    """
+    POST /api/verify/batch/
+    Body: { "scans": [ { "ticket_uuid": "...", "scanned_at": "<ISO 8601>", "gate_id": "..." }, ... ] }
+          (une liste nue est aussi acceptée)
+
+    Rejoue en une requête les scans mis en tampon par un appareil hors-ligne.
+    Le premier scan (horodatage appareil) d'un ticket l'emporte. Réponse :
+      200 { admitted: n, results: [ { ticket_uuid, gate_id, status, participant? }, ... ] }
+    avec status parmi admitted, already_used, duplicate, not_found, invalid.
+    """
+    permission_classes = [AllowAny]
+    throttle_scope = SCOPE_VERIFY
+    max_batch_size = 1000
+
+    def post(self, request):
+        scans = request.data.get('scans') if isinstance(request.data, dict) else request.data
+        if not isinstance(scans, list) or not scans:
+            return Response({'detail': 'scans (non-empty list) required'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(scans) > self.max_batch_size:
+            return Response(
+                {'detail': f'At most {self.max_batch_size} scans per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = []
+        admitted = 0
+        for record, verdict, participant in check_in_batch(scans):
+            record = record if isinstance(record, dict) else {}
+            item = {
+                'ticket_uuid': record.get('ticket_uuid') or record.get('ticket'),
+                'gate_id': record.get('gate_id'),
+                'status': verdict,
+            }
+            if participant is not None:
+                item['participant'] = ParticipantCheckInSerializer(participant).data
+            admitted += verdict == STATUS_ADMITTED
+            results.append(item)
+
+        return Response({'admitted': admitted, 'results': results}, status=status.HTTP_200_OK)
+
+
+class TicketSnapshotAPIView(APIView):
+    """
+    GET /api/tickets/snapshot/ -> instantané binaire des tickets valides
+    (UUID de 16 octets triés, voir snapshot.py), version dans l'en-tête
+    X-Snapshot-Version. Répond 304 si If-None-Match correspond.
+    Protégé aux administrateurs.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        version, data = build_snapshot()
+        etag = f'"{version}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(data, content_type='application/octet-stream')
+            response['Content-Disposition'] = f'attachment; filename="tickets-{version}.bin"'
+        response['ETag'] = etag
+        response['X-Snapshot-Version'] = str(version)
+        return response
+
+
+class TicketDeltaAPIView(APIView):
+    """
+    GET /api/tickets/delta/?since=<version>
+    -> { version, since, valid: [...], used: [...], removed: [...] } : tickets
+       créés, validés ou supprimés depuis `since`. 410 si `since` est plus
+       ancien que TICKET_DELETION_RETENTION : retélécharger l'instantané.
+       Protégé aux administrateurs.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
         try:
-            create_ser = ParticipantCreateSerializer(
-                participant, context={'request': request})
-            data['qr_base64'] = create_ser.get_qr_base64(participant)
-            data['qr_url'] = create_ser.get_qr_url(participant)
-        except Exception:
-            data['qr_base64'] = None
-            data['qr_url'] = request.build_absolute_uri(
-                participant.qr_code.url) if participant.qr_code else None
+            since = int(request.query_params.get('since', ''))
+        except ValueError:
+            return Response({'detail': 'since (integer version) required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return Response(build_delta(since))
+        except SnapshotExpired:
+            return Response({'detail': 'Snapshot too old, download /api/tickets/snapshot/ again.'},
+                            status=status.HTTP_410_GONE)
+
+
+class TicketQRCodeView(APIView):
+    """
+    GET /api/tickets/<ticket_uuid>/qr.png -> image PNG du QR, rendue à la demande.
+
+    L'image est adressée par son contenu (ETag = empreinte du payload et des
+    paramètres de rendu) et servie depuis un cache LRU en mémoire, puis un
+    cache disque optionnel (QR_DISK_CACHE_DIR). L'existence du ticket est
+    vérifiée d'abord (une requête sur l'index de ticket_uuid) : un ticket
+    supprimé n'est plus servi. If-None-Match -> 304 sans rendu.
+    """
+    permission_classes = [AllowAny]
+    max_age = 60 * 60 * 24 * 30
+
+    def get(self, request, ticket_uuid):
+        if not Participant.objects.filter(ticket_uuid=ticket_uuid).exists():
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        payload = build_ticket_payload(ticket_uuid)
+        digest = qr_digest(payload)
+        etag = f'"{digest[:32]}"'
+
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            png = get_cached_qr_png(digest) or render_qr_png(payload)
+            response = HttpResponse(png, content_type='image/png')
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={self.max_age}, immutable'
+        return response
+
+
+class HasMetricsToken(BasePermission):
+    """Accès par `Authorization: Bearer <METRICS_TOKEN>` (collecteur Prometheus)."""
+
+    def has_permission(self, request, view):
+        token = getattr(django_settings, 'METRICS_TOKEN', '')
+        header = request.headers.get('Authorization', '')
+        return bool(token) and constant_time_compare(header, f'Bearer {token}')
 
-        return Response({'valid': True, 'participant': data}, status=status.HTTP_200_OK)
+
+class AttendanceStatsAPIView(APIView):
+    """
+    GET /api/stats/ -> inscrits, validés et restants ; arrivées par heure (UTC,
+    d'après used_at) ; répartition par type d'événement, pays et organisation.
+    Lu dans la table des compteurs (une requête, sans parcourir les participants).
+    Protégé aux administrateurs.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        data = get_counters(arrivals=True)
+        data['remaining'] = data['total'] - data['used']
+        return Response(data)
+
+
+class MetricsAPIView(APIView):
+    """
+    GET /api/metrics/ -> métriques du process au format texte Prometheus
+    (requêtes et latence par route, requêtes SQL, rendu QR, envois SMTP).
+    Réservé aux administrateurs ou au jeton METRICS_TOKEN.
+    """
+    permission_classes = [IsAdminUser | HasMetricsToken]
+
+    def get(self, request):
+        return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 class ToggleRegistrationAPIView(APIView):
@@ -357,6 +651,7 @@ class LoginAPIView(APIView):
     IMPORTANT: le frontend doit inclure le cookie CSRF (fetch credentials: 'include')
     """
     permission_classes = [AllowAny]
+    throttle_scope = SCOPE_LOGIN
 
     def post(self, request):
         username = request.data.get('username')
@@ -399,6 +694,7 @@ class ActivateUserAPIView(APIView):
     Active un utilisateur créé automatiquement lors de l'inscription d'un participant.
     """
     permission_classes = [AllowAny]
+    throttle_scope = SCOPE_ACTIVATE
 
     def post(self, request):
         email = request.data.get('email')
@@ -4,18 +4,31 @@ import { apiFetch } from "./utils/apiFetch"
 const API_BASE_URL = import.meta.env.VITE_API_URL || ""
 const API_PREFIX = `${API_BASE_URL}/api`
 
+// En-tête Idempotency-Key : un renvoi avec la même clé rejoue la réponse
+const idempotencyHeaders = (key) => (key ? { "Idempotency-Key": key } : {})
+
+export const newIdempotencyKey = () =>
+  globalThis.crypto?.randomUUID?.() ?? `${Date.now()}-${Math.random().toString(36).slice(2)}`
+
 export const api = {
-  listParticipants: () =>
-    apiFetch(`${API_PREFIX}/participants/`, { method: "GET" }),
+  // params : { search, used, event_type, country, email, ordering, page_size }
+  listParticipants: (params = {}) => {
+    const query = new URLSearchParams(params).toString()
+    return apiFetch(`${API_PREFIX}/participants/${query ? `?${query}` : ""}`, { method: "GET" })
+  },
+
+  // nextUrl : lien `next` renvoyé par la page précédente (pagination par curseur)
+  listParticipantsPage: (nextUrl) => apiFetch(nextUrl, { method: "GET" }),
 
   getParticipant: (id) =>
     apiFetch(`${API_PREFIX}/participants/${encodeURIComponent(id)}/`, {
       method: "GET"
     }),
 
-  createParticipant: (payload) =>
+  createParticipant: (payload, idempotencyKey) =>
     apiFetch(`${API_PREFIX}/participants/`, {
       method: "POST",
+      headers: idempotencyHeaders(idempotencyKey),
       body: JSON.stringify(payload)
     }),
 
@@ -30,9 +43,11 @@ export const api = {
       method: "DELETE"
     }),
 
-  verifyTicket: (payload) =>
+  // Une clé par scan : un renvoi après coupure ne répond pas `already_used`
+  verifyTicket: (payload, idempotencyKey = newIdempotencyKey()) =>
     apiFetch(`${API_PREFIX}/verify/`, {
       method: "POST",
+      headers: idempotencyHeaders(idempotencyKey),
       body: JSON.stringify(payload)
     }),
 
@@ -45,6 +60,9 @@ export const api = {
           : JSON.stringify({ is_open: Boolean(isOpen) })
     }),
 
+  // Inscrits / validés, arrivées par heure et répartitions (admin)
+  getStats: () => apiFetch(`${API_PREFIX}/stats/`, { method: "GET" }),
+
   currentUser: () => apiFetch(`${API_PREFIX}/current_user/`, { method: "GET" }),
 
   // Event settings
@@ -1,6 +1,6 @@
 // src/components/AddParticipant.jsx
-import React, { useState } from "react"
-import { api } from "../api" // j'assume que api.createParticipant existe et renvoie { status, data }
+import React, { useEffect, useRef, useState } from "react"
+import { api, newIdempotencyKey } from "../api" // j'assume que api.createParticipant existe et renvoie { status, data }
 
 export default function AddParticipant() {
   const initialForm = {
@@ -19,9 +19,35 @@ export default function AddParticipant() {
   const [error, setError] = useState(null)
   const [loading, setLoading] = useState(false)
   const [invalidFields, setInvalidFields] = useState(new Set())
+  // Même clé tant que le formulaire n'a pas changé : un double envoi (réseau
+  // lent, double clic) rejoue la première inscription au lieu d'en créer une
+  const idempotencyKeyRef = useRef(null)
+
+  // Le QR est généré en arrière-plan : on interroge le participant jusqu'à ce
+  // que le job `render_qr` soit terminé (ou en échec).
+  useEffect(() => {
+    if (!resp?.id || resp.qr_url || resp.qr_base64) return
+    const state = resp.jobs?.render_qr?.status
+    if (state === "done" || state === "failed") return
+
+    let cancelled = false
+    const timer = setTimeout(async () => {
+      try {
+        const { data } = await api.getParticipant(resp.id)
+        if (!cancelled) setResp(data)
+      } catch (err) {
+        console.warn("Participant polling failed:", err)
+      }
+    }, 1500)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [resp])
 
   const update = (key, value) => {
     setForm((s) => ({ ...s, [key]: value }))
+    idempotencyKeyRef.current = null
     // Clear invalid state when user starts typing
     if (invalidFields.has(key)) {
       setInvalidFields(prev => {
@@ -38,12 +64,10 @@ export default function AddParticipant() {
     if (!email) return
 
     try {
-      // Check if email already exists by trying to get participants
-      const participants = await api.listParticipants()
-      const existingParticipant = participants.data?.find(p => 
-        p.email.toLowerCase() === email.toLowerCase()
-      )
-      
+      // Check if email already exists (filtre côté serveur)
+      const participants = await api.listParticipants({ email, fields: "id", page_size: 1 })
+      const existingParticipant = participants.data?.results?.length > 0
+
       if (existingParticipant) {
         setError("Un participant avec cet email existe déjà.")
         setInvalidFields(new Set(['email']))
@@ -83,7 +107,9 @@ export default function AddParticipant() {
 
     setLoading(true)
     try {
-      const { status, data } = await api.createParticipant(form)
+      if (!idempotencyKeyRef.current) idempotencyKeyRef.current = newIdempotencyKey()
+      const { status, data } = await api.createParticipant(form, idempotencyKeyRef.current)
+      idempotencyKeyRef.current = null
       // si ta fonction api lance une erreur au lieu de retourner status/data, adapte en conséquence
       setResp(data)
       setForm(initialForm)
@@ -249,6 +275,7 @@ export default function AddParticipant() {
             className="bg-gray-200 text-gray-800 px-4 py-2 rounded"
             onClick={() => {
               setForm(initialForm)
+              idempotencyKeyRef.current = null
               setError(null)
               setResp(null)
               setInvalidFields(new Set())
@@ -279,7 +306,9 @@ export default function AddParticipant() {
                 />
               ) : (
                 <div className="p-3 bg-gray-50 text-sm text-gray-600 rounded">
-                  QR non disponible
+                  {resp.jobs?.render_qr?.status === "failed"
+                    ? "QR non disponible"
+                    : "Génération du QR en cours..."}
                 </div>
               )}
             </div>
@@ -8,53 +8,78 @@ export default function ParticipantsList() {
   const [searchTerm, setSearchTerm] = useState("")
   const [statusFilter, setStatusFilter] = useState("all") // "all", "active", "used"
   const [deletingId, setDeletingId] = useState(null)
+  const [nextUrl, setNextUrl] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [stats, setStats] = useState(null)
   const navigate = useNavigate()
 
+  // Totaux calculés par l'API (compteurs), pas sur la page chargée
+  const loadStats = async () => {
+    try {
+      const res = await api.getStats()
+      setStats(res && res.data !== undefined ? res.data : res)
+    } catch (err) {
+      console.error("Failed to fetch stats:", err)
+    }
+  }
+
+  useEffect(() => {
+    loadStats()
+  }, [])
+
+  // Recherche et filtres côté serveur (rechargés après une courte pause de saisie)
   useEffect(() => {
     let mounted = true
-    ;(async () => {
+    const params = {}
+    if (searchTerm.trim()) params.search = searchTerm.trim()
+    if (statusFilter === "active") params.used = "false"
+    if (statusFilter === "used") params.used = "true"
+
+    const timer = setTimeout(async () => {
       setLoading(true)
       try {
-        const res = await api.listParticipants()
+        const res = await api.listParticipants(params)
         // res peut être soit {status, data}, soit directement data
         const payload = res && res.data !== undefined ? res.data : res
         const list = Array.isArray(payload) ? payload : payload?.results || []
-        if (mounted) setList(list)
+        if (mounted) {
+          setList(list)
+          setNextUrl(payload?.next || null)
+        }
       } catch (err) {
         console.error("Failed to fetch participants:", err)
         if (mounted) {
           setList([])
-          // optional: setError(err.message || 'Erreur');
+          setNextUrl(null)
         }
       } finally {
         if (mounted) setLoading(false)
       }
-    })()
+    }, searchTerm ? 300 : 0)
     return () => {
       mounted = false
+      clearTimeout(timer)
     }
-  }, [])
-
-  // Filter and search logic
-  const filteredList = list.filter((p) => {
-    // Status filter
-    const statusMatch = 
-      statusFilter === "all" || 
-      (statusFilter === "active" && !p.used) || 
-      (statusFilter === "used" && p.used)
+  }, [searchTerm, statusFilter])
 
-    // Search filter
-    const searchMatch = searchTerm === "" || 
-      `${p.first_name} ${p.last_name}`.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      p.email.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      (p.phone && p.phone.includes(searchTerm)) ||
-      (p.organization && p.organization.toLowerCase().includes(searchTerm.toLowerCase())) ||
-      (p.position && p.position.toLowerCase().includes(searchTerm.toLowerCase())) ||
-      (p.country && p.country.toLowerCase().includes(searchTerm.toLowerCase())) ||
-      (p.event_type && p.event_type.toLowerCase().includes(searchTerm.toLowerCase()))
+  // Charger la page suivante (pagination par curseur)
+  const loadMore = async () => {
+    if (!nextUrl) return
+    setLoadingMore(true)
+    try {
+      const res = await api.listParticipantsPage(nextUrl)
+      const payload = res && res.data !== undefined ? res.data : res
+      setList(prevList => [...prevList, ...(payload?.results || [])])
+      setNextUrl(payload?.next || null)
+    } catch (err) {
+      console.error("Failed to fetch more participants:", err)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
 
-    return statusMatch && searchMatch
-  })
+  // La recherche et les filtres sont appliqués par l'API
+  const filteredList = list
 
   // Delete participant function
   const handleDelete = async (participantId, participantName) => {
@@ -67,6 +92,7 @@ export default function ParticipantsList() {
       await api.deleteParticipant(participantId)
       // Remove from local list
       setList(prevList => prevList.filter(p => p.id !== participantId))
+      loadStats()
     } catch (error) {
       console.error("Failed to delete participant:", error)
       alert("Erreur lors de la suppression du participant")
@@ -87,16 +113,22 @@ export default function ParticipantsList() {
           <h2 className="text-2xl font-semibold">Participants</h2>
           {!loading && (
             <p className="text-sm text-gray-600 mt-1">
-              {filteredList.length} participant{filteredList.length !== 1 ? 's' : ''} 
-              {(searchTerm || statusFilter !== "all") && (
-                <span className="text-gray-500">
-                  {" "}(sur {list.length} total)
-                </span>
-              )}
-              {filteredList.length > 0 && (
-                <span className="ml-2">
-                  ({filteredList.filter(p => !p.used).length} actif{filteredList.filter(p => !p.used).length !== 1 ? 's' : ''}, {filteredList.filter(p => p.used).length} utilisé{filteredList.filter(p => p.used).length !== 1 ? 's' : ''})
-                </span>
+              {stats ? (
+                <>
+                  {stats.total} participant{stats.total !== 1 ? 's' : ''}
+                  <span className="ml-2">
+                    ({stats.remaining} actif{stats.remaining !== 1 ? 's' : ''}, {stats.used} utilisé{stats.used !== 1 ? 's' : ''})
+                  </span>
+                  {(searchTerm.trim() || statusFilter !== "all") && (
+                    <span className="ml-2">
+                      — {filteredList.length}{nextUrl ? "+" : ""} résultat{filteredList.length !== 1 ? 's' : ''}
+                    </span>
+                  )}
+                </>
+              ) : (
+                <>
+                  {filteredList.length}{nextUrl ? "+" : ""} participant{filteredList.length !== 1 ? 's' : ''}
+                </>
               )}
             </p>
           )}
@@ -314,6 +346,18 @@ export default function ParticipantsList() {
               )}
             </div>
           )}
+
+          {nextUrl && (
+            <div className="text-center py-4 border-t border-gray-200">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-4 py-2 text-sm text-blue-600 hover:text-blue-800 border border-gray-300 rounded-md hover:bg-gray-50 disabled:opacity-50"
+              >
+                {loadingMore ? "Chargement..." : "Charger plus"}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -123,7 +123,8 @@ export default function VerifyPage() {
     }
   }
 
-  // Normalize payload: extract ticket UUID from payload like "ticket:UUID" or ?ticket=URL
+  // Normalize payload: extract ticket UUID from payload like "ticket:UUID" or ?ticket=URL.
+  // Signed codes ("T1A.XXXX...") are sent as-is and checked by the server.
   function extractTicket(payload) {
     if (!payload) return null
     try {
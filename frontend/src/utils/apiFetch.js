@@ -21,11 +21,22 @@ export async function apiFetch(url, opts = {}) {
     }
   }
 
-  const res = await fetch(url, {
-    credentials: "include",
-    ...opts,
-    headers: defaultHeaders
-  })
+  const doFetch = () =>
+    fetch(url, {
+      credentials: "include",
+      ...opts,
+      headers: defaultHeaders
+    })
+
+  let res
+  try {
+    res = await doFetch()
+  } catch (e) {
+    // Coupure réseau : une requête avec Idempotency-Key peut être renvoyée
+    // sans risque (le serveur rejoue la première réponse si elle a abouti)
+    if (!defaultHeaders["Idempotency-Key"]) throw e
+    res = await doFetch()
+  }
 
   const text = await res.text()
   let data = null
@@ -0,0 +1,8 @@
+import os
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+from django.core.asgi import get_asgi_application
+# Mode ASGI : vues async des endpoints chauds (voir project/urls_asgi.py)
+os.environ.setdefault('DJANGO_ASGI', 'True')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+# Fichiers statiques (admin) servis sans WhiteNoise, synchrone
+application = ASGIStaticFilesHandler(get_asgi_application())
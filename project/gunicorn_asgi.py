@@ -0,0 +1,13 @@
+# Configuration gunicorn du mode ASGI (workers uvicorn) :
+#   gunicorn project.asgi:application -c project/gunicorn_asgi.py
+# Chaque worker est une boucle d'événements : les vues async (verify, liste et
+# détail des participants, réglages, flux SSE) y tiennent des milliers de
+# connexions ; les vues DRF synchrones s'exécutent dans des threads.
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', '3'))
+worker_class = 'uvicorn_worker.UvicornWorker'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
@@ -11,6 +11,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret')
 DEBUG = os.getenv('DEBUG', 'True') == 'True'
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost').split(',')
+# Mode ASGI (positionné par project/asgi.py) : vues async des endpoints chauds
+ASGI_MODE = os.getenv('DJANGO_ASGI', 'False') == 'True'
 
 
 INSTALLED_APPS = [
@@ -25,7 +27,13 @@ INSTALLED_APPS = [
     'apps.events',
 ]
 MIDDLEWARE = [
+    # Sondes /health/ et /ready/ : répondent avant session, CSRF et auth
+    'apps.events.health.HealthCheckMiddleware',
+    # Mesure la requête complète (voir apps/events/metrics.py)
+    'apps.events.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    # 503 rapide sous charge (après CORS : le navigateur lit Retry-After)
+    'apps.events.throttling.LoadSheddingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -35,9 +43,13 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+if ASGI_MODE:
+    # WhiteNoise est synchrone : en ASGI il ferait passer chaque requête par
+    # un thread. Les fichiers statiques sont servis par project/asgi.py.
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
 
 
-ROOT_URLCONF = 'project.urls'
+ROOT_URLCONF = 'project.urls_asgi' if ASGI_MODE else 'project.urls'
 
 
 TEMPLATES = [
@@ -58,6 +70,7 @@ TEMPLATES = [
 
 
 WSGI_APPLICATION = 'project.wsgi.application'
+ASGI_APPLICATION = 'project.asgi.application'
 DATABASE_URL = os.getenv('DATABASE_URL', '')
 if DATABASE_URL:
     DATABASES = {'default': dj_database_url.parse(DATABASE_URL)}
@@ -70,6 +83,27 @@ else:
     }
 
 
+# Cache partagé entre workers (Redis) si REDIS_URL est défini, sinon cache
+# mémoire local à chaque process.
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# Durée max (secondes) pendant laquelle un process garde RegistrationSetting /
+# EventSettings sans revérifier la base ; avec Redis, l'invalidation est immédiate.
+SINGLETON_CACHE_TTL = int(os.getenv('SINGLETON_CACHE_TTL', '5'))
+
+
 AUTH_PASSWORD_VALIDATORS = []
 
 
@@ -84,17 +118,79 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
-
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Images QR (apps/events/storage.py) : STORAGES['qr'], système de fichiers
+# sous MEDIA_ROOT par défaut ; QR_STORAGE_BACKEND=s3 pour un stockage objet
+# compatible S3 (AWS, MinIO...) via django-storages. Après un changement de
+# backend ou de QR_SHARD_DEPTH : `python manage.py migrate_qr_storage`.
+QR_STORAGE_BACKEND = os.getenv('QR_STORAGE_BACKEND', 'filesystem')
+if QR_STORAGE_BACKEND == 's3':
+    QR_STORAGE = {
+        'BACKEND': 'storages.backends.s3.S3Storage',
+        'OPTIONS': {
+            'bucket_name': os.getenv('QR_S3_BUCKET', ''),
+            'endpoint_url': os.getenv('QR_S3_ENDPOINT_URL') or None,
+            'region_name': os.getenv('QR_S3_REGION') or None,
+            'access_key': os.getenv('QR_S3_ACCESS_KEY') or None,
+            'secret_key': os.getenv('QR_S3_SECRET_KEY') or None,
+            'file_overwrite': False,
+        },
+    }
+else:
+    QR_STORAGE = {'BACKEND': 'django.core.files.storage.FileSystemStorage'}
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedStaticFilesStorage'},
+    'qr': QR_STORAGE,
+}
+# Niveaux de sous-répertoires (256 chacun) sous qr_codes/
+QR_SHARD_DEPTH = int(os.getenv('QR_SHARD_DEPTH', '1'))
+
+
+# Débits par classe d'endpoint (apps/events/throttling.py), '<n>/<s|min|h|d>' :
+# seau de n requêtes rechargé sur la période, par IP (`:ip`) et par
+# session/utilisateur (`:session`). THROTTLE_RATES remplace certaines valeurs :
+# 'verify:ip=3000/min,register:session=5/min' ; une valeur vide supprime la limite.
+THROTTLE_RATES = {
+    'default:ip': '1200/min',
+    'register:ip': '120/min',
+    'register:session': '10/min',
+    'verify:ip': '3000/min',
+    'verify:session': '600/min',
+    'activate:ip': '30/min',
+    'activate:session': '5/min',
+    'login:ip': '60/min',
+    'login:session': '10/min',
+}
+THROTTLE_RATES.update(
+    item.strip().split('=', 1)
+    for item in os.getenv('THROTTLE_RATES', '').split(',') if '=' in item
+)
 
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'apps.events.throttling.IPTokenBucketThrottle',
+        'apps.events.throttling.SessionTokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': THROTTLE_RATES,
+    # Proxys devant Django (Caddy : 1) ; l'IP du client est lue dans X-Forwarded-For.
+    # À 0 derrière un proxy, tous les clients ont l'IP du proxy : les débits
+    # `:ip` deviennent des limites globales pour tout le site.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
 }
+# Délestage (apps/events/throttling.py) : au-delà de LOAD_SHED_MAX_IN_FLIGHT
+# requêtes en cours dans un process, 503 immédiat sauf pour la validation des
+# tickets. 0 : désactivé. Effectif en ASGI (docker-compose.prod.yml) ou avec
+# des workers à threads (gunicorn --threads) ; jamais avec des workers sync,
+# qui ne traitent qu'une requête à la fois (avertissement au démarrage).
+LOAD_SHED_MAX_IN_FLIGHT = int(os.getenv('LOAD_SHED_MAX_IN_FLIGHT', '0'))
+LOAD_SHED_RETRY_AFTER = int(os.getenv('LOAD_SHED_RETRY_AFTER', '2'))  # secondes
+LOAD_SHED_CRITICAL_PATHS = ['/api/verify/', '/api/tickets/snapshot/', '/api/tickets/delta/']
 # Email config
 EMAIL_HOST = os.getenv('EMAIL_HOST')
 EMAIL_PORT = int(os.getenv('EMAIL_PORT', '25'))
@@ -102,6 +198,70 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'no-reply@example.com')
+# Envoi groupé (apps/events/mail.py) : une connexion SMTP réutilisée par worker,
+# débit limité par worker (EMAIL_RATE_LIMIT messages/s, 0 = illimité).
+EMAIL_RATE_LIMIT = float(os.getenv('EMAIL_RATE_LIMIT', '0'))
+EMAIL_RATE_BURST = int(os.getenv('EMAIL_RATE_BURST', '10'))
+# Campagnes (apps/events/campaigns.py) : progression enregistrée tous les N emails
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', '50'))
+EMAIL_CONNECTION_IDLE_TIMEOUT = int(os.getenv('EMAIL_CONNECTION_IDLE_TIMEOUT', '60'))  # secondes
+EMAIL_SEND_RETRIES = int(os.getenv('EMAIL_SEND_RETRIES', '2'))
+
+# File de jobs d'arrière-plan (QR, emails) — voir apps/events/jobs.py
+# JOBS_EAGER=True exécute les jobs dans le process web après le commit
+# (pratique en développement sans worker `process_jobs`).
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'False') == 'True'
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', '5'))
+JOBS_BACKOFF_BASE = int(os.getenv('JOBS_BACKOFF_BASE', '5'))  # secondes
+JOBS_BACKOFF_MAX = int(os.getenv('JOBS_BACKOFF_MAX', '3600'))  # secondes
+JOBS_LOCK_TIMEOUT = int(os.getenv('JOBS_LOCK_TIMEOUT', '600'))  # secondes
+
+# Campagnes d'envoi (apps/events/campaigns.py) : destinataires par tranches
+# d'ids, une tranche = un job. Une tranche doit s'envoyer en moins de
+# JOBS_LOCK_TIMEOUT au débit EMAIL_RATE_LIMIT.
+CAMPAIGN_CHUNK_SIZE = int(os.getenv('CAMPAIGN_CHUNK_SIZE', '500'))
+CAMPAIGN_RENDER_WORKERS = int(os.getenv('CAMPAIGN_RENDER_WORKERS', '4'))
+
+# Images QR : rendues à la demande par /api/tickets/<uuid>/qr.png et mises en
+# cache (LRU mémoire + disque optionnel). Le stockage du PNG dans
+# Participant.qr_code est facultatif.
+QR_STORE_FILES = os.getenv('QR_STORE_FILES', 'True') == 'True'
+QR_MEMORY_CACHE_SIZE = int(os.getenv('QR_MEMORY_CACHE_SIZE', '2048'))  # entrées
+QR_DISK_CACHE_DIR = os.getenv('QR_DISK_CACHE_DIR', '') or None
+# Variante du QR jointe aux emails (voir utils_qr.QR_VARIANTS) : 'email' (compacte) ou 'default'
+QR_EMAIL_VARIANT = os.getenv('QR_EMAIL_VARIANT', 'email')
+# Contenu signé des QR (apps/events/ticket_codes.py). QR_SIGNING_KEYS :
+# 'A:secret,B:ancien-secret' ; la première clé signe, les autres restent
+# acceptées (rotation). Vide : clé dérivée de SECRET_KEY.
+QR_SIGNED_PAYLOADS = os.getenv('QR_SIGNED_PAYLOADS', 'True') == 'True'
+QR_SIGNING_KEYS = os.getenv('QR_SIGNING_KEYS', '')
+# Accepter encore les anciens QR `ticket:<uuid>` (période de migration)
+QR_ACCEPT_LEGACY_PAYLOADS = os.getenv('QR_ACCEPT_LEGACY_PAYLOADS', 'True') == 'True'
+
+# En-tête Idempotency-Key sur POST /api/participants/ et /api/verify/
+# (apps/events/idempotency.py) : réponses conservées IDEMPOTENCY_TTL secondes
+# (purge : `python manage.py purge_idempotency_keys`).
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '86400'))  # secondes
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', '10'))  # secondes
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', '60'))  # secondes
+
+# Traces de suppression des tickets (deltas de /api/tickets/delta/) : un appareil
+# dont l'instantané est plus ancien doit le retélécharger (410)
+# (purge : `python manage.py purge_ticket_deletions`).
+TICKET_DELETION_RETENTION = int(os.getenv('TICKET_DELETION_RETENTION', str(7 * 86400)))  # secondes
+
+# Sonde de disponibilité /ready/ (apps/events/health.py)
+READINESS_SMTP_TIMEOUT = float(os.getenv('READINESS_SMTP_TIMEOUT', '2'))  # secondes
+READINESS_SMTP_CACHE_SECONDS = int(os.getenv('READINESS_SMTP_CACHE_SECONDS', '60'))
+READINESS_MAX_JOB_BACKLOG = int(os.getenv('READINESS_MAX_JOB_BACKLOG', '1000'))
+
+# Métriques Prometheus (GET /api/metrics/, admin ou jeton METRICS_TOKEN)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Flux des entrées en direct (GET /api/checkins/stream/)
+CHECKIN_STREAM_POLL_INTERVAL = float(os.getenv('CHECKIN_STREAM_POLL_INTERVAL', '1'))  # secondes
+CHECKIN_STREAM_KEEPALIVE = int(os.getenv('CHECKIN_STREAM_KEEPALIVE', '15'))  # secondes
 
 # App domain for generating absolute URLs
 APP_DOMAIN = os.getenv('APP_DOMAIN', 'http://localhost:8000')
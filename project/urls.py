@@ -3,10 +3,15 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from apps.events.health import health_view, ready_view
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('apps.events.urls')),
+    # Sondes de l'orchestrateur (servies en amont par HealthCheckMiddleware)
+    path('health/', health_view, name='health'),
+    path('ready/', ready_view, name='ready'),
 ]
 
 
@@ -0,0 +1,15 @@
+# URLconf du mode ASGI (DJANGO_ASGI=True, voir project/asgi.py) : les
+# endpoints chauds sont servis par leurs versions async, placées avant les
+# routes DRF de project.urls qui restent utilisées pour tout le reste.
+from django.urls import path
+
+from apps.events import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/verify/', async_views.verify_ticket, name='verify-ticket'),
+    path('api/participants/', async_views.participant_list, name='participants-list-create'),
+    path('api/participants/<int:pk>/', async_views.participant_detail, name='participant-detail'),
+    path('api/event-settings/', async_views.event_settings, name='event-settings'),
+    path('api/toggle-registration/', async_views.registration_status, name='toggle-registration'),
+] + sync_urlpatterns